@@ -0,0 +1,113 @@
+"""
+Encode profile benchmark
+Renders sample clips with every encode profile and reports encode speed
+(fps, realtime factor) and output bitrate, to pick the cost/quality point
+per plan tier.
+
+Usage:
+    python benchmark_encode_profiles.py sample1.mp4 sample2.mp4 --duration 30
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(__file__))
+
+from services.render_pipeline import (
+    ENCODE_PROFILES,
+    AspectRatio,
+    RenderPipeline,
+    RenderPlan,
+)
+
+
+def benchmark_clip(pipeline, input_file, profile, start, duration, aspect_ratio, output_dir):
+    """Render one clip with one profile and measure it"""
+    output_file = os.path.join(
+        output_dir,
+        f"{os.path.splitext(os.path.basename(input_file))[0]}_{profile.name}.mp4"
+    )
+    plan = RenderPlan(
+        input_file=input_file,
+        output_file=output_file,
+        start=start,
+        end=start + duration,
+        aspect_ratio=aspect_ratio,
+        normalize_audio=False,  # Measure the video encode, not loudnorm
+        encode_profile=profile,
+    )
+    source_width, source_height = pipeline._probe_dimensions(input_file)
+    cmd = pipeline.build_render_command(
+        plan, source_width, source_height, pipeline._probe_has_audio(input_file)
+    )
+
+    started = time.perf_counter()
+    subprocess.run(cmd, check=True, capture_output=True)
+    elapsed = time.perf_counter() - started
+
+    info = pipeline.get_video_info(output_file) or {}
+    video = next((s for s in info.get("streams", []) if s.get("codec_type") == "video"), {})
+    output_duration = float(info.get("format", {}).get("duration") or duration)
+    frames = int(video.get("nb_frames") or round(output_duration * 30))
+    bitrate = int(info.get("format", {}).get("bit_rate") or 0)
+
+    return {
+        "clip": os.path.basename(input_file),
+        "profile": profile.name,
+        "seconds": round(elapsed, 2),
+        "fps": round(frames / elapsed, 1) if elapsed else 0.0,
+        "realtime": round(output_duration / elapsed, 2) if elapsed else 0.0,
+        "kbps": round(bitrate / 1000),
+        "size_mb": round(os.path.getsize(output_file) / 1024 ** 2, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark encode profiles on sample clips")
+    parser.add_argument("inputs", nargs="+", help="Sample source videos")
+    parser.add_argument("--profiles", nargs="+", default=list(ENCODE_PROFILES), choices=list(ENCODE_PROFILES))
+    parser.add_argument("--start", type=float, default=0.0, help="Clip start in each source (seconds)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Clip length (seconds)")
+    parser.add_argument("--aspect", default="9:16", choices=[a.value for a in AspectRatio])
+    parser.add_argument("--output-dir", help="Keep rendered clips here (default: temp dir)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    pipeline = RenderPipeline()
+    aspect_ratio = AspectRatio(args.aspect)
+    output_dir = args.output_dir or tempfile.mkdtemp(prefix="encode-benchmark-")
+    os.makedirs(output_dir, exist_ok=True)
+
+    results = []
+    for input_file in args.inputs:
+        for name in args.profiles:
+            if not args.json:
+                print(f"⏱️  {os.path.basename(input_file)} · {name}...", flush=True)
+            try:
+                results.append(benchmark_clip(
+                    pipeline, input_file, ENCODE_PROFILES[name],
+                    args.start, args.duration, aspect_ratio, output_dir
+                ))
+            except subprocess.CalledProcessError as e:
+                print(f"❌ {input_file} ({name}) failed: {e.stderr.decode()[-500:]}", file=sys.stderr)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"\n{'clip':<28}{'profile':<10}{'sec':>8}{'fps':>8}{'x rt':>7}{'kbps':>8}{'MB':>8}")
+    for r in results:
+        print(
+            f"{r['clip'][:27]:<28}{r['profile']:<10}{r['seconds']:>8}{r['fps']:>8}"
+            f"{r['realtime']:>7}{r['kbps']:>8}{r['size_mb']:>8}"
+        )
+    print(f"\nRendered clips: {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,8 +3,9 @@ FastAPI ML Workers - Main entry point
 Handles ASR, Ranker, Render, and Publish jobs
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 import logging
 import os
@@ -19,13 +20,19 @@ logger = logging.getLogger(__name__)
 
 # Import routers
 from routers import asr, ranker, render, publish, health, framing
+from services.executor import PoolSaturatedError, shutdown_pools
+from services.job_queue import use_job_queue
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup and shutdown events"""
     logger.info("🚀 ML Workers starting...")
+    if not use_job_queue():
+        # Jobs run in this process; with the queue on, worker.py preloads instead
+        await asr.preload_asr_models()
     yield
     logger.info("🛑 ML Workers shutting down...")
+    shutdown_pools()
 
 app = FastAPI(
     title="ClipForge ML Workers",
@@ -43,6 +50,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(PoolSaturatedError)
+async def pool_saturated_handler(request: Request, exc: PoolSaturatedError):
+    """Backpressure: ask clients to retry when worker pools are full"""
+    logger.warning(f"Rejecting {request.url.path}: {exc}")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "30"},
+    )
+
 # Include routers
 app.include_router(health.router, prefix="/health", tags=["health"])
 app.include_router(asr.router, prefix="/v1/asr", tags=["asr"])
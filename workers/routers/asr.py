@@ -1,13 +1,25 @@
 """ASR (Automatic Speech Recognition) Worker"""
 
 from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
+import asyncio
 import logging
 import os
 import requests
 import json
-from services.asr_provider import get_asr_provider
+from concurrent.futures import Executor, ThreadPoolExecutor
+from services.asr_provider import transcribe_file, warm_asr_provider
+from services.chunked_transcriber import probe_duration, transcribe_chunked
+from services.incremental_ranker import IncrementalRanker
+from services.ranker_engine import RankerEngine
+from services.audio_extractor import audio_format_for_provider, audio_path_for, extract_audio
+from services.render_pipeline import is_remote_input
+from services.source_cache import get_source_cache
+from services.executor import BoundedPool, cpu_pool, io_pool, run_io
+from services.job_queue import enqueue_job, use_job_queue
+from services.job_state import SSE_HEADERS, get_job_state
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -32,16 +44,33 @@ async def transcribe(request: ASRRequest, background_tasks: BackgroundTasks):
     - Extracts diarization
     - Stores transcript in DB
     """
+    # Backpressure: 503 while the local ASR pool is saturated
+    if not use_job_queue():
+        _asr_pool().check_capacity()
+    
     try:
         logger.info(f"Starting transcription for project {request.projectId}")
+        job_state = get_job_state()
+        await job_state.call(job_state.queued, "asr", request.projectId)
         
-        # Queue background job
-        background_tasks.add_task(
-            _transcribe_worker,
-            request.projectId,
-            request.assetUrl,
-            request.language
-        )
+        if use_job_queue():
+            # Durable queue: survives restarts, processed by worker.py
+            enqueue_job(
+                "asr",
+                run_transcribe_job,
+                request.projectId,
+                request.assetUrl,
+                request.language,
+                job_id=f"asr-{request.projectId}"
+            )
+        else:
+            # Queue background job
+            background_tasks.add_task(
+                _transcribe_worker,
+                request.projectId,
+                request.assetUrl,
+                request.language
+            )
         
         return ASRResponse(
             projectId=request.projectId,
@@ -51,42 +80,168 @@ async def transcribe(request: ASRRequest, background_tasks: BackgroundTasks):
         logger.error(f"Error queuing transcription: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-async def _transcribe_worker(projectId: str, assetUrl: str, language: str):
-    """Background worker for transcription"""
+def run_transcribe_job(projectId: str, assetUrl: str, language: str):
+    """Queue entry point; raises on failure so the queue retries the job"""
+    if not asyncio.run(_transcribe_worker(projectId, assetUrl, language)):
+        raise RuntimeError(f"Transcription failed for project {projectId}")
+
+async def _transcribe_worker(projectId: str, assetUrl: str, language: str) -> bool:
+    """Background worker for transcription. Returns success."""
+    source_cache = get_source_cache()
+    cache_key = source_cache.key_for(projectId, assetUrl)
+    cache_acquired = False
+    audio_path = None
+    job_state = get_job_state()
     try:
         logger.info(f"Transcription worker started for {projectId}")
         
-        # Download video
-        logger.info(f"Downloading video from {assetUrl}")
-        response = requests.get(assetUrl, stream=True, timeout=300)
-        response.raise_for_status()
+        # Reuse a cached upload if a render already fetched it; otherwise
+        # ffmpeg streams the audio track straight from the presigned URL
+        if _stream_audio(assetUrl) and not source_cache.contains(cache_key):
+            audio_source = assetUrl
+        else:
+            await job_state.call(job_state.stage, "asr", projectId, "downloading")
+            logger.info(f"Fetching video from {assetUrl}")
+            audio_source = await run_io(source_cache.acquire, cache_key, assetUrl)
+            cache_acquired = True
         
-        # Save to temp file
-        temp_path = f"/tmp/{projectId}_audio.mp3"
-        with open(temp_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+        # Extract a compact 16 kHz mono track; ASR never sees the video
+        await job_state.call(job_state.stage, "asr", projectId, "extracting")
+        audio_format = audio_format_for_provider(_asr_provider_name(), os.getenv("ASR_AUDIO_FORMAT"))
+        audio_path = audio_path_for(f"/tmp/{projectId}_audio", audio_format)
+        extracted = await run_io(extract_audio, audio_source, audio_path, audio_format)
+        if not extracted and not cache_acquired:
+            logger.warning("Streaming audio extraction failed, downloading full source")
+            await job_state.call(job_state.stage, "asr", projectId, "downloading")
+            audio_source = await run_io(source_cache.acquire, cache_key, assetUrl)
+            cache_acquired = True
+            extracted = await run_io(extract_audio, audio_source, audio_path, audio_format)
+        if not extracted:
+            raise RuntimeError(f"Audio extraction failed for project {projectId}")
+        if cache_acquired:
+            # Only the audio is needed from here on; unpin the video
+            source_cache.release(cache_key)
+            cache_acquired = False
         
-        # Get ASR provider
-        provider = get_asr_provider()
-        
-        # Transcribe
-        logger.info(f"Running transcription with {provider.__class__.__name__}...")
-        transcript_data = await provider.transcribe(temp_path, language=language)
+        # Transcribe in the pool that matches the provider's workload
+        await job_state.call(job_state.stage, "asr", projectId, "transcribing")
+        transcript_data = await _transcribe(projectId, audio_path, language)
         
         # TODO: Call API to store transcript
         logger.info(f"Transcription completed for {projectId}")
         logger.info(f"Transcript: {json.dumps(transcript_data, indent=2)}")
-        
-        # Cleanup
-        os.remove(temp_path)
+        await job_state.call(job_state.complete, "asr", projectId, {
+            "words": len(transcript_data.get("words", [])),
+            "language": transcript_data.get("language", language)
+        })
+        return True
         
     except Exception as e:
         logger.error(f"Transcription worker error: {str(e)}")
+        await job_state.call(job_state.fail, "asr", projectId, str(e))
         # TODO: Update project status to FAILED
+        return False
+    finally:
+        if cache_acquired:
+            source_cache.release(cache_key)
+        if audio_path and os.path.exists(audio_path):
+            os.remove(audio_path)
+
+async def _transcribe(projectId: str, audio_path: str, language: str) -> dict:
+    """Chunk long local Whisper jobs across the CPU pool; otherwise one pass"""
+    if _asr_provider_name() != "assemblyai" and os.getenv("ASR_CHUNKED", "true").lower() == "true":
+        duration = await run_io(probe_duration, audio_path)
+        if duration >= float(os.getenv("ASR_CHUNK_MIN_SECONDS", "900")):
+            # Provisional ranking is CPU work on a stateful ranker; one thread
+            # per job keeps batches in order without borrowing the I/O pool
+            ranking_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="provisional-rank")
+            try:
+                on_words = _provisional_ranking(projectId, duration, ranking_thread)
+                return await transcribe_chunked(
+                    audio_path, language, cpu_pool, duration=duration, on_words=on_words
+                )
+            finally:
+                ranking_thread.shutdown(wait=False)
+    return await _asr_pool().run(transcribe_file, audio_path, language)
+
+def _provisional_ranking(projectId: str, duration: float, executor: Executor):
+    """
+    Rank words as chunks land and publish provisional clips to job state
+    
+    Long uploads get candidate clips minutes before the transcript is
+    complete (ASR_PROVISIONAL_CLIPS). The ranker job still produces the
+    final moments. Batches run on executor, a thread owned by this job.
+    """
+    if os.getenv("ASR_PROVISIONAL_CLIPS", "true").lower() != "true":
+        return None
+    
+    # Same clip window the ranker uses for its default 60s clip length
+    ranker = IncrementalRanker(RankerEngine(min_clip_duration=30, max_clip_duration=90))
+    job_state = get_job_state()
+    
+    def rank_batch(words: list) -> list:
+        ranker.add_words(words)
+        return ranker.provisional_clips(num_clips=6)
+    
+    async def on_words(words: list):
+        clips = await asyncio.get_running_loop().run_in_executor(executor, rank_batch, words)
+        transcribed = ranker.transcript_end / duration if duration else 0
+        await job_state.call(job_state.progress, "asr", projectId, 35 + 60 * min(transcribed, 1.0))
+        await job_state.call(job_state.partial, "asr", projectId, transcribedSeconds=ranker.transcript_end, provisionalClips=[
+            {
+                "tStart": clip.start,
+                "tEnd": clip.end,
+                "duration": clip.duration,
+                "score": clip.score,
+                "reason": clip.reason,
+                "text": clip.text[:200],
+            }
+            for clip in clips
+        ])
+        logger.info(f"📈 {len(clips)} provisional clips after {ranker.transcript_end:.0f}s of transcript")
+    
+    return on_words
+
+def _asr_provider_name() -> str:
+    return os.getenv("ASR_PROVIDER", "whisper").lower()
+
+def _asr_pool() -> BoundedPool:
+    """Local Whisper is CPU-bound; AssemblyAI is a blocking network call"""
+    if _asr_provider_name() == "assemblyai":
+        return io_pool
+    return cpu_pool
+
+def _stream_audio(url: str) -> bool:
+    """Whether ffmpeg should read audio straight from the URL (ASR_STREAM_INPUT)"""
+    enabled = os.getenv("ASR_STREAM_INPUT", "true").lower() == "true"
+    return enabled and is_remote_input(url)
+
+async def preload_asr_models():
+    """Load the ASR model into every ASR pool worker (ASR_PRELOAD)"""
+    if os.getenv("ASR_PRELOAD", "true").lower() != "true":
+        return
+    pool = _asr_pool()
+    logger.info(f"Preloading ASR provider in {pool.max_workers} {pool.name} workers")
+    started = await pool.warm(warm_asr_provider)
+    logger.info(f"ASR provider loaded in {started} {pool.name} workers")
 
 @router.get("/status/{projectId}")
 async def get_status(projectId: str):
-    """Get transcription status"""
-    # TODO: Query DB for transcript status
-    return {"projectId": projectId, "status": "pending"}
+    """Get transcription status, current stage, percent complete and stage timings"""
+    job_state = get_job_state()
+    state = await job_state.call(job_state.get, "asr", projectId)
+    if state is None:
+        raise HTTPException(status_code=404, detail=f"No transcription job for project {projectId}")
+    return {"projectId": projectId, **state}
+
+@router.get("/status/{projectId}/stream")
+async def stream_status(projectId: str):
+    """Stream transcription status updates as server-sent events"""
+    job_state = get_job_state()
+    if await job_state.call(job_state.get, "asr", projectId) is None:
+        raise HTTPException(status_code=404, detail=f"No transcription job for project {projectId}")
+    return StreamingResponse(
+        job_state.stream("asr", projectId),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
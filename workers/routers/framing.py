@@ -5,11 +5,12 @@ Handles face detection and smart framing requests
 
 from fastapi import APIRouter, HTTPException, BackgroundTasks
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
 import logging
 import os
 
 from services.face_detection import FaceDetectionService, detect_faces
+from services.source_cache import get_source_cache
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/framing", tags=["framing"])
@@ -20,6 +21,7 @@ class FaceDetectionRequest(BaseModel):
     video_path: str = Field(..., description="Path to video file (local or MinIO)")
     sample_rate: int = Field(30, description="Process every Nth frame (default: 30 = 1fps at 30fps)")
     padding: float = Field(0.3, description="Padding around face region (0.3 = 30%)")
+    project_id: Optional[str] = Field(None, description="Project owning the video (shares the source cache)")
 
 
 class FaceDetectionResponse(BaseModel):
@@ -36,6 +38,38 @@ class VisualizeRequest(BaseModel):
     video_path: str
     output_path: str
     sample_rate: int = Field(1, description="Process every Nth frame")
+    project_id: Optional[str] = Field(None, description="Project owning the video (shares the source cache)")
+
+
+def _resolve_video(video_path: str, project_id: Optional[str]) -> Tuple[str, Optional[str]]:
+    """
+    Resolve a video path or URL to a local file
+    
+    URLs (e.g. presigned MinIO links) are fetched through the shared source
+    cache. Returns (local_path, cache_key); release cache_key when done.
+    """
+    if not video_path.startswith(("http://", "https://")):
+        if not os.path.exists(video_path):
+            raise HTTPException(status_code=404, detail=f"Video not found: {video_path}")
+        return video_path, None
+    
+    source_cache = get_source_cache()
+    cache_key = source_cache.key_for(project_id, video_path)
+    return source_cache.acquire(cache_key, video_path), cache_key
+
+
+def _release_video(cache_key: Optional[str]):
+    """Release a source cache reference taken by _resolve_video"""
+    if cache_key:
+        get_source_cache().release(cache_key)
+
+
+def _visualize_and_release(service, cache_key: Optional[str], **kwargs):
+    """Run face visualization in the background, then release the source"""
+    try:
+        service.visualize_face_detection(**kwargs)
+    finally:
+        _release_video(cache_key)
 
 
 @router.post("/detect-faces", response_model=FaceDetectionResponse)
@@ -78,17 +112,19 @@ async def detect_faces_endpoint(request: FaceDetectionRequest):
     try:
         logger.info(f"🔍 Face detection request: {request.video_path}")
         
-        # Validate video path
-        if not os.path.exists(request.video_path):
-            raise HTTPException(status_code=404, detail=f"Video not found: {request.video_path}")
+        # Validate video path (URLs are fetched through the source cache)
+        video_path, cache_key = _resolve_video(request.video_path, request.project_id)
         
         # Run face detection
-        service = FaceDetectionService()
-        result = service.get_face_tracking_data(
-            video_path=request.video_path,
-            sample_rate=request.sample_rate,
-            padding=request.padding
-        )
+        try:
+            service = FaceDetectionService()
+            result = service.get_face_tracking_data(
+                video_path=video_path,
+                sample_rate=request.sample_rate,
+                padding=request.padding
+            )
+        finally:
+            _release_video(cache_key)
         
         if result['primary_region'] is None:
             logger.warning("No faces detected in video")
@@ -138,15 +174,20 @@ async def visualize_faces_endpoint(
     try:
         logger.info(f"🎨 Visualization request: {request.video_path} -> {request.output_path}")
         
-        # Validate video path
-        if not os.path.exists(request.video_path):
-            raise HTTPException(status_code=404, detail=f"Video not found: {request.video_path}")
+        # Validate video path (URLs are fetched through the source cache)
+        video_path, cache_key = _resolve_video(request.video_path, request.project_id)
         
         # Run visualization in background
-        service = FaceDetectionService()
+        try:
+            service = FaceDetectionService()
+        except Exception:
+            _release_video(cache_key)
+            raise
         background_tasks.add_task(
-            service.visualize_face_detection,
-            video_path=request.video_path,
+            _visualize_and_release,
+            service,
+            cache_key,
+            video_path=video_path,
             output_path=request.output_path,
             sample_rate=request.sample_rate
         )
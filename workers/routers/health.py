@@ -1,6 +1,7 @@
 """Health check endpoints"""
 
 from fastapi import APIRouter
+from services.executor import pool_stats
 
 router = APIRouter()
 
@@ -12,4 +13,4 @@ async def liveness():
 @router.get("/ready")
 async def readiness():
     """Kubernetes readiness probe"""
-    return {"status": "ready"}
+    return {"status": "ready", "pools": pool_stats()}
@@ -1,12 +1,20 @@
 """Ranker Worker - Highlight Detection"""
 
 from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Dict, Optional, List, Tuple
+import asyncio
 import logging
 import json
-from services.ranker_engine import RankerEngine
+import uuid
+from services.ranker_engine import FEATURE_CACHE_KEY, RankerEngine, ClipScore, MultiSegmentClip
+from services.transcript import Transcript
 from services.database import DatabaseService
+from services.executor import cpu_pool, run_cpu, run_io
+from services.job_queue import enqueue_job, use_job_queue
+from services.job_state import SSE_HEADERS, get_job_state
+from services.weight_profiles import resolve_weights
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -16,6 +24,8 @@ class RankerRequest(BaseModel):
     transcriptId: str
     numClips: Optional[int] = 6
     clipLength: Optional[int] = 60
+    weightProfile: Optional[str] = None  # named profile, e.g. the tenant's org id
+    weights: Optional[Dict[str, float]] = None  # per-feature overrides
 
 class ProClipRequest(BaseModel):
     projectId: str
@@ -37,6 +47,22 @@ class RankerResponse(BaseModel):
     status: str
     clips: Optional[List[ClipScoreResponse]] = None
 
+class RankerBatchItem(BaseModel):
+    projectId: str
+    transcriptId: str
+
+class RankerBatchRequest(BaseModel):
+    items: List[RankerBatchItem]
+    numClips: Optional[int] = 6
+    clipLength: Optional[int] = 60
+    weightProfile: Optional[str] = None
+    weights: Optional[Dict[str, float]] = None
+
+class RankerBatchResponse(BaseModel):
+    batchId: str
+    status: str
+    projectIds: List[str]
+
 @router.post("/detect", response_model=RankerResponse)
 async def detect_highlights(request: RankerRequest, background_tasks: BackgroundTasks):
     """
@@ -46,16 +72,41 @@ async def detect_highlights(request: RankerRequest, background_tasks: Background
     - Scores windows (20-90s)
     - Returns top 6-12 ranked clips
     """
+    # Backpressure: 503 while the local ranking pool is saturated
+    if not use_job_queue():
+        cpu_pool.check_capacity()
+    
+    try:
+        weights = resolve_weights(request.weightProfile, request.weights)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     try:
         logger.info(f"Starting highlight detection for project {request.projectId}")
+        job_state = get_job_state()
+        await job_state.call(job_state.queued, "ranker", request.projectId)
         
-        background_tasks.add_task(
-            _ranker_worker,
-            request.projectId,
-            request.transcriptId,
-            request.numClips,
-            request.clipLength
-        )
+        if use_job_queue():
+            # Durable queue: survives restarts, processed by worker.py
+            enqueue_job(
+                "ranker",
+                run_ranker_job,
+                request.projectId,
+                request.transcriptId,
+                request.numClips,
+                request.clipLength,
+                weights,
+                job_id=f"ranker-{request.projectId}"
+            )
+        else:
+            background_tasks.add_task(
+                _ranker_worker,
+                request.projectId,
+                request.transcriptId,
+                request.numClips,
+                request.clipLength,
+                weights
+            )
         
         return RankerResponse(
             projectId=request.projectId,
@@ -65,22 +116,42 @@ async def detect_highlights(request: RankerRequest, background_tasks: Background
         logger.error(f"Error queuing ranker: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-async def _ranker_worker(projectId: str, transcriptId: str, numClips: int = 6, clipLength: int = 60):
-    """Background worker for highlight detection"""
+def run_ranker_job(
+    projectId: str,
+    transcriptId: str,
+    numClips: int = 6,
+    clipLength: int = 60,
+    weights: Optional[Dict[str, float]] = None
+):
+    """Queue entry point; raises on failure so the queue retries the job"""
+    if not asyncio.run(_ranker_worker(projectId, transcriptId, numClips, clipLength, weights)):
+        raise RuntimeError(f"Highlight detection failed for project {projectId}")
+
+async def _ranker_worker(
+    projectId: str,
+    transcriptId: str,
+    numClips: int = 6,
+    clipLength: int = 60,
+    weights: Optional[Dict[str, float]] = None
+) -> bool:
+    """Background worker for highlight detection. Returns success."""
     db = None
+    job_state = get_job_state()
     try:
         logger.info(f"🎬 Ranker worker started for {projectId}")
+        await job_state.call(job_state.stage, "ranker", projectId, "loading")
         logger.info(f"⚙️  Settings: {numClips} clips, {clipLength}s target length")
         
-        # Connect to database
-        db = DatabaseService()
+        # Connect to database (psycopg2 blocks; run in the I/O pool)
+        db = await run_io(DatabaseService)
         
         # Fetch transcript from DB
-        transcript = db.get_transcript(transcriptId)
+        transcript = await run_io(db.get_transcript, transcriptId)
         if not transcript:
             logger.error(f"❌ Transcript {transcriptId} not found")
-            db.update_project_status(projectId, 'FAILED')
-            return
+            await job_state.call(job_state.fail, "ranker", projectId, f"Transcript {transcriptId} not found")
+            await run_io(db.update_project_status, projectId, 'FAILED')
+            return False
         
         # Extract words and diarization from transcript data
         transcript_data = transcript.get('data', {})
@@ -89,79 +160,336 @@ async def _ranker_worker(projectId: str, transcriptId: str, numClips: int = 6, c
         
         if not words:
             logger.error(f"❌ No words in transcript {transcriptId}")
-            db.update_project_status(projectId, 'FAILED')
-            return
+            await job_state.call(job_state.fail, "ranker", projectId, f"No words in transcript {transcriptId}")
+            await run_io(db.update_project_status, projectId, 'FAILED')
+            return False
         
         logger.info(f"📝 Processing {len(words)} words from transcript")
         
+        # Columnar words pickle to the worker process as a few arrays
+        words = Transcript.from_words(words)
+        
         # Initialize ranker engine with target clip duration
         # Allow some flexibility around the target (±50%)
         min_duration = max(5, int(clipLength * 0.5))
         max_duration = int(clipLength * 1.5)
-        ranker = RankerEngine(min_clip_duration=min_duration, max_clip_duration=max_duration)
         logger.info(f"📏 Clip duration range: {min_duration}s - {max_duration}s (target: {clipLength}s)")
         
-        # Detect highlights
-        clip_scores = ranker.rank_highlights(
-            words=words,
-            diarization=diarization,
-            num_clips=numClips
+        # Detect highlights (CPU-bound; runs in a worker process). Cached
+        # segment features turn this into a re-rank with the current weights
+        await job_state.call(job_state.stage, "ranker", projectId, "ranking")
+        clip_scores, new_features = await run_cpu(
+            _rank_highlights_job,
+            words,
+            diarization,
+            numClips,
+            min_duration,
+            max_duration,
+            weights,
+            transcript_data.get(FEATURE_CACHE_KEY)
         )
         
         logger.info(f"✨ Detected {len(clip_scores)} highlights")
+        if new_features:
+            await run_io(db.save_transcript_data_key, FEATURE_CACHE_KEY, {transcriptId: new_features})
         
-        # Convert ClipScore objects to dict for database
-        clips_to_save = []
-        for i, clip in enumerate(clip_scores, 1):
-            # Generate meaningful title and description
-            title = _generate_clip_title(clip.text, i)
-            description = _generate_clip_description(clip.text, title)
-            
-            clips_to_save.append({
-                'tStart': clip.start,
-                'tEnd': clip.end,
-                'duration': clip.duration,
-                'score': int(clip.score * 100),  # Convert to percentage
-                'reason': clip.reason,
-                'features': clip.features,
-                'title': title,
-                'description': description,
-            })
-            logger.info(f"  📌 Clip {i}: {title} ({clip.start:.1f}s - {clip.end:.1f}s, {clip.duration:.1f}s, score: {clip.score:.2f})")
+        # Convert ClipScore objects to dict for database (titles call OpenAI)
+        await job_state.call(job_state.stage, "ranker", projectId, "titling")
+        clips_to_save = await run_io(_build_moments, clip_scores)
         
         # Save moments to database
-        success = db.save_moments(projectId, clips_to_save)
+        await job_state.call(job_state.stage, "ranker", projectId, "saving")
+        success = await run_io(db.save_moments, projectId, clips_to_save)
         
         if success:
             # Update project status to READY
-            db.update_project_status(projectId, 'READY')
+            await run_io(db.update_project_status, projectId, 'READY')
+            await job_state.call(job_state.complete, "ranker", projectId, {"clipCount": len(clips_to_save)})
             logger.info(f"✅ Highlight detection completed for {projectId}")
             
             # Notify API to send email notification
-            try:
-                import httpx
-                async with httpx.AsyncClient() as client:
-                    await client.post(
-                        f"http://clipforge-api:3001/v1/projects/{projectId}/notify-ready",
-                        json={"clipCount": len(clips_to_save)},
-                        timeout=5.0
-                    )
-                logger.info(f"📧 Notified API to send clips ready email for {projectId}")
-            except Exception as email_error:
-                logger.warning(f"⚠️ Failed to notify API for email: {email_error}")
-                # Don't fail the whole operation if notification fails
+            await _notify_ready(projectId, len(clips_to_save))
+            return True
         else:
-            db.update_project_status(projectId, 'FAILED')
+            await job_state.call(job_state.fail, "ranker", projectId, "Failed to save moments")
+            await run_io(db.update_project_status, projectId, 'FAILED')
             logger.error(f"❌ Failed to save moments for {projectId}")
+            return False
         
     except Exception as e:
         logger.error(f"❌ Ranker worker error: {str(e)}")
+        await job_state.call(job_state.fail, "ranker", projectId, str(e))
         if db:
-            db.update_project_status(projectId, 'FAILED')
+            await run_io(db.update_project_status, projectId, 'FAILED')
+        return False
     finally:
         if db:
             db.close()
 
+def _rank_highlights_job(
+    words: Transcript,
+    diarization: List[dict],
+    num_clips: int,
+    min_duration: float,
+    max_duration: float,
+    weights: Optional[Dict[str, float]] = None,
+    cached_features: Optional[dict] = None
+) -> Tuple[List[ClipScore], Optional[dict]]:
+    """
+    Rank highlights (module-level so the CPU process pool can pickle it)
+    
+    Returns:
+        Clips, and the feature cache payload to store if features were
+        extracted rather than loaded from cached_features
+    """
+    ranker = RankerEngine(min_clip_duration=min_duration, max_clip_duration=max_duration, weights=weights)
+    features = ranker.segment_features(words, diarization, cached=cached_features)
+    clip_scores = ranker.rerank(words, features, num_clips)
+    return clip_scores, (None if features.cached else features.to_cache())
+
+async def _notify_ready(projectId: str, clipCount: int):
+    """Ask the API to send the clips-ready email (failures are only logged)"""
+    try:
+        import httpx
+        async with httpx.AsyncClient() as client:
+            await client.post(
+                f"http://clipforge-api:3001/v1/projects/{projectId}/notify-ready",
+                json={"clipCount": clipCount},
+                timeout=5.0
+            )
+        logger.info(f"📧 Notified API to send clips ready email for {projectId}")
+    except Exception as email_error:
+        logger.warning(f"⚠️ Failed to notify API for email: {email_error}")
+        # Don't fail the whole operation if notification fails
+
+@router.post("/detect-batch", response_model=RankerBatchResponse)
+async def detect_highlights_batch(request: RankerBatchRequest, background_tasks: BackgroundTasks):
+    """
+    Detect highlights for many projects in one job
+    
+    - Fetches all transcripts in one query
+    - Ranks them across the CPU process pool
+    - Saves every project's moments in one transaction
+    """
+    if not request.items:
+        raise HTTPException(status_code=400, detail="No projects in batch")
+    
+    # Backpressure: 503 while the local ranking pool is saturated
+    if not use_job_queue():
+        cpu_pool.check_capacity()
+    
+    try:
+        weights = resolve_weights(request.weightProfile, request.weights)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        batch_id = uuid.uuid4().hex
+        project_ids = [item.projectId for item in request.items]
+        logger.info(f"Starting batch highlight detection {batch_id} for {len(project_ids)} projects")
+        job_state = get_job_state()
+        for projectId in project_ids:
+            await job_state.call(job_state.queued, "ranker", projectId)
+        
+        items = [item.model_dump() for item in request.items]
+        if use_job_queue():
+            enqueue_job(
+                "ranker",
+                run_ranker_batch_job,
+                items,
+                request.numClips,
+                request.clipLength,
+                weights,
+                job_id=f"ranker-batch-{batch_id}"
+            )
+        else:
+            background_tasks.add_task(
+                _ranker_batch_worker,
+                items,
+                request.numClips,
+                request.clipLength,
+                weights
+            )
+        
+        return RankerBatchResponse(
+            batchId=batch_id,
+            status="queued",
+            projectIds=project_ids
+        )
+    except Exception as e:
+        logger.error(f"Error queuing batch ranker: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def run_ranker_batch_job(
+    items: List[dict],
+    numClips: int = 6,
+    clipLength: int = 60,
+    weights: Optional[Dict[str, float]] = None
+):
+    """Queue entry point; raises on failure so the queue retries the batch"""
+    if not asyncio.run(_ranker_batch_worker(items, numClips, clipLength, weights)):
+        raise RuntimeError(f"Batch highlight detection failed for {len(items)} projects")
+
+async def _ranker_batch_worker(
+    items: List[dict],
+    numClips: int = 6,
+    clipLength: int = 60,
+    weights: Optional[Dict[str, float]] = None
+) -> bool:
+    """
+    Background worker for batch highlight detection
+    
+    Projects whose transcript is missing or fails to rank are marked
+    FAILED individually; the rest are saved together. Returns False only
+    if the bulk save fails.
+    """
+    db = None
+    job_state = get_job_state()
+    project_ids = [item['projectId'] for item in items]
+    try:
+        logger.info(f"🎬 Batch ranker started for {len(items)} projects")
+        for projectId in project_ids:
+            await job_state.call(job_state.stage, "ranker", projectId, "loading")
+        
+        # One connection and one query for every transcript
+        db = await run_io(DatabaseService)
+        transcripts = await run_io(db.get_transcripts, [item['transcriptId'] for item in items])
+        
+        ready = []  # (projectId, transcriptId, Transcript, diarization, cached features)
+        failed = []
+        for item in items:
+            transcript_data = (transcripts.get(item['transcriptId']) or {}).get('data') or {}
+            words = transcript_data.get('words', [])
+            if not words:
+                logger.error(f"❌ No words in transcript {item['transcriptId']}")
+                await job_state.call(job_state.fail, "ranker", item['projectId'], f"No words in transcript {item['transcriptId']}")
+                failed.append(item['projectId'])
+                continue
+            ready.append((
+                item['projectId'],
+                item['transcriptId'],
+                Transcript.from_words(words),
+                transcript_data.get('diarization', []),
+                transcript_data.get(FEATURE_CACHE_KEY)
+            ))
+        
+        logger.info(f"📝 Ranking {len(ready)} transcripts ({len(failed)} missing)")
+        min_duration = max(5, int(clipLength * 0.5))
+        max_duration = int(clipLength * 1.5)
+        
+        # Spread transcripts over the process pool, one rank_many call per worker
+        for entry in ready:
+            await job_state.call(job_state.stage, "ranker", entry[0], "ranking")
+        workers = max(1, min(cpu_pool.max_workers, len(ready)))
+        shares = [ready[i::workers] for i in range(workers)] if ready else []
+        share_results = await asyncio.gather(*(
+            run_cpu(
+                _rank_many_job,
+                [(words, diarization) for _, _, words, diarization, _ in share],
+                numClips,
+                min_duration,
+                max_duration,
+                weights,
+                [cached for _, _, _, _, cached in share]
+            )
+            for share in shares
+        ))
+        
+        # Titles call OpenAI; moments are collected for one bulk insert
+        moments_by_project = {}
+        new_features = {}
+        for share, results in zip(shares, share_results):
+            for (projectId, transcriptId, _, _, _), result in zip(share, results):
+                if result is None:
+                    await job_state.call(job_state.fail, "ranker", projectId, "Highlight detection failed")
+                    failed.append(projectId)
+                    continue
+                clip_scores, features = result
+                if features:
+                    new_features[transcriptId] = features
+                await job_state.call(job_state.stage, "ranker", projectId, "titling")
+                logger.info(f"✨ Detected {len(clip_scores)} highlights for {projectId}")
+                moments_by_project[projectId] = await run_io(_build_moments, clip_scores)
+        
+        for projectId in moments_by_project:
+            await job_state.call(job_state.stage, "ranker", projectId, "saving")
+        await run_io(db.save_transcript_data_key, FEATURE_CACHE_KEY, new_features)
+        success = await run_io(db.save_moments_bulk, moments_by_project, 'READY')
+        if failed:
+            await run_io(db.update_projects_status, failed, 'FAILED')
+        
+        if not success:
+            for projectId in moments_by_project:
+                await job_state.call(job_state.fail, "ranker", projectId, "Failed to save moments")
+            await run_io(db.update_projects_status, list(moments_by_project), 'FAILED')
+            logger.error(f"❌ Failed to save moments for batch of {len(moments_by_project)} projects")
+            return False
+        
+        for projectId, moments in moments_by_project.items():
+            await job_state.call(job_state.complete, "ranker", projectId, {"clipCount": len(moments)})
+        await asyncio.gather(*(
+            _notify_ready(projectId, len(moments))
+            for projectId, moments in moments_by_project.items()
+        ))
+        logger.info(f"✅ Batch highlight detection completed for {len(moments_by_project)} projects")
+        return True
+        
+    except Exception as e:
+        logger.error(f"❌ Batch ranker error: {str(e)}")
+        for projectId in project_ids:
+            await job_state.call(job_state.fail, "ranker", projectId, str(e))
+        if db:
+            await run_io(db.update_projects_status, project_ids, 'FAILED')
+        return False
+    finally:
+        if db:
+            db.close()
+
+def _rank_many_job(
+    transcripts: List[tuple],
+    num_clips: int,
+    min_duration: float,
+    max_duration: float,
+    weights: Optional[Dict[str, float]] = None,
+    cached_features: Optional[List[Optional[dict]]] = None
+) -> List[Optional[Tuple[List[ClipScore], Optional[dict]]]]:
+    """
+    Rank a share of a batch (module-level so the CPU process pool can pickle it)
+    
+    Returns:
+        Per transcript: None if ranking failed, else the clips and the
+        feature cache payload to store (None if the cache was used)
+    """
+    ranker = RankerEngine(min_clip_duration=min_duration, max_clip_duration=max_duration, weights=weights)
+    return [
+        None if result is None else (
+            result.clips,
+            None if result.features.cached else result.features.to_cache()
+        )
+        for result in ranker.rank_many(transcripts, num_clips=num_clips, cached_features=cached_features)
+    ]
+
+def _build_moments(clip_scores: List[ClipScore]) -> List[dict]:
+    """Convert ranked clips to Moment rows with titles and descriptions"""
+    clips_to_save = []
+    for i, clip in enumerate(clip_scores, 1):
+        # Generate meaningful title and description
+        title = _generate_clip_title(clip.text, i)
+        description = _generate_clip_description(clip.text, title)
+        
+        clips_to_save.append({
+            'tStart': clip.start,
+            'tEnd': clip.end,
+            'duration': clip.duration,
+            'score': int(clip.score * 100),  # Convert to percentage
+            'reason': clip.reason,
+            'features': clip.features,
+            'title': title,
+            'description': description,
+        })
+        logger.info(f"  📌 Clip {i}: {title} ({clip.start:.1f}s - {clip.end:.1f}s, {clip.duration:.1f}s, score: {clip.score:.2f})")
+    return clips_to_save
+
 def _generate_ai_title(text: str) -> str:
     """Use OpenAI to generate a clear, descriptive title"""
     import os
@@ -636,12 +964,15 @@ async def detect_pro_clips(request: ProClipRequest):
     Combines 2-4 high-value segments from different parts of the video
     into cohesive clips, similar to Opus Clip.
     """
+    # Backpressure: 503 while the ranking pool is saturated
+    cpu_pool.check_capacity()
+    
     try:
         logger.info(f"🎬 Starting Pro Clip detection for project {request.projectId}")
         
         # Get transcript from database
-        db = DatabaseService()
-        transcript = db.get_transcript(project_id=request.projectId)
+        db = await run_io(DatabaseService)
+        transcript = await run_io(db.get_transcript, project_id=request.projectId)
         
         if not transcript:
             raise HTTPException(status_code=404, detail="Transcript not found")
@@ -655,16 +986,15 @@ async def detect_pro_clips(request: ProClipRequest):
             raise HTTPException(status_code=400, detail="No words in transcript")
         
         logger.info(f"📝 Processing {len(words)} words from transcript")
+        words = Transcript.from_words(words)
         
-        # Initialize ranker
-        ranker = RankerEngine()
-        
-        # Detect multi-segment clips
-        multi_clips = ranker.detect_multi_segment_clips(
-            words=words,
-            diarization=diarization,
-            num_clips=request.numClips,
-            target_duration=request.targetDuration,
+        # Detect multi-segment clips (CPU-bound; runs in a worker process)
+        multi_clips = await run_cpu(
+            _detect_pro_clips_job,
+            words,
+            diarization,
+            request.numClips,
+            request.targetDuration
         )
         
         logger.info(f"✅ Detected {len(multi_clips)} Pro Clips")
@@ -673,8 +1003,8 @@ async def detect_pro_clips(request: ProClipRequest):
         result = []
         for i, clip in enumerate(multi_clips, 1):
             # Generate AI title and description
-            ai_title = _generate_ai_title(clip.full_text)
-            ai_description = _generate_ai_description(clip.full_text, ai_title or f"Pro Clip {i}")
+            ai_title = await run_io(_generate_ai_title, clip.full_text)
+            ai_description = await run_io(_generate_ai_description, clip.full_text, ai_title or f"Pro Clip {i}")
             
             logger.info(f"✨ Pro Clip {i} - Title: {ai_title}")
             
@@ -708,8 +1038,38 @@ async def detect_pro_clips(request: ProClipRequest):
         logger.error(traceback.format_exc())
         raise HTTPException(status_code=500, detail=str(e))
 
+def _detect_pro_clips_job(
+    words: Transcript,
+    diarization: List[dict],
+    num_clips: int,
+    target_duration: float
+) -> List[MultiSegmentClip]:
+    """Detect Pro Clips (module-level so the CPU process pool can pickle it)"""
+    ranker = RankerEngine()
+    return ranker.detect_multi_segment_clips(
+        words=words,
+        diarization=diarization,
+        num_clips=num_clips,
+        target_duration=target_duration,
+    )
+
 @router.get("/status/{projectId}")
 async def get_status(projectId: str):
-    """Get ranker status"""
-    # TODO: Query DB for moments
-    return {"projectId": projectId, "status": "pending", "clips": []}
+    """Get ranker status, current stage, percent complete and stage timings"""
+    job_state = get_job_state()
+    state = await job_state.call(job_state.get, "ranker", projectId)
+    if state is None:
+        raise HTTPException(status_code=404, detail=f"No ranker job for project {projectId}")
+    return {"projectId": projectId, **state}
+
+@router.get("/status/{projectId}/stream")
+async def stream_status(projectId: str):
+    """Stream ranker status updates as server-sent events"""
+    job_state = get_job_state()
+    if await job_state.call(job_state.get, "ranker", projectId) is None:
+        raise HTTPException(status_code=404, detail=f"No ranker job for project {projectId}")
+    return StreamingResponse(
+        job_state.stream("ranker", projectId),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
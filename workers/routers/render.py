@@ -1,20 +1,42 @@
 """Render Worker - Video Composition & Export"""
 
 from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
+import dataclasses
 import logging
 import os
 import requests
 import json
-from services.render_pipeline import RenderPipeline, AspectRatio
+from services.render_pipeline import (
+    DEFAULT_ENCODE_PROFILE,
+    RenderPipeline,
+    RenderPlan,
+    RenderOutput,
+    AspectRatio,
+    get_encode_profile,
+    is_remote_input,
+)
+from services.loudness import LoudnessMeasurement, get_loudness_cache
 from services.caption_engine import CaptionEngine, CaptionFormat
+from services.speaker_index import SpeakerIndex
+from services.transcript import Transcript
 from services.caption_presets import CaptionPreset
 from services.boundary_detector import BoundaryDetector
+from services.source_cache import get_source_cache
+from services.executor import io_pool, run_io
+from services.job_queue import enqueue_job, use_job_queue
+from services.job_state import SSE_HEADERS, get_job_state
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+class RenderSegment(BaseModel):
+    start: float
+    end: float
+    order: int = 0
+
 class RenderRequest(BaseModel):
     exportId: str
     projectId: str
@@ -24,10 +46,13 @@ class RenderRequest(BaseModel):
     tEnd: float
     format: str = "MP4"
     aspectRatio: str = "9:16"
+    aspectRatios: Optional[List[str]] = None  # Several formats from one decode; the first is the primary artifact
     template: Optional[str] = None
     brandKitId: Optional[str] = None
     captionStyle: Optional[str] = "karaoke"  # Caption preset name
     captionsEnabled: bool = True
+    segments: Optional[List[RenderSegment]] = None  # Pro Clip: source ranges stitched in order
+    encodeProfile: str = "standard"  # draft (preview), standard, archival
 
 class RenderResponse(BaseModel):
     exportId: str
@@ -40,7 +65,7 @@ async def render_export(request: RenderRequest, background_tasks: BackgroundTask
     Render clip to MP4/SRT with styling
     
     - Downloads source video
-    - Extracts clip (tStart - tEnd)
+    - Extracts clip (tStart - tEnd), or stitches Pro Clip segments
     - Applies captions (emoji/keyword paint)
     - Reframes to target aspect ratio (9:16, 1:1, 16:9)
     - Normalizes audio
@@ -48,13 +73,28 @@ async def render_export(request: RenderRequest, background_tasks: BackgroundTask
     - Generates SRT/VTT/ASS
     - Uploads to S3
     """
+    # Backpressure: 503 while the local render pool is saturated
+    if not use_job_queue():
+        io_pool.check_capacity()
+    
     try:
         logger.info(f"Starting render for export {request.exportId}")
-        
-        background_tasks.add_task(
-            _render_worker,
-            request
-        )
+        job_state = get_job_state()
+        await job_state.call(job_state.queued, "render", request.exportId)
+        
+        if use_job_queue():
+            # Durable queue: survives restarts, processed by worker.py
+            enqueue_job(
+                "render",
+                run_render_job,
+                request.model_dump(),
+                job_id=f"render-{request.exportId}"
+            )
+        else:
+            background_tasks.add_task(
+                _render_worker,
+                request
+            )
         
         return RenderResponse(
             exportId=request.exportId,
@@ -66,8 +106,24 @@ async def render_export(request: RenderRequest, background_tasks: BackgroundTask
 
 async def _render_worker(request: RenderRequest):
     """Background worker for video rendering"""
+    # ffmpeg, downloads and uploads all block; keep them off the event loop
+    await run_io(_render_job, request)
+
+def run_render_job(request_data: dict):
+    """Queue entry point; raises on failure so the queue retries the job"""
+    request = RenderRequest(**request_data)
+    if not _render_job(request):
+        raise RuntimeError(f"Render failed for export {request.exportId}")
+
+def _render_job(request: RenderRequest) -> bool:
+    """Render an export (blocking; runs in the I/O pool). Returns success."""
+    source_cache = get_source_cache()
+    cache_key = source_cache.key_for(request.projectId, request.sourceUrl)
+    cache_acquired = False
+    job_state = get_job_state()
     try:
         logger.info(f"Render worker started for {request.exportId}")
+        job_state.stage("render", request.exportId, "downloading")
         
         # Create temp directory
         temp_dir = f"/tmp/{request.exportId}"
@@ -78,13 +134,24 @@ async def _render_worker(request: RenderRequest):
         caption_engine = CaptionEngine()
         boundary_detector = BoundaryDetector()
         
-        # Download source
-        logger.info(f"Downloading source from {request.sourceUrl}")
-        source_path = f"{temp_dir}/source.mp4"
-        _download_file(request.sourceUrl, source_path)
+        # Prefer a locally cached source (shared with earlier exports and
+        # transcription); otherwise read straight from the presigned URL:
+        # ffmpeg seeks with HTTP range requests and only fetches the clip
+        remote_input = (
+            _use_remote_input(request.sourceUrl)
+            and not source_cache.contains(cache_key)
+        )
+        if remote_input:
+            logger.info("Reading source remotely with range requests")
+            source_path = request.sourceUrl
+        else:
+            source_path = source_cache.acquire(cache_key, request.sourceUrl)
+            cache_acquired = True
         
         # Fetch transcript from database for boundary detection
-        transcript_words = []
+        job_state.stage("render", request.exportId, "extracting")
+        transcript_words = Transcript([], [], [])
+        speakers = None
         try:
             # Fetch transcript from API
             transcript_response = requests.get(
@@ -92,15 +159,30 @@ async def _render_worker(request: RenderRequest):
             )
             if transcript_response.status_code == 200:
                 transcript_data = transcript_response.json()
-                transcript_words = transcript_data.get('data', {}).get('words', [])
+                # Columnar words, built once for boundaries and captions
+                transcript_words = Transcript.from_words(transcript_data.get('data', {}).get('words', []))
+                diarization = transcript_data.get('data', {}).get('diarization') or []
+                if diarization:
+                    speakers = SpeakerIndex(diarization)
                 logger.info(f"Fetched {len(transcript_words)} words from transcript")
             else:
                 logger.warning(f"Failed to fetch transcript: {transcript_response.status_code}")
         except Exception as e:
             logger.error(f"Error fetching transcript: {e}")
         
+        # Pro Clips: segments are stitched in order, keeping the ranker's
+        # sentence-aligned boundaries
+        segments = [
+            (segment.start, segment.end)
+            for segment in sorted(request.segments or [], key=lambda s: s.order)
+        ]
+        
         # Adjust boundaries for natural start/end (only if transcript available)
-        if transcript_words:
+        if segments:
+            logger.info(f"Pro Clip with {len(segments)} segments, keeping segment boundaries")
+            adjusted_start = request.tStart
+            adjusted_end = request.tEnd
+        elif len(transcript_words):
             logger.info("Adjusting clip boundaries using transcript")
             adjusted_start, adjusted_end = boundary_detector.adjust_boundaries(
                 source_path,
@@ -117,56 +199,62 @@ async def _render_worker(request: RenderRequest):
         
         logger.info(f"Boundaries adjusted: {request.tStart:.2f}-{request.tEnd:.2f} → {adjusted_start:.2f}-{adjusted_end:.2f}")
         
-        # Extract clip with adjusted boundaries
-        logger.info(f"Extracting clip {adjusted_start:.2f}-{adjusted_end:.2f}")
-        clip_path = f"{temp_dir}/clip.mp4"
-        pipeline.extract_clip(source_path, clip_path, adjusted_start, adjusted_end)
-        
         # Map aspect ratio
         aspect_ratio_map = {
             "9:16": AspectRatio.VERTICAL,
             "1:1": AspectRatio.SQUARE,
             "16:9": AspectRatio.HORIZONTAL,
         }
-        aspect_ratio = aspect_ratio_map.get(request.aspectRatio, AspectRatio.VERTICAL)
-        
-        # Reframe to target aspect ratio
-        logger.info(f"Reframing to {request.aspectRatio}")
-        reframed_path = f"{temp_dir}/reframed.mp4"
-        pipeline.reframe_video(clip_path, reframed_path, aspect_ratio, use_face_detection=False)
-        
-        # Normalize audio
-        logger.info("Normalizing audio")
-        normalized_path = f"{temp_dir}/normalized.mp4"
-        pipeline.normalize_audio(reframed_path, normalized_path)
+        aspect_ratios = []
+        for ratio in request.aspectRatios or [request.aspectRatio]:
+            aspect_ratio = aspect_ratio_map.get(ratio, AspectRatio.VERTICAL)
+            if aspect_ratio not in aspect_ratios:
+                aspect_ratios.append(aspect_ratio)
+        
+        # One output per aspect ratio; the first keeps the single-export paths
+        outputs = [
+            RenderOutput(
+                f"{temp_dir}/captioned.mp4" if i == 0 else f"{temp_dir}/captioned_{_ratio_label(ratio)}.mp4",
+                ratio
+            )
+            for i, ratio in enumerate(aspect_ratios)
+        ]
         
         # Generate captions with preset styling
+        job_state.stage("render", request.exportId, "captioning")
         logger.info(f"Generating captions with style: {request.captionStyle}")
         srt_path = f"{temp_dir}/captions.srt"
         ass_path = f"{temp_dir}/captions.ass"
         
         # Use transcript words if available
-        if transcript_words:
-            # Filter transcript words to only include those within the clip boundaries
-            clip_words = [
-                w for w in transcript_words 
-                if w['start'] >= adjusted_start and w['end'] <= adjusted_end
-            ]
-            # Adjust word timestamps relative to clip start
-            clip_words = [
-                {**w, 'start': w['start'] - adjusted_start, 'end': w['end'] - adjusted_start}
-                for w in clip_words
-            ]
-            logger.info(f"Using {len(clip_words)} words from transcript for captions")
+        if segments and len(transcript_words):
+            # Each segment's words, remapped onto the stitched timeline
+            captions = caption_engine.from_segments(
+                transcript_words,
+                segments,
+                words_per_caption=3,
+                speakers=speakers,
+            )
+            logger.info(f"Using {len(captions)} captions across {len(segments)} stitched segments")
         else:
-            logger.warning("No transcript available, using clip boundaries as fallback")
-            # Use a simple placeholder based on clip duration
-            clip_duration = adjusted_end - adjusted_start
-            clip_words = [
-                {"text": "Clip", "start": 0.0, "end": min(0.5, clip_duration)},
-            ]
-        
-        captions = caption_engine.from_transcript(clip_words, words_per_caption=3)
+            if len(transcript_words):
+                # Words within the clip boundaries, with timestamps relative to clip start
+                clip_words = transcript_words.within(adjusted_start, adjusted_end, offset=adjusted_start)
+                logger.info(f"Using {len(clip_words)} words from transcript for captions")
+            else:
+                logger.warning("No transcript available, using clip boundaries as fallback")
+                # Use a simple placeholder based on clip duration
+                clip_duration = adjusted_end - adjusted_start
+                clip_words = [
+                    {"text": "Clip", "start": 0.0, "end": min(0.5, clip_duration)},
+                ]
+            
+            captions = caption_engine.from_transcript(
+                clip_words,
+                words_per_caption=3,
+                speakers=speakers,
+                speaker_offset=adjusted_start,
+            )
         
         # Generate SRT
         with open(srt_path, 'w', encoding='utf-8') as f:
@@ -196,47 +284,212 @@ async def _render_worker(request: RenderRequest):
                 keyword_paint=True
             ))
         
-        # Add captions
-        logger.info("Adding captions to video")
-        captioned_path = f"{temp_dir}/captioned.mp4"
-        pipeline.add_captions(normalized_path, captioned_path, ass_path, "ass")
+        try:
+            encode_profile = get_encode_profile(request.encodeProfile)
+        except ValueError:
+            logger.warning(f"Invalid encode profile {request.encodeProfile}, using standard")
+            encode_profile = DEFAULT_ENCODE_PROFILE
+        
+        # Pro Clips: cut the ranges first (stream copy except at GOP edges),
+        # then render the result like a single clip
+        stitch_ranges = segments
+        render_input, render_start, render_end = source_path, adjusted_start, adjusted_end
+        if stitch_ranges:
+            job_state.stage("render", request.exportId, "stitching")
+            stitched_path = f"{temp_dir}/stitched.ts"
+            stitched = pipeline.stitch_segments(
+                source_path, stitched_path, stitch_ranges, temp_dir, encode_profile
+            )
+            if not stitched and remote_input:
+                logger.warning("Remote-input stitching failed, downloading full source")
+                source_path = source_cache.acquire(cache_key, request.sourceUrl)
+                cache_acquired = True
+                stitched = pipeline.stitch_segments(
+                    source_path, stitched_path, stitch_ranges, temp_dir, encode_profile
+                )
+            if not stitched:
+                raise RuntimeError(f"Stitching failed for export {request.exportId}")
+            # The stitched file is local; no remote fallback for the render
+            remote_input = False
+            render_input = stitched_path
+            render_start, render_end = 0.0, sum(end - start for start, end in stitch_ranges)
+        
+        # Two-pass loudnorm: measure once per source (or clip range when the
+        # source is read remotely) and reuse it for later exports
+        job_state.stage("render", request.exportId, "analyzing")
+        target_loudness = RenderPlan.target_loudness
+        loudness = _clip_loudness(
+            pipeline,
+            cache_key,
+            source_path,
+            stitch_ranges or [(adjusted_start, adjusted_end)],
+            (render_input, render_start, render_end),
+            target_loudness,
+        )
         
-        # Generate thumbnail
+        # Render trim → reframe → loudnorm → captions in a single ffmpeg pass
+        # (several aspect ratios share the decode and loudnorm)
+        job_state.stage("render", request.exportId, "reframing")
+        logger.info(
+            f"Rendering clip {render_start:.2f}-{render_end:.2f} at "
+            f"{', '.join(ratio.value for ratio in aspect_ratios)} ({encode_profile.name} profile)"
+        )
+        plan = RenderPlan(
+            input_file=render_input,
+            output_file=outputs[0].output_file,
+            start=render_start,
+            end=render_end,
+            aspect_ratio=outputs[0].aspect_ratio,
+            subtitle_file=ass_path,
+            subtitle_format="ass",
+            target_loudness=target_loudness,
+            loudness=loudness,
+            cut_mode="encode",  # Never smart-cut a stitched input again in the fallback
+            encode_profile=encode_profile,
+        )
+        rendered = _render_outputs(pipeline, plan, outputs)
+        if not rendered and remote_input:
+            logger.warning("Remote-input render failed, downloading full source")
+            plan.input_file = source_cache.acquire(cache_key, request.sourceUrl)
+            cache_acquired = True
+            rendered = _render_outputs(pipeline, plan, outputs)
+        if not rendered:
+            logger.warning("Single-pass render failed, falling back to step-by-step pipeline")
+            if not _render_outputs_step_by_step(pipeline, plan, outputs, temp_dir):
+                raise RuntimeError(f"Render failed for export {request.exportId}")
+        
+        # Generate thumbnails
         logger.info("Generating thumbnail")
-        thumb_path = f"{temp_dir}/thumbnail.jpg"
-        pipeline.generate_thumbnail(captioned_path, thumb_path, time=0.0)
+        thumb_paths = []
+        for output in outputs:
+            thumb_path = output.output_file.replace("captioned", "thumbnail").replace(".mp4", ".jpg")
+            pipeline.generate_thumbnail(output.output_file, thumb_path, time=0.0)
+            thumb_paths.append(thumb_path)
         
         # Upload to S3
+        job_state.stage("render", request.exportId, "uploading")
         logger.info("Uploading to S3")
-        mp4_url = _upload_to_s3(captioned_path, f"exports/{request.exportId}.mp4")
         srt_url = _upload_to_s3(srt_path, f"exports/{request.exportId}.srt")
-        thumb_url = _upload_to_s3(thumb_path, f"exports/{request.exportId}_thumb.jpg")
+        output_urls = {}
+        for i, (output, thumb_path) in enumerate(zip(outputs, thumb_paths)):
+            suffix = "" if i == 0 else f"_{_ratio_label(output.aspect_ratio)}"
+            output_urls[output.aspect_ratio.value] = {
+                "mp4_url": _upload_to_s3(output.output_file, f"exports/{request.exportId}{suffix}.mp4"),
+                "thumbnail_url": _upload_to_s3(thumb_path, f"exports/{request.exportId}{suffix}_thumb.jpg"),
+            }
+        primary = output_urls[outputs[0].aspect_ratio.value]
+        mp4_url, thumb_url = primary["mp4_url"], primary["thumbnail_url"]
         
         # Update export record in DB with artifacts
         logger.info(f"Export artifacts: MP4={mp4_url}, SRT={srt_url}, Thumb={thumb_url}")
-        _update_export_status(request.exportId, "COMPLETED", {
+        artifacts = {
             "mp4_url": mp4_url,
             "srt_url": srt_url,
             "thumbnail_url": thumb_url
-        })
+        }
+        if len(outputs) > 1:
+            # Every format, keyed by aspect ratio (primary included)
+            artifacts["outputs"] = output_urls
+        _update_export_status(request.exportId, "COMPLETED", artifacts)
+        job_state.complete("render", request.exportId, artifacts)
         
         logger.info(f"Render completed for {request.exportId}")
         
         # Cleanup
         import shutil
         shutil.rmtree(temp_dir)
+        return True
         
     except Exception as e:
         logger.error(f"Render worker error: {str(e)}")
+        job_state.fail("render", request.exportId, str(e))
         # TODO: Update export status to FAILED
+        return False
+    finally:
+        if cache_acquired:
+            source_cache.release(cache_key)
+
+def _render_outputs(pipeline: RenderPipeline, plan: RenderPlan, outputs: List[RenderOutput]) -> bool:
+    """Render a plan's outputs: a single pass, or one split graph for several"""
+    if len(outputs) == 1:
+        return pipeline.render(plan)
+    return pipeline.render_multi(plan, outputs)
+
+def _clip_loudness(
+    pipeline: RenderPipeline,
+    cache_key: str,
+    source_path: str,
+    ranges: List[tuple],
+    clip_input: tuple,
+    target_loudness: float,
+) -> Optional[LoudnessMeasurement]:
+    """
+    Cached loudness measurement for a clip, measuring on a miss
+    
+    A local source is measured whole (LOUDNESS_SCOPE=source, the default),
+    so every export of it shares one analysis pass. Remote sources, or
+    LOUDNESS_SCOPE=clip, measure just the clip's ranges.
+    
+    Args:
+        pipeline: Render pipeline
+        cache_key: Source cache key
+        source_path: Local source path or source URL
+        ranges: Clip ranges in the source (cache scope)
+        clip_input: (input, start, end) of the clip as it will be rendered
+        target_loudness: Target loudness in LUFS
+    """
+    loudness_cache = get_loudness_cache()
+    whole_source = (
+        os.getenv("LOUDNESS_SCOPE", "source").lower() == "source"
+        and not is_remote_input(source_path)
+    )
+    scope = "source" if whole_source else ",".join(f"{start:.3f}-{end:.3f}" for start, end in ranges)
+    
+    measurement = loudness_cache.get(cache_key, scope, target_loudness)
+    if measurement is not None:
+        logger.info(f"Using cached loudness measurement ({'source' if whole_source else 'clip'})")
+        return measurement
+    
+    if whole_source:
+        measurement = pipeline.measure_loudness(source_path, target_loudness=target_loudness)
+    else:
+        clip_path, start, end = clip_input
+        measurement = pipeline.measure_loudness(clip_path, start, end, target_loudness)
+    if measurement is None:
+        logger.warning("No loudness measurement, using single-pass loudnorm")
+    else:
+        loudness_cache.set(cache_key, scope, target_loudness, measurement)
+    return measurement
+
+def _render_outputs_step_by_step(
+    pipeline: RenderPipeline,
+    plan: RenderPlan,
+    outputs: List[RenderOutput],
+    temp_dir: str,
+) -> bool:
+    """Fallback render, one output at a time in its own work dir"""
+    for i, output in enumerate(outputs):
+        # Intermediates (clip.mp4, captioned.mp4, ...) must not clobber
+        # outputs already written to temp_dir
+        work_dir = os.path.join(temp_dir, f"steps_{i}")
+        os.makedirs(work_dir, exist_ok=True)
+        output_plan = dataclasses.replace(
+            plan,
+            output_file=output.output_file,
+            aspect_ratio=output.aspect_ratio
+        )
+        if not pipeline.render_step_by_step(output_plan, work_dir):
+            return False
+    return True
 
-def _download_file(url: str, path: str):
-    """Download file from URL"""
-    response = requests.get(url, stream=True, timeout=300)
-    response.raise_for_status()
-    with open(path, 'wb') as f:
-        for chunk in response.iter_content(chunk_size=8192):
-            f.write(chunk)
+def _ratio_label(aspect_ratio: AspectRatio) -> str:
+    """File-name form of an aspect ratio (9:16 → 9x16)"""
+    return aspect_ratio.value.replace(":", "x")
+
+def _use_remote_input(url: str) -> bool:
+    """Whether ffmpeg should read the source URL directly (RENDER_REMOTE_INPUT)"""
+    enabled = os.getenv("RENDER_REMOTE_INPUT", "true").lower() == "true"
+    return enabled and is_remote_input(url)
 
 def _upload_to_s3(local_path: str, s3_key: str) -> str:
     """Upload file to S3/R2 and return URL"""
@@ -326,6 +579,21 @@ def _update_export_status(export_id: str, status: str, artifacts: dict = None):
 
 @router.get("/status/{exportId}")
 async def get_status(exportId: str):
-    """Get render status"""
-    # TODO: Query DB for export status
-    return {"exportId": exportId, "status": "pending"}
+    """Get render status, current stage, percent complete and stage timings"""
+    job_state = get_job_state()
+    state = await job_state.call(job_state.get, "render", exportId)
+    if state is None:
+        raise HTTPException(status_code=404, detail=f"No render job for export {exportId}")
+    return {"exportId": exportId, **state}
+
+@router.get("/status/{exportId}/stream")
+async def stream_status(exportId: str):
+    """Stream render status updates as server-sent events"""
+    job_state = get_job_state()
+    if await job_state.call(job_state.get, "render", exportId) is None:
+        raise HTTPException(status_code=404, detail=f"No render job for export {exportId}")
+    return StreamingResponse(
+        job_state.stream("render", exportId),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
@@ -4,9 +4,11 @@ Supports Whisper (local) and AssemblyAI (cloud)
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+import asyncio
 import logging
 import os
+import threading
 
 logger = logging.getLogger(__name__)
 
@@ -66,6 +68,8 @@ class WhisperProvider(ASRProvider):
         
         self.model = whisper.load_model(model_size, device=device)
         self.model_size = model_size
+        # Whisper models are not thread-safe; one transcription at a time
+        self._lock = threading.Lock()
 
     async def transcribe(
         self,
@@ -76,11 +80,13 @@ class WhisperProvider(ASRProvider):
         try:
             logger.info(f"Transcribing {audio_path} with Whisper {self.model_size}")
             
-            result = self.model.transcribe(
-                audio_path,
-                language=language,
-                verbose=False,
-            )
+            with self._lock:
+                result = self.model.transcribe(
+                    audio_path,
+                    language=language,
+                    word_timestamps=True,
+                    verbose=False,
+                )
             
             # Extract words with timings
             words = []
@@ -181,14 +187,73 @@ class AssemblyAIProvider(ASRProvider):
             raise
 
 
+# Process-wide provider registry: loading a Whisper model takes seconds
+# and hundreds of MB, so each model size is loaded once per process
+_providers: Dict[Tuple[str, str], ASRProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def _get_cached_provider(key: Tuple[str, str], factory) -> ASRProvider:
+    with _providers_lock:
+        provider = _providers.get(key)
+        if provider is None:
+            # Held while loading so concurrent callers don't load twice
+            provider = factory()
+            _providers[key] = provider
+        return provider
+
+
+def get_whisper_provider(model_size: str = "base") -> WhisperProvider:
+    """Cached Whisper provider for a model size"""
+    return _get_cached_provider(
+        ("whisper", model_size),
+        lambda: WhisperProvider(model_size=model_size)
+    )
+
+
 def get_asr_provider() -> ASRProvider:
-    """Factory function to get ASR provider based on env"""
+    """Get the (cached) ASR provider configured by env"""
     provider = os.getenv("ASR_PROVIDER", "whisper").lower()
     
     if provider == "assemblyai":
-        logger.info("Using AssemblyAI provider")
-        return AssemblyAIProvider()
+        return _get_cached_provider(("assemblyai", ""), AssemblyAIProvider)
     else:
         model_size = os.getenv("WHISPER_MODEL_SIZE", "base")
-        logger.info(f"Using Whisper provider ({model_size})")
-        return WhisperProvider(model_size=model_size)
+        return get_whisper_provider(model_size)
+
+
+def warm_asr_provider() -> bool:
+    """
+    Load the configured provider into this process's registry
+    
+    Safe to run in pool workers at startup: failures are logged and the
+    provider is loaded lazily by the first job instead.
+    
+    Returns:
+        True if the provider is ready
+    """
+    try:
+        provider = get_asr_provider()
+        logger.info(f"ASR provider ready in pid {os.getpid()}: {provider.__class__.__name__}")
+        return True
+    except Exception as e:
+        logger.warning(f"ASR provider warmup failed: {e}")
+        return False
+
+
+def clear_asr_providers():
+    """Drop cached providers (tests, model upgrades)"""
+    with _providers_lock:
+        _providers.clear()
+
+
+def transcribe_file(audio_path: str, language: Optional[str] = None) -> Dict:
+    """
+    Synchronous transcription entry point for worker pools
+    
+    Runs the configured provider to completion in the calling thread or
+    process, so it can be handed to run_in_executor.
+    """
+    provider = get_asr_provider()
+    logger.info(f"Running transcription with {provider.__class__.__name__}...")
+    return asyncio.run(provider.transcribe(audio_path, language=language))
@@ -0,0 +1,117 @@
+"""
+Audio Extractor - Compact speech-ready audio for ASR
+Pulls a 16 kHz mono track out of an upload with ffmpeg, reading remote
+sources directly so the video never has to be written to disk
+"""
+
+import logging
+import os
+import subprocess
+from enum import Enum
+from typing import List, Optional
+
+from services.render_pipeline import REMOTE_INPUT_OPTIONS, is_remote_input
+
+logger = logging.getLogger(__name__)
+
+# Whisper resamples everything to 16 kHz mono; extracting at that rate
+# up front keeps decode cost and upload size to a minimum
+ASR_SAMPLE_RATE = 16000
+
+
+class AudioFormat(Enum):
+    """Audio formats for ASR input"""
+    WAV = "wav"    # PCM: no decode cost, best for local Whisper
+    FLAC = "flac"  # Lossless, ~2x smaller than PCM
+    OPUS = "opus"  # Lossy speech codec, smallest upload for cloud ASR
+
+
+# Codec arguments and file extension per format
+_FORMAT_ARGS = {
+    AudioFormat.WAV: (["-c:a", "pcm_s16le"], "wav"),
+    AudioFormat.FLAC: (["-c:a", "flac"], "flac"),
+    AudioFormat.OPUS: (["-c:a", "libopus", "-b:a", "24k", "-application", "voip"], "ogg"),
+}
+
+
+def audio_path_for(base_path: str, audio_format: AudioFormat) -> str:
+    """Output path with the extension for a format"""
+    return f"{base_path}.{_FORMAT_ARGS[audio_format][1]}"
+
+
+def build_extract_command(
+    input_file: str,
+    output_file: str,
+    audio_format: AudioFormat = AudioFormat.FLAC,
+    sample_rate: int = ASR_SAMPLE_RATE,
+) -> List[str]:
+    """
+    Build the ffmpeg command for audio extraction
+
+    Args:
+        input_file: Local path or http(s) URL
+        output_file: Output audio path
+        audio_format: Target format
+        sample_rate: Output sample rate (Hz)
+
+    Returns:
+        ffmpeg argument list
+    """
+    codec_args, _ = _FORMAT_ARGS[audio_format]
+    input_options = REMOTE_INPUT_OPTIONS if is_remote_input(input_file) else []
+    return [
+        "ffmpeg",
+        "-y",
+        "-nostdin",
+        *input_options,
+        "-i", input_file,
+        "-map", "0:a:0",
+        "-vn", "-sn", "-dn",
+        "-ac", "1",
+        "-ar", str(sample_rate),
+        *codec_args,
+        output_file,
+    ]
+
+
+def extract_audio(
+    input_file: str,
+    output_file: str,
+    audio_format: AudioFormat = AudioFormat.FLAC,
+    sample_rate: int = ASR_SAMPLE_RATE,
+) -> bool:
+    """
+    Extract a mono speech track from a video or audio file
+
+    Args:
+        input_file: Local path or http(s) URL (read as a stream)
+        output_file: Output audio path
+        audio_format: Target format
+        sample_rate: Output sample rate (Hz)
+
+    Returns:
+        True if successful
+    """
+    cmd = build_extract_command(input_file, output_file, audio_format, sample_rate)
+    try:
+        subprocess.run(cmd, check=True, capture_output=True)
+        size_mb = os.path.getsize(output_file) / (1024 * 1024)
+        logger.info(f"Audio extracted: {output_file} ({size_mb:.1f} MB)")
+        return True
+    except subprocess.CalledProcessError as e:
+        logger.error(f"Audio extraction failed: {e.stderr.decode(errors='replace')}")
+        return False
+
+
+def audio_format_for_provider(provider: str, override: Optional[str] = None) -> AudioFormat:
+    """
+    Pick the ASR input format (ASR_AUDIO_FORMAT overrides)
+
+    Cloud providers get Opus to shrink the upload; local Whisper gets PCM
+    so it can skip decoding.
+    """
+    if override:
+        return AudioFormat(override.lower())
+    if provider == "assemblyai":
+        return AudioFormat.OPUS
+    return AudioFormat.WAV
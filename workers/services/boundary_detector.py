@@ -6,19 +6,14 @@ Snaps to sentence boundaries and silences for natural clip starts/ends
 import subprocess
 import logging
 import re
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Union
 from dataclasses import dataclass
+import numpy as np
 
-logger = logging.getLogger(__name__)
-
+from services.render_pipeline import REMOTE_INPUT_OPTIONS, is_remote_input
+from services.transcript import HAS_STOP, Transcript, as_transcript
 
-@dataclass
-class Word:
-    """Word with timing information"""
-    text: str
-    start: float
-    end: float
-    confidence: float = 1.0
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -64,7 +59,7 @@ class BoundaryDetector:
         video_path: str,
         start_time: float,
         end_time: float,
-        transcript_words: List[Dict],
+        transcript_words: Union[List[Dict], Transcript],
         min_duration: float = 15.0,
         max_duration: float = 180.0,
     ) -> Tuple[float, float]:
@@ -75,7 +70,7 @@ class BoundaryDetector:
             video_path: Path to video file
             start_time: Initial start time
             end_time: Initial end time
-            transcript_words: List of word dicts with text, start, end
+            transcript_words: Transcript, or list of word dicts with text, start, end
             min_duration: Minimum clip duration
             max_duration: Maximum clip duration
             
@@ -84,24 +79,12 @@ class BoundaryDetector:
         """
         logger.info(f"Adjusting boundaries: {start_time:.2f} - {end_time:.2f}")
         
-        # Convert to Word objects
-        words = [
-            Word(
-                text=w.get('text', ''),
-                start=w.get('start', 0),
-                end=w.get('end', 0),
-                confidence=w.get('confidence', 1.0)
-            )
-            for w in transcript_words
-        ]
+        words = as_transcript(transcript_words)
         
         # Find words in the clip window
-        clip_words = [
-            w for w in words
-            if w.start >= start_time - 2.0 and w.end <= end_time + 2.0
-        ]
+        clip_words = words.within(start_time - 2.0, end_time + 2.0)
         
-        if not clip_words:
+        if not len(clip_words):
             logger.warning("No words found in clip window, using original times")
             return start_time, end_time
         
@@ -172,13 +155,17 @@ class BoundaryDetector:
         """
         try:
             duration = end_time - start_time
+            # Presigned URLs: reconnect and time out instead of failing or hanging
+            input_options = REMOTE_INPUT_OPTIONS if is_remote_input(video_path) else []
             
             # FFmpeg silencedetect command
             cmd = [
                 'ffmpeg',
+                *input_options,
                 '-ss', str(start_time),
                 '-t', str(duration),
                 '-i', video_path,
+                '-vn',
                 '-af', f'silencedetect=noise={self.SILENCE_THRESHOLD}dB:d={self.SILENCE_MIN_DURATION}',
                 '-f', 'null',
                 '-'
@@ -223,26 +210,21 @@ class BoundaryDetector:
             logger.error(f"Silence detection failed: {e}")
             return []
     
-    def _find_sentence_boundaries(self, words: List[Word]) -> List[Boundary]:
+    def _find_sentence_boundaries(self, words: Transcript) -> List[Boundary]:
         """
         Find sentence boundaries from punctuation
         
         Args:
-            words: List of Word objects
+            words: Transcript of the clip window
             
         Returns:
             List of sentence boundaries
         """
-        boundaries = []
-        
-        for i, word in enumerate(words):
-            # Check if word ends with sentence-ending punctuation
-            if re.search(self.SENTENCE_ENDINGS, word.text):
-                boundaries.append(Boundary(
-                    time=word.end,
-                    type='sentence',
-                    confidence=0.8
-                ))
+        # Words containing sentence-ending punctuation (SENTENCE_ENDINGS)
+        boundaries = [
+            Boundary(time=end, type='sentence', confidence=0.8)
+            for end in words.ends[(words.flags & HAS_STOP) != 0].tolist()
+        ]
         
         logger.info(f"Found {len(boundaries)} sentence boundaries")
         return boundaries
@@ -250,7 +232,7 @@ class BoundaryDetector:
     def _adjust_start_boundary(
         self,
         start_time: float,
-        words: List[Word],
+        words: Transcript,
         silences: List[Boundary],
         sentences: List[Boundary]
     ) -> float:
@@ -264,18 +246,14 @@ class BoundaryDetector:
         4. Apply pre-roll
         """
         # Find first word after start_time
-        first_word = None
-        for word in words:
-            if word.start >= start_time - 0.5:
-                first_word = word
-                break
-        
-        if not first_word:
+        after = np.flatnonzero(words.starts >= start_time - 0.5)
+        if not len(after):
             return start_time
+        first_word_start = float(words.starts[after[0]])
         
         # Search for silence before first word
-        search_start = first_word.start - self.BOUNDARY_SEARCH_WINDOW
-        search_end = first_word.start + 0.5
+        search_start = first_word_start - self.BOUNDARY_SEARCH_WINDOW
+        search_end = first_word_start + 0.5
         
         nearby_silences = [
             s for s in silences
@@ -284,7 +262,7 @@ class BoundaryDetector:
         
         if nearby_silences:
             # Use silence closest to first word
-            best_silence = min(nearby_silences, key=lambda s: abs(s.time - first_word.start))
+            best_silence = min(nearby_silences, key=lambda s: abs(s.time - first_word_start))
             adjusted = best_silence.time
             logger.debug(f"Start: Using silence at {adjusted:.2f}s")
         else:
@@ -295,12 +273,12 @@ class BoundaryDetector:
             ]
             
             if nearby_sentences:
-                best_sentence = min(nearby_sentences, key=lambda s: abs(s.time - first_word.start))
+                best_sentence = min(nearby_sentences, key=lambda s: abs(s.time - first_word_start))
                 adjusted = best_sentence.time
                 logger.debug(f"Start: Using sentence boundary at {adjusted:.2f}s")
             else:
                 # Use word start with pre-roll
-                adjusted = first_word.start
+                adjusted = first_word_start
                 logger.debug(f"Start: Using word boundary at {adjusted:.2f}s")
         
         # Apply pre-roll
@@ -311,7 +289,7 @@ class BoundaryDetector:
     def _adjust_end_boundary(
         self,
         end_time: float,
-        words: List[Word],
+        words: Transcript,
         silences: List[Boundary],
         sentences: List[Boundary]
     ) -> float:
@@ -325,18 +303,14 @@ class BoundaryDetector:
         4. Apply post-roll
         """
         # Find last word before end_time
-        last_word = None
-        for word in reversed(words):
-            if word.end <= end_time + 0.5:
-                last_word = word
-                break
-        
-        if not last_word:
+        before = np.flatnonzero(words.ends <= end_time + 0.5)
+        if not len(before):
             return end_time
+        last_word_end = float(words.ends[before[-1]])
         
         # Search for silence after last word
-        search_start = last_word.end - 0.5
-        search_end = last_word.end + self.BOUNDARY_SEARCH_WINDOW
+        search_start = last_word_end - 0.5
+        search_end = last_word_end + self.BOUNDARY_SEARCH_WINDOW
         
         nearby_silences = [
             s for s in silences
@@ -345,7 +319,7 @@ class BoundaryDetector:
         
         if nearby_silences:
             # Use silence closest to last word
-            best_silence = min(nearby_silences, key=lambda s: abs(s.time - last_word.end))
+            best_silence = min(nearby_silences, key=lambda s: abs(s.time - last_word_end))
             adjusted = best_silence.time
             logger.debug(f"End: Using silence at {adjusted:.2f}s")
         else:
@@ -356,12 +330,12 @@ class BoundaryDetector:
             ]
             
             if nearby_sentences:
-                best_sentence = min(nearby_sentences, key=lambda s: abs(s.time - last_word.end))
+                best_sentence = min(nearby_sentences, key=lambda s: abs(s.time - last_word_end))
                 adjusted = best_sentence.time
                 logger.debug(f"End: Using sentence boundary at {adjusted:.2f}s")
             else:
                 # Use word end with post-roll
-                adjusted = last_word.end
+                adjusted = last_word_end
                 logger.debug(f"End: Using word boundary at {adjusted:.2f}s")
         
         # Apply post-roll
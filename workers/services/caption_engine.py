@@ -5,10 +5,12 @@ Enhanced with preset styles from caption_presets.py
 
 import re
 import logging
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Union
 from dataclasses import dataclass
 from enum import Enum
 from .caption_presets import CaptionPreset, CaptionStyle, get_preset, apply_brand_font
+from .speaker_index import SpeakerIndex
+from .transcript import Transcript, as_transcript
 
 logger = logging.getLogger(__name__)
 
@@ -288,7 +290,7 @@ class CaptionEngine:
 
             start = self._format_timestamp_ass(caption.start)
             end = self._format_timestamp_ass(caption.end)
-            speaker = caption.speaker or ""
+            speaker = self._ass_name(caption.speaker)
 
             lines.append(
                 f"Dialogue: 0,{start},{end},Default,{speaker},0,0,0,,{text}"
@@ -384,13 +386,19 @@ class CaptionEngine:
             
             start = self._format_timestamp_ass(caption.start)
             end = self._format_timestamp_ass(caption.end)
+            speaker = self._ass_name(caption.speaker)
             
             lines.append(
-                f"Dialogue: 0,{start},{end},Default,,0,0,0,,{effects}{text}"
+                f"Dialogue: 0,{start},{end},Default,{speaker},0,0,0,,{effects}{text}"
             )
         
         return "\n".join(lines)
 
+    @staticmethod
+    def _ass_name(speaker: Optional[str]) -> str:
+        """Speaker for a Dialogue Name field (commas would shift the fields)"""
+        return (speaker or "").replace(",", " ")
+
     def _apply_keyword_paint(self, text: str, color: str) -> str:
         """
         Apply color to keywords (numbers, proper nouns, emphasized words)
@@ -494,58 +502,85 @@ class CaptionEngine:
 
     @staticmethod
     def from_transcript(
-        words: List[Dict],
+        words: Union[List[Dict], Transcript],
         words_per_caption: int = 10,
+        speakers: Optional[SpeakerIndex] = None,
+        speaker_offset: float = 0.0,
     ) -> List[Caption]:
         """
         Generate captions from transcript words
         
         Args:
-            words: List of word dicts with text, start, end
+            words: Transcript, or list of word dicts with text, start, end
             words_per_caption: Words per caption line
+            speakers: Diarization index to label each caption's speaker
+            speaker_offset: Added to caption times for speaker lookup
+                (the clip start when words are clip-relative)
             
         Returns:
             List of Caption objects
         """
+        transcript = as_transcript(words)
         captions = []
-        caption_idx = 1
-        current_words = []
-        start_time = None
-
-        for word in words:
-            if start_time is None:
-                start_time = word["start"]
-
-            current_words.append(word)
-
-            if len(current_words) >= words_per_caption:
-                text = " ".join(w["text"] for w in current_words)
-                end_time = current_words[-1]["end"]
-
-                captions.append(
-                    Caption(
-                        index=caption_idx,
-                        start=start_time,
-                        end=end_time,
-                        text=text,
-                    )
-                )
 
-                caption_idx += 1
-                current_words = []
-                start_time = None
+        # Each caption is words_per_caption consecutive words (the last
+        # one takes the remainder)
+        for caption_idx, first in enumerate(range(0, len(transcript), words_per_caption), 1):
+            last = min(first + words_per_caption, len(transcript))
+            start_time = float(transcript.starts[first])
+            end_time = float(transcript.ends[last - 1])
+            speaker = None
+            if speakers is not None:
+                speaker = speakers.speaker_at((start_time + end_time) / 2 + speaker_offset)
 
-        # Add remaining words
-        if current_words:
-            text = " ".join(w["text"] for w in current_words)
-            end_time = current_words[-1]["end"]
             captions.append(
                 Caption(
                     index=caption_idx,
                     start=start_time,
                     end=end_time,
-                    text=text,
+                    text=transcript.join(first, last),
+                    speaker=speaker,
                 )
             )
 
         return captions
+
+    @staticmethod
+    def from_segments(
+        words: Union[List[Dict], Transcript],
+        segments: List[Tuple[float, float]],
+        words_per_caption: int = 10,
+        speakers: Optional[SpeakerIndex] = None,
+    ) -> List[Caption]:
+        """
+        Generate captions for source segments stitched end to end
+        
+        Each segment is captioned on its own, so no caption spans a cut,
+        and its times are remapped onto the stitched timeline: a segment
+        starts where the segments before it end.
+        
+        Args:
+            words: Transcript, or list of word dicts, in source time
+            segments: (start, end) source ranges in clip order
+            words_per_caption: Words per caption line
+            speakers: Diarization index to label each caption's speaker
+            
+        Returns:
+            List of Caption objects on the stitched timeline
+        """
+        transcript = as_transcript(words)
+        captions = []
+        stitched_start = 0.0
+        for start, end in segments:
+            shift = start - stitched_start  # source time minus stitched time
+            for caption in CaptionEngine.from_transcript(
+                transcript.within(start, end, offset=shift),
+                words_per_caption=words_per_caption,
+                speakers=speakers,
+                speaker_offset=shift,
+            ):
+                caption.index = len(captions) + 1
+                captions.append(caption)
+            stitched_start += end - start
+
+        return captions
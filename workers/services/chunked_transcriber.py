@@ -0,0 +1,260 @@
+"""
+Chunked Transcriber - Parallel long-form Whisper transcription
+Splits audio at silences, transcribes chunks across a process pool and
+stitches word timings back into a single WhisperProvider-style result
+"""
+
+import asyncio
+import logging
+import os
+import re
+import subprocess
+import tempfile
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from services.executor import run_io
+
+logger = logging.getLogger(__name__)
+
+# Chunking defaults (seconds)
+TARGET_CHUNK = 300.0   # preferred chunk length
+MAX_CHUNK = 420.0      # hard cut if no silence is found before this
+OVERLAP = 1.5          # audio each chunk reads past its cut points
+SILENCE_DB = -35       # silencedetect noise floor (dB)
+MIN_SILENCE = 0.4      # shortest pause that counts as a cut point
+
+_SILENCE_START = re.compile(r"silence_start: (-?[\d.]+)")
+_SILENCE_END = re.compile(r"silence_end: (-?[\d.]+)")
+
+
+@dataclass
+class Chunk:
+    """
+    A slice of the audio to transcribe
+
+    Words are kept by the chunk whose [start, end) contains their
+    midpoint; the overlap only gives Whisper context at the edges.
+    """
+    index: int
+    start: float
+    end: float
+    overlap: float = OVERLAP
+
+    @property
+    def read_start(self) -> float:
+        return max(0.0, self.start - self.overlap)
+
+    def read_end(self, duration: float) -> float:
+        return min(duration, self.end + self.overlap)
+
+
+def probe_duration(audio_path: str) -> float:
+    """Audio duration in seconds (ffprobe)"""
+    cmd = [
+        "ffprobe",
+        "-v", "error",
+        "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1",
+        audio_path,
+    ]
+    result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+    return float(result.stdout.strip())
+
+
+def detect_silences(
+    audio_path: str,
+    noise_db: int = SILENCE_DB,
+    min_silence: float = MIN_SILENCE,
+) -> List[Tuple[float, float]]:
+    """
+    Find pauses with ffmpeg silencedetect
+
+    Returns:
+        (start, end) of each silence, in order
+    """
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-i", audio_path,
+        "-af", f"silencedetect=noise={noise_db}dB:d={min_silence}",
+        "-f", "null",
+        "-",
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    return parse_silences(result.stderr)
+
+
+def parse_silences(ffmpeg_log: str) -> List[Tuple[float, float]]:
+    """Pair silence_start/silence_end lines from silencedetect output"""
+    starts = [float(m) for m in _SILENCE_START.findall(ffmpeg_log)]
+    ends = [float(m) for m in _SILENCE_END.findall(ffmpeg_log)]
+    return [(max(0.0, s), e) for s, e in zip(starts, ends)]
+
+
+def plan_chunks(
+    duration: float,
+    silences: List[Tuple[float, float]],
+    target: float = TARGET_CHUNK,
+    max_chunk: float = MAX_CHUNK,
+    overlap: float = OVERLAP,
+) -> List[Chunk]:
+    """
+    Split [0, duration) into chunks cut at the middle of pauses
+
+    Each cut is the silence midpoint closest to start + target that keeps
+    the chunk within max_chunk; without one the chunk is cut at max_chunk.
+    """
+    cut_points = [(s + e) / 2 for s, e in silences]
+    chunks: List[Chunk] = []
+    start = 0.0
+
+    while duration - start > max_chunk:
+        candidates = [c for c in cut_points if start + target / 2 <= c <= start + max_chunk]
+        if candidates:
+            end = min(candidates, key=lambda c: abs(c - (start + target)))
+        else:
+            end = start + max_chunk
+        chunks.append(Chunk(len(chunks), start, end, overlap))
+        start = end
+
+    chunks.append(Chunk(len(chunks), start, duration, overlap))
+    return chunks
+
+
+def transcribe_chunk(
+    audio_path: str,
+    chunk: Chunk,
+    duration: float,
+    language: Optional[str] = None,
+) -> Dict:
+    """
+    Transcribe one chunk (runs in a pool worker)
+
+    Cuts the chunk's window out of the audio, transcribes it with the
+    process's cached provider and shifts word timings to source time.
+    """
+    from services.asr_provider import transcribe_file
+
+    read_start = chunk.read_start
+    fd, chunk_path = tempfile.mkstemp(suffix=".wav", prefix=f"asr_chunk{chunk.index}_")
+    os.close(fd)
+    try:
+        cmd = [
+            "ffmpeg", "-y", "-nostdin",
+            "-ss", f"{read_start:.3f}",
+            "-t", f"{chunk.read_end(duration) - read_start:.3f}",
+            "-i", audio_path,
+            "-ac", "1", "-ar", "16000", "-c:a", "pcm_s16le",
+            chunk_path,
+        ]
+        subprocess.run(cmd, check=True, capture_output=True)
+        result = transcribe_file(chunk_path, language)
+    finally:
+        os.remove(chunk_path)
+
+    result["words"] = [
+        {**w, "start": w["start"] + read_start, "end": w["end"] + read_start}
+        for w in result.get("words", [])
+    ]
+    return result
+
+
+def stitch_chunks(chunks: List[Chunk], results: List[Dict], duration: float, language: Optional[str] = None) -> Dict:
+    """
+    Merge per-chunk results into one transcript
+
+    Words in the overlap are transcribed twice; each is kept only by the
+    chunk that owns its midpoint, and a word repeated across the seam
+    (same text, near-identical start) is dropped.
+
+    Returns:
+        Same shape as WhisperProvider.transcribe
+    """
+    words: List[Dict] = []
+    for chunk, result in zip(chunks, results):
+        for word in result.get("words", []):
+            midpoint = (word["start"] + word["end"]) / 2
+            # The final chunk also owns anything past the probed duration
+            owned = chunk.start <= midpoint and (midpoint < chunk.end or chunk.end >= duration)
+            if not owned:
+                continue
+            if words and _is_seam_duplicate(words[-1], word):
+                continue
+            words.append(word)
+
+    detected = next((r.get("language") for r in results if r.get("language")), None)
+    total_duration = words[-1]["end"] if words else duration
+    wpm = int((len(words) / total_duration) * 60) if total_duration > 0 else 0
+
+    return {
+        "text": " ".join(w["text"] for w in words if w["text"]),
+        "language": detected or language or "en",
+        "words": words,
+        "diarization": [],
+        "wpm": wpm,
+    }
+
+
+def _is_seam_duplicate(previous: Dict, word: Dict, tolerance: float = 0.25) -> bool:
+    return (
+        previous["text"].strip().lower() == word["text"].strip().lower()
+        and abs(previous["start"] - word["start"]) <= tolerance
+    )
+
+
+async def transcribe_chunked(
+    audio_path: str,
+    language: Optional[str],
+    pool,
+    duration: Optional[float] = None,
+    on_words: Optional[Callable[[List[Dict]], Awaitable[None]]] = None,
+) -> Dict:
+    """
+    Transcribe long audio as parallel chunks
+
+    Args:
+        audio_path: Local 16 kHz mono audio
+        language: Language hint (None to detect per chunk)
+        pool: BoundedPool to run chunks in (process pool for Whisper)
+        duration: Audio duration if already probed
+        on_words: Awaited with each new run of stitched words, in time
+            order, as soon as every chunk before them has finished
+
+    Returns:
+        Same shape as WhisperProvider.transcribe
+    """
+    if duration is None:
+        duration = await run_io(probe_duration, audio_path)
+    silences = await run_io(detect_silences, audio_path)
+    chunks = plan_chunks(duration, silences)
+    logger.info(f"Transcribing {duration:.0f}s of audio as {len(chunks)} chunks ({len(silences)} pauses found)")
+
+    # One chunk per pool worker at a time: queueing every chunk at once
+    # would hold the pool past its admission limit (503s for new requests)
+    fan_out = asyncio.Semaphore(pool.max_workers)
+
+    async def run_chunk(chunk: Chunk) -> Tuple[int, Dict]:
+        async with fan_out:
+            return chunk.index, await pool.run(transcribe_chunk, audio_path, chunk, duration, language)
+
+    results: List[Optional[Dict]] = [None] * len(chunks)
+    ready = 0     # chunks [0, ready) are done
+    emitted = 0   # stitched words already passed to on_words
+
+    for next_done in asyncio.as_completed([run_chunk(chunk) for chunk in chunks]):
+        index, result = await next_done
+        results[index] = result
+        if on_words is None:
+            continue
+
+        # Stitching a finished prefix is stable: later chunks never
+        # change words already owned by earlier ones
+        while ready < len(chunks) and results[ready] is not None:
+            ready += 1
+        prefix = stitch_chunks(chunks[:ready], results[:ready], duration, language)
+        if len(prefix["words"]) > emitted:
+            await on_words(prefix["words"][emitted:])
+            emitted = len(prefix["words"])
+
+    return stitch_chunks(chunks, results, duration, language)
@@ -0,0 +1,198 @@
+"""
+Coherence Scorer - Semantic similarity between Pro Clip segments
+Segments are embedded once (local sentence-embedding model or a
+deterministic hashing embedder), cached by text hash, and combinations
+are scored by cosine similarity instead of one LLM call per candidate
+"""
+
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict
+from typing import List, Optional
+import hashlib
+import logging
+import math
+import os
+import threading
+
+import numpy as np
+
+from services.transcript_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+
+class Embedder(ABC):
+    """Abstract base class for segment embedders"""
+
+    # Coherence (cosine similarity) below which a combination is rejected
+    default_min_similarity = 0.3
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Unit-length embeddings, one row per text"""
+        pass
+
+
+class HashingEmbedder(Embedder):
+    """
+    Signed feature hashing of content words
+
+    Deterministic and dependency-free: the same text always gets the same
+    vector in any process. Similarity comes from shared content words, so
+    the threshold is lower than for a trained model.
+    """
+
+    default_min_similarity = 0.05
+
+    STOPWORDS = frozenset({
+        'the', 'and', 'that', 'this', 'with', 'for', 'are', 'was', 'were', 'you',
+        'your', 'they', 'them', 'their', 'have', 'has', 'had', 'but', 'not', 'what',
+        'when', 'where', 'which', 'who', 'will', 'would', 'could', 'should', 'can',
+        'just', 'about', 'from', 'into', 'there', 'then', 'than', 'been', 'being',
+        'because', 'like', 'really', 'know', "it's", "that's", "i'm", "don't",
+        'yeah', 'okay', 'also', 'some', 'all', 'our', 'out', 'very', 'more', 'its',
+    })
+
+    def __init__(self, dim: int = 1024):
+        """
+        Initialize hashing embedder
+
+        Args:
+            dim: Embedding dimension (hash buckets)
+        """
+        self.dim = dim
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim))
+        for row, text in enumerate(texts):
+            tokens = [t for t in tokenize(text) if len(t) > 2 and t not in self.STOPWORDS]
+            for token, count in Counter(tokens).items():
+                digest = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), 'little')
+                sign = 1.0 if digest >> 63 else -1.0
+                vectors[row, digest % self.dim] += sign * (1.0 + math.log(count))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+class SentenceTransformerEmbedder(Embedder):
+    """Local sentence-embedding model on CPU"""
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+        """
+        Initialize sentence-transformers embedder
+
+        Args:
+            model_name: sentence-transformers model name or path
+        """
+        from sentence_transformers import SentenceTransformer
+
+        logger.info(f"Loading sentence embedding model {model_name} on cpu")
+        self.model = SentenceTransformer(model_name, device="cpu")
+        # Inference is not thread-safe; one batch at a time
+        self._lock = threading.Lock()
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        with self._lock:
+            return np.asarray(
+                self.model.encode(texts, normalize_embeddings=True, convert_to_numpy=True),
+                dtype=float
+            )
+
+
+class CoherenceScorer:
+    """
+    Embedding cache plus cosine scoring of segment combinations
+
+    Embeddings are kept in an LRU keyed by text hash, so a segment is
+    embedded once per process however many combinations it appears in.
+    """
+
+    def __init__(
+        self,
+        embedder: Embedder,
+        min_similarity: Optional[float] = None,
+        cache_size: int = 8192,
+    ):
+        """
+        Initialize coherence scorer
+
+        Args:
+            embedder: Segment embedder
+            min_similarity: Coherence threshold (embedder default if None)
+            cache_size: Embeddings kept in memory
+        """
+        self.embedder = embedder
+        self.min_similarity = (
+            embedder.default_min_similarity if min_similarity is None else min_similarity
+        )
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return hashlib.sha1(text.encode()).hexdigest()
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embeddings for texts, embedding only cache misses (in one batch)"""
+        keys = [self._key(text) for text in texts]
+        with self._lock:
+            found = {}
+            for key in keys:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    found[key] = self._cache[key]
+
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        if missing:
+            vectors = self.embedder.embed(list(missing.values()))
+            with self._lock:
+                for key, vector in zip(missing, vectors):
+                    found[key] = vector
+                    self._cache[key] = vector
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        return np.stack([found[key] for key in keys]) if keys else np.zeros((0, 0))
+
+    def similarity(self, texts: List[str]) -> float:
+        """
+        Coherence of segment texts in clip order (1.0 for one text)
+
+        The weakest transition: minimum cosine similarity between
+        consecutive segments, so every cut has to stay on topic
+        """
+        if len(texts) < 2:
+            return 1.0
+        embeddings = self.embed(texts)
+        transitions = np.einsum('ij,ij->i', embeddings[:-1], embeddings[1:])
+        return float(transitions.min())
+
+    def is_coherent(self, texts: List[str]) -> bool:
+        return self.similarity(texts) >= self.min_similarity
+
+
+_scorer: Optional[CoherenceScorer] = None
+_scorer_lock = threading.Lock()
+
+
+def get_coherence_scorer() -> CoherenceScorer:
+    """Get the process-wide coherence scorer (configured from env)"""
+    global _scorer
+    with _scorer_lock:
+        if _scorer is None:
+            kind = os.getenv("COHERENCE_EMBEDDER", "hashing").lower()
+            embedder: Embedder = HashingEmbedder()
+            if kind == "sentence-transformers":
+                try:
+                    embedder = SentenceTransformerEmbedder(
+                        os.getenv("COHERENCE_MODEL", "all-MiniLM-L6-v2")
+                    )
+                except Exception as e:
+                    logger.warning(f"Sentence embedding model unavailable, using hashing embedder: {e}")
+            threshold = os.getenv("COHERENCE_MIN_SIMILARITY")
+            _scorer = CoherenceScorer(
+                embedder,
+                min_similarity=float(threshold) if threshold else None
+            )
+        return _scorer
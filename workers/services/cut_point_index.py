@@ -0,0 +1,96 @@
+"""
+Cut Point Index - Sorted inter-word gaps for snapping clip boundaries
+Built once per transcript; each snap is a searchsorted plus a scan of
+the gaps within the snapping window
+"""
+
+from typing import Sequence
+
+import numpy as np
+
+from services.transcript import CAPITALIZED, CLAUSE_END, SENTENCE_END, Transcript, as_transcript
+
+MIN_GAP = 0.15       # shortest pause considered a cut point (seconds)
+SNAP_WINDOW = 2.0    # cut points considered around the target (seconds)
+DISTANCE_PENALTY = 3.0  # quality points lost per second from the target
+
+WEAK_CUT_WORDS = {'the', 'a', 'an', 'to', 'of', 'in', 'on', 'at', 'for', 'with'}
+
+
+class CutPointIndex:
+    """
+    Candidate cut points (gap starts) with quality scores
+
+    Quality favours long pauses, sentence/clause ends and capitalised
+    next words, and penalises cutting next to articles/prepositions.
+    """
+
+    def __init__(self, times: np.ndarray, quality: np.ndarray):
+        order = np.argsort(times, kind="stable")
+        self.times = times[order]
+        self.quality = quality[order]
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @classmethod
+    def from_words(cls, words: Sequence) -> "CutPointIndex":
+        """Build from time-ordered words (Transcript, dicts or Word objects)"""
+        return cls.from_transcript(as_transcript(words))
+
+    @classmethod
+    def from_transcript(cls, transcript: Transcript) -> "CutPointIndex":
+        """Build from a time-ordered transcript"""
+        if len(transcript) < 2:
+            return cls(np.zeros(0), np.zeros(0))
+
+        ends = transcript.ends[:-1]
+        gaps = transcript.starts[1:] - ends
+        keep = gaps >= MIN_GAP
+
+        # Longer gaps are better (natural pauses)
+        quality = np.select(
+            [gaps > 0.5, gaps > 0.3, gaps > 0.2],
+            [10, 7, 4],
+            default=1,
+        ).astype(float)
+
+        prev_flags = transcript.flags[:-1]
+        next_flags = transcript.flags[1:]
+        # Sentence boundary / clause boundary on the previous word
+        quality += np.where(prev_flags & SENTENCE_END, 15, np.where(prev_flags & CLAUSE_END, 8, 0))
+        # Next word starts a sentence
+        quality += np.where(next_flags & CAPITALIZED, 5, 0)
+        # Avoid cutting between articles and nouns, prepositions, etc.
+        weak_vocab = np.array([text.strip().lower() in WEAK_CUT_WORDS for text in transcript.vocab])
+        weak = weak_vocab[transcript.token_ids]
+        quality -= np.where(weak[:-1] | weak[1:], 5, 0)
+
+        return cls(ends[keep], quality[keep])
+
+    def snap(self, time: float, window: float = SNAP_WINDOW) -> float:
+        """
+        Best cut point near time
+
+        Within the window, maximises quality minus a distance penalty;
+        with nothing in the window, falls back to the closest cut point.
+        """
+        if not len(self.times):
+            return time
+
+        lo = int(np.searchsorted(self.times, time - window, side="left"))
+        hi = int(np.searchsorted(self.times, time + window, side="right"))
+        if lo < hi:
+            distance = np.abs(self.times[lo:hi] - time)
+            final = self.quality[lo:hi] - distance * DISTANCE_PENALTY
+            # argmax returns the earliest best, like max() over a list
+            return float(self.times[lo + int(np.argmax(final))])
+
+        # No cuts within the window: use the closest one
+        pos = int(np.searchsorted(self.times, time))
+        if pos == 0:
+            return float(self.times[0])
+        if pos == len(self.times):
+            return float(self.times[-1])
+        before, after = self.times[pos - 1], self.times[pos]
+        return float(before if time - before <= after - time else after)
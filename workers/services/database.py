@@ -4,11 +4,41 @@ import os
 import logging
 from typing import Optional, List, Dict, Any
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_batch, execute_values
 import json
 
 logger = logging.getLogger(__name__)
 
+MOMENT_COLUMNS = (
+    'id, "projectId", "tStart", "tEnd", duration, '
+    'score, reason, features, title, description, "createdAt"'
+)
+
+# One Moment row (id and timestamp generated server-side)
+MOMENT_TEMPLATE = "(gen_random_uuid(), %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())"
+
+# Moments a re-rank replaces: exported ones stay (deleting them would
+# cascade to the user's exports)
+DELETE_REPLACEABLE_MOMENTS = (
+    'DELETE FROM "Moment" m WHERE m."projectId" = ANY(%s) '
+    'AND NOT EXISTS (SELECT 1 FROM "Export" e WHERE e."momentId" = m.id)'
+)
+
+
+def _moment_values(project_id: str, clip: Dict[str, Any]) -> tuple:
+    """Parameters for one Moment row"""
+    return (
+        project_id,
+        clip['tStart'],
+        clip['tEnd'],
+        clip['duration'],
+        clip['score'],
+        clip['reason'],
+        json.dumps(clip['features']),
+        clip.get('title', 'Untitled Clip'),
+        clip.get('description', ''),
+    )
+
 
 class DatabaseService:
     """PostgreSQL database service"""
@@ -56,34 +86,59 @@ class DatabaseService:
             logger.error(f"Error fetching transcript: {e}")
             return None
     
+    def get_transcripts(self, transcript_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch many transcripts in one query, keyed by transcript ID"""
+        if not transcript_ids:
+            return {}
+        try:
+            with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute(
+                    'SELECT * FROM "Transcript" WHERE id = ANY(%s)',
+                    (list(transcript_ids),)
+                )
+                return {row['id']: dict(row) for row in cur.fetchall()}
+        except Exception as e:
+            logger.error(f"Error fetching transcripts: {e}")
+            return {}
+    
+    def save_transcript_data_key(self, key: str, values_by_transcript: Dict[str, Any]) -> bool:
+        """
+        Set one key of Transcript.data for many transcripts in one transaction
+    
+        Args:
+            key: Top-level key inside the data JSON (e.g. cached ranker features)
+            values_by_transcript: JSON-serializable value per transcript ID
+        """
+        if not values_by_transcript:
+            return True
+        try:
+            with self.conn.cursor() as cur:
+                execute_batch(
+                    cur,
+                    'UPDATE "Transcript" SET data = jsonb_set(data, %s, %s::jsonb) WHERE id = %s',
+                    [
+                        ([key], json.dumps(value), transcript_id)
+                        for transcript_id, value in values_by_transcript.items()
+                    ]
+                )
+                self.conn.commit()
+                logger.info(f"✅ Saved transcript {key} for {len(values_by_transcript)} transcripts")
+                return True
+        except Exception as e:
+            logger.error(f"❌ Error saving transcript {key}: {e}")
+            self.conn.rollback()
+            return False
+    
     def save_moments(self, project_id: str, clips: List[Dict[str, Any]]) -> bool:
-        """Save detected moments to database"""
+        """Replace a project's (unexported) moments with newly detected ones"""
         try:
             with self.conn.cursor() as cur:
+                # Re-ranks (e.g. under a new weight profile) replace, not append
+                cur.execute(DELETE_REPLACEABLE_MOMENTS, ([project_id],))
                 for clip in clips:
                     cur.execute(
-                        '''
-                        INSERT INTO "Moment" (
-                            id, "projectId", "tStart", "tEnd", duration,
-                            score, reason, features, title, description,
-                            "createdAt"
-                        ) VALUES (
-                            gen_random_uuid(), %s, %s, %s, %s,
-                            %s, %s, %s, %s, %s,
-                            NOW()
-                        )
-                        ''',
-                        (
-                            project_id,
-                            clip['tStart'],
-                            clip['tEnd'],
-                            clip['duration'],
-                            clip['score'],
-                            clip['reason'],
-                            json.dumps(clip['features']),
-                            clip.get('title', 'Untitled Clip'),
-                            clip.get('description', ''),
-                        )
+                        f'INSERT INTO "Moment" ({MOMENT_COLUMNS}) VALUES {MOMENT_TEMPLATE}',
+                        _moment_values(project_id, clip)
                     )
                 
                 self.conn.commit()
@@ -94,6 +149,73 @@ class DatabaseService:
             self.conn.rollback()
             return False
     
+    def save_moments_bulk(
+        self,
+        moments_by_project: Dict[str, List[Dict[str, Any]]],
+        project_status: Optional[str] = None
+    ) -> bool:
+        """
+        Replace moments for many projects in one transaction
+        
+        Each project's previous (unexported) moments are deleted first, so
+        re-ranking the backlog after a weight change doesn't duplicate them.
+        
+        Args:
+            moments_by_project: Moment dicts per project ID
+            project_status: Status to set on those projects in the same transaction
+            
+        Returns:
+            True if everything was committed, False if it was rolled back
+        """
+        rows = [
+            _moment_values(project_id, clip)
+            for project_id, clips in moments_by_project.items()
+            for clip in clips
+        ]
+        try:
+            with self.conn.cursor() as cur:
+                if moments_by_project:
+                    cur.execute(DELETE_REPLACEABLE_MOMENTS, (list(moments_by_project),))
+                if rows:
+                    execute_values(
+                        cur,
+                        f'INSERT INTO "Moment" ({MOMENT_COLUMNS}) VALUES %s',
+                        rows,
+                        template=MOMENT_TEMPLATE,
+                        page_size=500
+                    )
+                if project_status and moments_by_project:
+                    cur.execute(
+                        'UPDATE "Project" SET status = %s, "updatedAt" = NOW() WHERE id = ANY(%s)',
+                        (project_status, list(moments_by_project))
+                    )
+                
+                self.conn.commit()
+                logger.info(f"✅ Saved {len(rows)} moments for {len(moments_by_project)} projects")
+                return True
+        except Exception as e:
+            logger.error(f"❌ Error saving moments: {e}")
+            self.conn.rollback()
+            return False
+    
+    def update_projects_status(self, project_ids: List[str], status: str) -> bool:
+        """Update the status of many projects at once"""
+        if not project_ids:
+            return True
+        try:
+            with self.conn.cursor() as cur:
+                cur.execute(
+                    'UPDATE "Project" SET status = %s, "updatedAt" = NOW() WHERE id = ANY(%s)',
+                    (status, list(project_ids))
+                )
+                self.conn.commit()
+                logger.info(f"✅ Updated {len(project_ids)} projects to {status}")
+                return True
+        except Exception as e:
+            logger.error(f"❌ Error updating project statuses: {e}")
+            self.conn.rollback()
+            return False
+    
     def update_project_status(self, project_id: str, status: str) -> bool:
         """Update project status"""
         try:
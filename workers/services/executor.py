@@ -0,0 +1,168 @@
+"""
+Worker Executors - Bounded thread/process pools for blocking job work
+Keeps ffmpeg, HTTP, DB and CPU-heavy ML calls off the event loop
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PoolSaturatedError(RuntimeError):
+    """Raised when a pool cannot admit more work (backpressure)"""
+
+
+class BoundedPool:
+    """
+    Executor wrapper with admission control
+
+    Up to max_workers jobs run at once and up to max_pending more may wait
+    in the executor queue. Endpoints call check_capacity() before queueing
+    a job so callers get a 503 instead of an ever-growing backlog.
+    """
+
+    def __init__(self, name: str, kind: str, max_workers: int, max_pending: int):
+        """
+        Initialize pool
+
+        Args:
+            name: Pool name for logs and stats
+            kind: "thread" or "process"
+            max_workers: Concurrent jobs
+            max_pending: Jobs allowed to wait beyond max_workers
+        """
+        self.name = name
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor: Optional[Executor] = None
+        self._initializer: Optional[Callable] = None
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def saturated(self) -> bool:
+        return self._in_flight >= self.max_workers + self.max_pending
+
+    def check_capacity(self):
+        """Raise PoolSaturatedError if the pool cannot admit another job"""
+        if self.saturated:
+            raise PoolSaturatedError(
+                f"{self.name} pool saturated ({self._in_flight} jobs in flight)"
+            )
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Run a blocking callable in the pool and await its result"""
+        with self._lock:
+            self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            call = functools.partial(fn, *args, **kwargs)
+            return await loop.run_in_executor(self._get_executor(), call)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    async def warm(self, fn: Callable) -> int:
+        """
+        Preload per-process state (e.g. models) in the pool's workers
+        
+        Process pools run fn as the worker initializer, so every worker
+        process (including replacements) loads it before its first job,
+        however jobs are distributed. Thread workers share this process,
+        so fn runs once. fn must be picklable and must not raise.
+        
+        Returns:
+            Number of worker processes started
+        """
+        if self.kind != "process":
+            await self.run(fn)
+            return 1
+        with self._lock:
+            self._initializer = fn
+            if self._executor is not None:
+                # Restart so existing workers pick up the initializer
+                self._executor.shutdown(wait=False)
+                self._executor = None
+        pids = await asyncio.gather(*(self.run(os.getpid) for _ in range(self.max_workers)))
+        return len(set(pids))
+
+    def stats(self) -> Dict:
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "in_flight": self._in_flight,
+            "saturated": self.saturated,
+        }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _get_executor(self) -> Executor:
+        # Created lazily so importing this module never forks processes
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        initializer=self._initializer,
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix=f"{self.name}-worker",
+                    )
+                logger.info(f"Started {self.name} {self.kind} pool ({self.max_workers} workers)")
+            return self._executor
+
+
+# Blocking I/O: ffmpeg subprocesses, HTTP, S3, psycopg2
+io_pool = BoundedPool(
+    "io",
+    "thread",
+    max_workers=int(os.getenv("WORKER_IO_THREADS", "8")),
+    max_pending=int(os.getenv("WORKER_IO_MAX_PENDING", "32")),
+)
+
+# CPU-bound Python: ranking, local Whisper
+cpu_pool = BoundedPool(
+    "cpu",
+    "process",
+    max_workers=int(os.getenv("WORKER_CPU_PROCESSES", "2")),
+    max_pending=int(os.getenv("WORKER_CPU_MAX_PENDING", "8")),
+)
+
+
+async def run_io(fn: Callable, *args, **kwargs):
+    """Run blocking I/O work (ffmpeg, HTTP, DB) off the event loop"""
+    return await io_pool.run(fn, *args, **kwargs)
+
+
+async def run_cpu(fn: Callable, *args, **kwargs):
+    """Run CPU-bound work in a worker process (fn and args must pickle)"""
+    return await cpu_pool.run(fn, *args, **kwargs)
+
+
+def pool_stats() -> Dict[str, Dict]:
+    """Current load of every pool"""
+    return {pool.name: pool.stats() for pool in (io_pool, cpu_pool)}
+
+
+def shutdown_pools():
+    """Stop all pools (called on app shutdown)"""
+    for pool in (io_pool, cpu_pool):
+        pool.shutdown()
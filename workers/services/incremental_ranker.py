@@ -0,0 +1,153 @@
+"""
+Incremental Ranker - Highlight detection while transcription is running
+Takes words in batches as ASR chunks complete and produces provisional
+clips early; finalize() matches RankerEngine.rank_highlights
+"""
+
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.feature_extractor import FEATURE_NAMES
+from services.ranker_engine import ClipScore, RankerEngine, Segment, SegmentBuilder, Word
+from services.speaker_index import SpeakerIndex
+from services.transcript_index import TranscriptIndex
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalRanker:
+    """
+    Streaming wrapper around RankerEngine
+
+    Segments are cut as words arrive and each completed segment is scored
+    once. Novelty depends on the whole transcript, so provisional scores
+    use the segments seen so far; finalize() refreshes novelty and speaker
+    features against the full transcript before the final selection.
+    """
+
+    def __init__(
+        self,
+        ranker: Optional[RankerEngine] = None,
+        audio_features: Optional[Dict] = None,
+        vision_features: Optional[Dict] = None,
+    ):
+        """
+        Initialize incremental ranker
+
+        Args:
+            ranker: Engine whose scoring and clip expansion to use
+            audio_features: Optional audio energy/pitch data
+            vision_features: Optional vision data
+        """
+        self.ranker = ranker or RankerEngine()
+        self.audio_features = audio_features
+        self.vision_features = vision_features
+        self.words: List[Word] = []
+        self.diarization: List[Dict] = []
+        self.segments: List[Segment] = []
+        self.segment_scores: List[Tuple[Segment, Dict, float]] = []
+        # Time each segment's speaker is looked up at, for late diarization
+        self._speaker_times: List[float] = []
+        self._builder = SegmentBuilder(self.ranker, self.diarization)
+        # Grows with the transcript; novelty is relative to segments so far
+        self._index = TranscriptIndex()
+        self._finalized = False
+
+    @property
+    def transcript_end(self) -> float:
+        return self.words[-1].end if self.words else 0.0
+
+    def add_words(self, words: List[Dict], diarization: Optional[List[Dict]] = None) -> int:
+        """
+        Add a batch of words (in time order, after any earlier batch)
+
+        Args:
+            words: Word dicts with text, start, end, confidence
+            diarization: Speaker segments covering this batch, if known
+
+        Returns:
+            Number of segments completed by this batch
+        """
+        if self._finalized:
+            raise RuntimeError("IncrementalRanker already finalized")
+        if diarization:
+            # Re-index so new speakers apply to segments cut from now on
+            self.diarization.extend(diarization)
+            self._builder.speakers = SpeakerIndex(self.diarization)
+
+        completed = 0
+        for w in words:
+            word = Word(**w)
+            self.words.append(word)
+            segment = self._builder.add(word)
+            if segment:
+                self._add_segment(segment)
+                completed += 1
+        return completed
+
+    def provisional_clips(self, num_clips: int = 6) -> List[ClipScore]:
+        """Best clips from the transcript so far (scores may still change)"""
+        seeds = self.ranker._find_seed_points(self.segment_scores, num_clips)
+        return self.ranker._clips_from_seeds(seeds, self.segment_scores, self.words, num_clips)
+
+    def finalize(self, num_clips: int = 6) -> List[ClipScore]:
+        """
+        Close the transcript and return the final clips
+
+        Produces the same clips as RankerEngine.rank_highlights over all
+        the words added, without re-scoring the text-only features.
+        """
+        if not self._finalized:
+            segment = self._builder.flush()
+            if segment:
+                self._add_segment(segment)
+            self._refresh_global_features()
+            self._finalized = True
+        return self.provisional_clips(num_clips)
+
+    def _add_segment(self, segment: Segment):
+        self.segments.append(segment)
+        self._speaker_times.append(self._builder.last_speaker_time)
+        self._index.add(segment.text)
+        features = self.ranker._extract_features(
+            segment,
+            self.words,
+            self.audio_features,
+            self.vision_features,
+            self.segments,
+            self._index
+        )
+        score = self.ranker._compute_score(features)
+        self.segment_scores.append((segment, features, score))
+
+    def _refresh_global_features(self):
+        """Recompute features that depend on the whole transcript"""
+        speakers = SpeakerIndex(self.diarization)
+        for index, (segment, _, _) in enumerate(self.segment_scores):
+            # Diarization often arrives after the words (e.g. AssemblyAI)
+            segment.speaker = self.ranker._get_speaker_at_time(
+                self._speaker_times[index],
+                self.diarization,
+                speakers
+            )
+
+        # Text features are kept; novelty and speaker columns are refreshed
+        # and all scores recomputed with one matrix-vector product
+        matrix = np.array([
+            [features[name] for name in FEATURE_NAMES]
+            for _, features, _ in self.segment_scores
+        ]).reshape(len(self.segment_scores), len(FEATURE_NAMES))
+        matrix[:, FEATURE_NAMES.index('novelty')] = [
+            self._index.novelty(segment.text) for segment in self.segments
+        ]
+        matrix[:, FEATURE_NAMES.index('vision_focus')] = [
+            self.ranker._score_vision(segment, self.vision_features) for segment in self.segments
+        ]
+        scores = self.ranker._compute_scores(matrix)
+
+        self.segment_scores = [
+            (segment, dict(zip(FEATURE_NAMES, row)), score)
+            for segment, row, score in zip(self.segments, matrix.tolist(), scores.tolist())
+        ]
@@ -0,0 +1,182 @@
+"""
+Job Queue - Durable Redis/RQ queues for ASR, ranker and render jobs
+
+Backends (JOB_QUEUE_BACKEND):
+- local: run jobs in-process as FastAPI BackgroundTasks (default)
+- rq:    enqueue to Redis (REDIS_URL); run `python worker.py` to process
+- fake:  in-memory fakeredis, jobs run on enqueue in a burst worker thread (tests)
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+QUEUE_NAMES = ("asr", "ranker", "render")
+
+# Per-queue job settings
+#   timeout:            max run time before the job is killed
+#   retries:            retry attempts after a failure
+#   retry_intervals:    seconds to wait before each retry
+#   visibility_timeout: seconds without a worker heartbeat before a started
+#                       job is considered abandoned and handed out again
+QUEUE_SETTINGS: Dict[str, Dict] = {
+    "asr": {
+        "timeout": 3 * 60 * 60,
+        "retries": 2,
+        "retry_intervals": [60, 300],
+        "visibility_timeout": 300,
+    },
+    "ranker": {
+        "timeout": 15 * 60,
+        "retries": 3,
+        "retry_intervals": [10, 60, 300],
+        "visibility_timeout": 120,
+    },
+    "render": {
+        "timeout": 30 * 60,
+        "retries": 3,
+        "retry_intervals": [15, 60, 300],
+        "visibility_timeout": 180,
+    },
+}
+
+_redis = None
+
+
+def queue_backend() -> str:
+    """Configured queue backend: local, rq or fake"""
+    return os.getenv("JOB_QUEUE_BACKEND", "local").lower()
+
+
+def use_job_queue() -> bool:
+    """Whether jobs go through Redis instead of in-process BackgroundTasks"""
+    return queue_backend() in ("rq", "fake")
+
+
+def get_redis():
+    """Shared Redis connection for the configured backend"""
+    global _redis
+    if _redis is None:
+        if queue_backend() == "fake":
+            import fakeredis
+            _redis = fakeredis.FakeStrictRedis()
+        else:
+            from redis import Redis
+            _redis = Redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379"))
+    return _redis
+
+
+def get_queue(name: str):
+    """Get an RQ queue by name"""
+    from rq import Queue
+
+    if name not in QUEUE_SETTINGS:
+        raise ValueError(f"Unknown job queue: {name}")
+
+    return Queue(
+        name,
+        connection=get_redis(),
+        default_timeout=QUEUE_SETTINGS[name]["timeout"],
+    )
+
+
+def _run_fake_queue(queue_name: str):
+    """
+    Drain a fakeredis queue with a burst worker thread
+
+    fakeredis has no worker processes. Jobs must not run inline on the
+    caller's thread: entry points call asyncio.run() and renders block on
+    ffmpeg, so inside a request's event loop the worker thread runs on
+    its own. Synchronous callers (tests, scripts) wait for it.
+    """
+    from rq import SimpleWorker
+    from rq.timeouts import TimerDeathPenalty
+
+    class ThreadWorker(SimpleWorker):
+        # Signal handlers and SIGALRM timeouts only work on the main thread
+        death_penalty_class = TimerDeathPenalty
+
+        def _install_signal_handlers(self):
+            pass
+
+    worker = ThreadWorker([get_queue(queue_name)], connection=get_redis())
+    thread = threading.Thread(target=worker.work, kwargs={"burst": True}, daemon=True)
+    thread.start()
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        thread.join()
+
+
+def enqueue_job(queue_name: str, func: Callable, *args, job_id: Optional[str] = None, **kwargs) -> str:
+    """
+    Enqueue a job with the queue's timeout and retry policy
+
+    Args:
+        queue_name: One of QUEUE_NAMES
+        func: Importable module-level job function
+        job_id: Stable id (e.g. export id) so resubmits replace the same job
+
+    Returns:
+        Job id
+    """
+    from rq import Retry
+
+    settings = QUEUE_SETTINGS[queue_name]
+    job = get_queue(queue_name).enqueue(
+        func,
+        *args,
+        job_id=job_id,
+        job_timeout=settings["timeout"],
+        retry=Retry(max=settings["retries"], interval=settings["retry_intervals"]),
+        result_ttl=24 * 60 * 60,
+        failure_ttl=7 * 24 * 60 * 60,
+        **kwargs,
+    )
+    logger.info(f"Enqueued {queue_name} job {job.id}")
+    if queue_backend() == "fake":
+        _run_fake_queue(queue_name)
+    return job.id
+
+
+def requeue_abandoned_jobs(queue_name: str) -> int:
+    """
+    Hand out jobs again whose worker stopped heartbeating
+
+    A started job stays in the StartedJobRegistry while its worker keeps
+    extending the entry. If the worker dies (OOM, pod restart) the entry
+    lapses after the visibility timeout and the job is re-enqueued, using
+    up one retry.
+
+    Returns:
+        Number of jobs requeued
+    """
+    from rq.job import Job
+    from rq.registry import StartedJobRegistry
+
+    queue = get_queue(queue_name)
+    registry = StartedJobRegistry(queue=queue)
+    requeued = 0
+
+    for job_id in registry.get_expired_job_ids():
+        registry.remove(job_id)
+        try:
+            job = Job.fetch(job_id, connection=queue.connection)
+        except Exception:
+            continue
+
+        if job.retries_left:
+            job.retries_left -= 1
+            job.save_meta()
+            job.save()
+            queue.enqueue_job(job)
+            requeued += 1
+            logger.warning(f"Requeued abandoned {queue_name} job {job_id}")
+        else:
+            logger.error(f"Abandoned {queue_name} job {job_id} has no retries left")
+
+    return requeued
@@ -0,0 +1,294 @@
+"""
+Job State Store - Per-stage progress for ASR, ranker and render jobs
+Workers record stages here; status endpoints and SSE streams read it
+
+Backends:
+- Redis (when the job queue is enabled) so separate worker processes
+  and API replicas see the same state
+- In-memory otherwise (jobs run inside the API process)
+
+Async code goes through JobStateStore.call(): in-memory state is read and
+written directly; Redis round trips run on the store's own small thread
+pool, so status traffic never waits behind (or counts toward) io_pool work.
+"""
+
+import asyncio
+import functools
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from services.job_queue import get_redis, use_job_queue
+
+logger = logging.getLogger(__name__)
+
+# Job statuses
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+TERMINAL_STATUSES = (COMPLETED, FAILED)
+
+# Percent complete when a stage starts
+STAGE_PROGRESS: Dict[str, Dict[str, int]] = {
+    "asr": {
+        "queued": 0,
+        "downloading": 5,
+        "extracting": 25,
+        "transcribing": 35,
+        "saving": 95,
+    },
+    "ranker": {
+        "queued": 0,
+        "loading": 5,
+        "ranking": 20,
+        "titling": 70,
+        "saving": 90,
+    },
+    "render": {
+        "queued": 0,
+        "downloading": 5,
+        "extracting": 15,
+        "captioning": 25,
+        "stitching": 30,
+        "analyzing": 32,
+        "reframing": 35,
+        "uploading": 85,
+    },
+}
+
+STATE_TTL = 24 * 60 * 60  # seconds job state is kept after the last update
+STREAM_POLL_INTERVAL = 0.5
+STREAM_KEEPALIVE = 15.0
+REDIS_THREADS = 4  # threads for Redis round trips from async code
+
+
+class JobStateStore:
+    """
+    Records per-stage progress and timings for a job
+
+    State is a small JSON document keyed by "<kind>:<job id>":
+        status, stage, percent, error, result, partial,
+        stages: {stage: {"startedAt", "finishedAt", "duration"}},
+        createdAt, updatedAt, version
+    A single worker owns a job, so read-modify-write updates are safe.
+    """
+
+    def __init__(self, redis=None, ttl: int = STATE_TTL):
+        """
+        Initialize store
+
+        Args:
+            redis: Redis connection; None keeps state in this process
+            ttl: Seconds to keep state after the last update
+        """
+        self.redis = redis
+        self.ttl = ttl
+        self._memory: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def call(self, method: Callable, *args, **kwargs) -> Any:
+        """
+        Call a store method (get, stage, partial, ...) from async code
+
+        The in-memory backend is called directly; Redis calls run on the
+        store's own threads so the event loop never blocks on a round trip.
+        """
+        if self.redis is None:
+            return method(*args, **kwargs)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=REDIS_THREADS, thread_name_prefix="job-state"
+                )
+            executor = self._executor
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, functools.partial(method, *args, **kwargs)
+        )
+
+    # ----- writers (called by workers) -----
+
+    def queued(self, kind: str, job_id: str) -> Dict:
+        """Reset state for a newly submitted job"""
+        state = self._new_state(kind, job_id)
+        with self._lock:
+            self._write(self._key(kind, job_id), state)
+        return state
+
+    def stage(self, kind: str, job_id: str, stage: str, percent: Optional[float] = None) -> Dict:
+        """Enter a stage, closing the timing of the previous one"""
+        def update(state: Dict, now: float):
+            self._finish_stage(state, now)
+            state["status"] = RUNNING
+            state["stage"] = stage
+            state["stages"][stage] = {"startedAt": now, "finishedAt": None, "duration": None}
+            default = STAGE_PROGRESS.get(kind, {}).get(stage, state["percent"])
+            state["percent"] = max(state["percent"], percent if percent is not None else default)
+
+        return self._update(kind, job_id, update)
+
+    def progress(self, kind: str, job_id: str, percent: float) -> Dict:
+        """Report progress within the current stage"""
+        def update(state: Dict, now: float):
+            state["percent"] = max(state["percent"], min(float(percent), 99.0))
+
+        return self._update(kind, job_id, update)
+
+    def partial(self, kind: str, job_id: str, **data) -> Dict:
+        """Publish intermediate output (e.g. provisional clips) before completion"""
+        def update(state: Dict, now: float):
+            state["partial"] = {**(state.get("partial") or {}), **data}
+
+        return self._update(kind, job_id, update)
+
+    def complete(self, kind: str, job_id: str, result: Optional[Dict] = None) -> Dict:
+        """Mark the job completed"""
+        def update(state: Dict, now: float):
+            self._finish_stage(state, now)
+            state["status"] = COMPLETED
+            state["stage"] = COMPLETED
+            state["percent"] = 100
+            state["result"] = result
+
+        return self._update(kind, job_id, update)
+
+    def fail(self, kind: str, job_id: str, error: str) -> Dict:
+        """Mark the job failed, keeping the stage it failed in"""
+        def update(state: Dict, now: float):
+            self._finish_stage(state, now)
+            state["status"] = FAILED
+            state["error"] = error
+
+        return self._update(kind, job_id, update)
+
+    # ----- readers (status endpoints) -----
+
+    def get(self, kind: str, job_id: str) -> Optional[Dict]:
+        """Current state, or None if the job is unknown"""
+        with self._lock:
+            return self._read(self._key(kind, job_id))
+
+    async def stream(
+        self,
+        kind: str,
+        job_id: str,
+        poll_interval: float = STREAM_POLL_INTERVAL,
+        keepalive: float = STREAM_KEEPALIVE,
+    ) -> AsyncIterator[str]:
+        """
+        Server-sent events for a job
+
+        Emits the state whenever its version changes and stops after a
+        terminal status, or when the job is unknown or its state expires.
+        Polls one key, so it never touches the database.
+        """
+        last_version = None
+        last_sent = time.monotonic()
+
+        while True:
+            state = await self.call(self.get, kind, job_id)
+            if state is None:
+                if last_version is not None:
+                    yield "event: expired\ndata: null\n\n"
+                return
+            if state["version"] != last_version:
+                last_version = state["version"]
+                last_sent = time.monotonic()
+                yield f"event: {state['status']}\ndata: {json.dumps(state)}\n\n"
+                if state["status"] in TERMINAL_STATUSES:
+                    return
+            elif time.monotonic() - last_sent >= keepalive:
+                last_sent = time.monotonic()
+                yield ": keepalive\n\n"
+
+            await asyncio.sleep(poll_interval)
+
+    # ----- internals -----
+
+    @staticmethod
+    def _key(kind: str, job_id: str) -> str:
+        return f"jobstate:{kind}:{job_id}"
+
+    @staticmethod
+    def _new_state(kind: str, job_id: str) -> Dict:
+        now = time.time()
+        return {
+            "jobId": job_id,
+            "kind": kind,
+            "status": QUEUED,
+            "stage": "queued",
+            "percent": 0,
+            "error": None,
+            "result": None,
+            "partial": None,
+            "stages": {"queued": {"startedAt": now, "finishedAt": None, "duration": None}},
+            "createdAt": now,
+            "updatedAt": now,
+            "version": 0,
+        }
+
+    @staticmethod
+    def _finish_stage(state: Dict, now: float):
+        timing = state["stages"].get(state["stage"])
+        if timing and timing["finishedAt"] is None:
+            timing["finishedAt"] = now
+            timing["duration"] = round(now - timing["startedAt"], 3)
+
+    def _update(self, kind: str, job_id: str, update: Callable[[Dict, float], None]) -> Dict:
+        key = self._key(kind, job_id)
+        with self._lock:
+            # Jobs started outside an endpoint (e.g. a direct call) have no state yet
+            state = self._read(key) or self._new_state(kind, job_id)
+            now = time.time()
+            update(state, now)
+            state["updatedAt"] = now
+            state["version"] += 1
+            self._write(key, state)
+        return state
+
+    def _read(self, key: str) -> Optional[Dict]:
+        if self.redis is not None:
+            raw = self.redis.get(key)
+            return json.loads(raw) if raw else None
+
+        raw = self._memory.get(key)
+        if raw is None:
+            return None
+        state = json.loads(raw)
+        if time.time() - state["updatedAt"] > self.ttl:
+            del self._memory[key]
+            return None
+        return state
+
+    def _write(self, key: str, state: Dict):
+        # Stored serialized so callers never share mutable state
+        raw = json.dumps(state)
+        if self.redis is not None:
+            self.redis.set(key, raw, ex=self.ttl)
+        else:
+            self._memory[key] = raw
+
+
+_store: Optional[JobStateStore] = None
+_store_lock = threading.Lock()
+
+
+def get_job_state() -> JobStateStore:
+    """Process-wide job state store (Redis-backed when the job queue is on)"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = JobStateStore(redis=get_redis() if use_job_queue() else None)
+        return _store
+
+
+# Headers for server-sent event responses (disable proxy buffering)
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
@@ -0,0 +1,170 @@
+"""
+Loudness - Two-pass loudnorm measurements for renders
+An analysis pass measures a source (or a clip range) once; renders then
+apply loudnorm in linear mode with the measured values, and exports from
+the same source reuse the cached measurement instead of re-analyzing
+
+Backends:
+- Redis (when the job queue is enabled) so every worker shares measurements
+- In-memory otherwise
+"""
+
+import json
+import logging
+import math
+import threading
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional
+
+from services.job_queue import get_redis, use_job_queue
+
+logger = logging.getLogger(__name__)
+
+# loudnorm targets besides integrated loudness (EBU R128 streaming values)
+TRUE_PEAK = -1.5
+LOUDNESS_RANGE = 11
+
+CACHE_TTL = 30 * 24 * 60 * 60  # seconds a measurement is kept
+
+
+@dataclass
+class LoudnessMeasurement:
+    """loudnorm analysis of one source or clip range"""
+    input_i: float  # integrated loudness (LUFS)
+    input_tp: float  # true peak (dBTP)
+    input_lra: float  # loudness range (LU)
+    input_thresh: float  # gating threshold (LUFS)
+    target_offset: float  # gain offset for the second pass (LU)
+
+    def to_dict(self) -> Dict[str, float]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> Optional["LoudnessMeasurement"]:
+        """Measurement from loudnorm's JSON (string values) or to_dict()"""
+        try:
+            values = {name: float(data[name]) for name in cls.__dataclass_fields__}
+        except (KeyError, TypeError, ValueError):
+            return None
+        # Silence measures as -inf; linear mode can't use it
+        if not all(math.isfinite(value) for value in values.values()):
+            return None
+        return cls(**values)
+
+
+def parse_loudnorm_output(stderr: str) -> Optional[LoudnessMeasurement]:
+    """
+    Measurement from the stderr of a loudnorm print_format=json pass
+
+    Returns:
+        LoudnessMeasurement, or None if no usable JSON block was printed
+    """
+    start = stderr.rfind("{")
+    end = stderr.rfind("}")
+    if start == -1 or end < start:
+        return None
+    try:
+        data = json.loads(stderr[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+    return LoudnessMeasurement.from_dict(data)
+
+
+def loudnorm_filter(
+    target_loudness: float,
+    measurement: Optional[LoudnessMeasurement] = None,
+    analyze: bool = False,
+) -> str:
+    """
+    loudnorm filter for a target
+
+    Args:
+        target_loudness: Target integrated loudness in LUFS
+        measurement: First-pass values; applies linear (two-pass) mode
+        analyze: Print the measurement as JSON (analysis pass)
+    """
+    filter_str = f"loudnorm=I={target_loudness}:TP={TRUE_PEAK}:LRA={LOUDNESS_RANGE}"
+    if measurement:
+        filter_str += (
+            f":measured_I={measurement.input_i}"
+            f":measured_TP={measurement.input_tp}"
+            f":measured_LRA={measurement.input_lra}"
+            f":measured_thresh={measurement.input_thresh}"
+            f":offset={measurement.target_offset}"
+            ":linear=true"
+        )
+    if analyze:
+        filter_str += ":print_format=json"
+    return filter_str
+
+
+class LoudnessCache:
+    """
+    Loudness measurements keyed by source, scope and target
+
+    Scope is "source" for a whole-source measurement or a clip's source
+    ranges, so renders of different clips only share whole-source values.
+    """
+
+    def __init__(self, redis=None, ttl: int = CACHE_TTL):
+        """
+        Initialize cache
+
+        Args:
+            redis: Redis connection; None keeps measurements in this process
+            ttl: Seconds to keep a measurement
+        """
+        self.redis = redis
+        self.ttl = ttl
+        self._memory: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(source_key: str, scope: str, target_loudness: float) -> str:
+        return f"loudness:{source_key}:{scope}:{target_loudness:g}"
+
+    def get(self, source_key: str, scope: str, target_loudness: float) -> Optional[LoudnessMeasurement]:
+        """Cached measurement, or None"""
+        key = self._key(source_key, scope, target_loudness)
+        try:
+            if self.redis is not None:
+                raw = self.redis.get(key)
+            else:
+                with self._lock:
+                    raw = self._memory.get(key)
+        except Exception as e:
+            logger.warning(f"Loudness cache read failed: {e}")
+            return None
+        return LoudnessMeasurement.from_dict(json.loads(raw)) if raw else None
+
+    def set(
+        self,
+        source_key: str,
+        scope: str,
+        target_loudness: float,
+        measurement: LoudnessMeasurement,
+    ):
+        """Store a measurement"""
+        key = self._key(source_key, scope, target_loudness)
+        raw = json.dumps(measurement.to_dict())
+        try:
+            if self.redis is not None:
+                self.redis.set(key, raw, ex=self.ttl)
+            else:
+                with self._lock:
+                    self._memory[key] = raw
+        except Exception as e:
+            logger.warning(f"Loudness cache write failed: {e}")
+
+
+_cache: Optional[LoudnessCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_loudness_cache() -> LoudnessCache:
+    """Process-wide loudness cache (Redis-backed when the job queue is on)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LoudnessCache(redis=get_redis() if use_job_queue() else None)
+        return _cache
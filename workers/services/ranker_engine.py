@@ -4,14 +4,29 @@ Implements the formula: score = 0.28*hook + 0.16*novelty + 0.14*structure +
                                0.14*emotion + 0.12*clarity + 0.10*quote + 0.06*vision_focus
 """
 
-import re
+import bisect
+import hashlib
+import heapq
+import os
 import logging
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Union
 from dataclasses import dataclass
 import numpy as np
 
+from services.coherence import CoherenceScorer, get_coherence_scorer
+from services.cut_point_index import CutPointIndex
+from services.feature_extractor import FEATURE_NAMES, FeatureExtractor
+from services.speaker_index import SpeakerIndex
+from services.transcript import SENTENCE_END, Transcript, as_transcript, word_flags
+from services.transcript_index import TranscriptIndex
+
 logger = logging.getLogger(__name__)
 
+# Transcript data key and format version of cached segment features; bump
+# the version whenever feature extraction or segmentation changes
+FEATURE_CACHE_KEY = 'rankerFeatures'
+FEATURE_CACHE_VERSION = 1
+
 
 @dataclass
 class Word:
@@ -36,6 +51,58 @@ class Segment:
         return self.end - self.start
 
 
+def _segments_text_hash(segments: List[Segment]) -> str:
+    return hashlib.sha1('\n'.join(seg.text for seg in segments).encode('utf-8')).hexdigest()
+
+
+@dataclass
+class SegmentFeatures:
+    """
+    Segments of a transcript with their feature matrix
+    
+    The matrix is everything text-dependent about ranking, so it can be
+    cached with the transcript and re-weighted without re-extraction.
+    """
+    segments: List[Segment]
+    matrix: np.ndarray  # (len(segments), len(FEATURE_NAMES))
+    cached: bool = False  # True if the matrix came from a cache payload
+    
+    def to_cache(self) -> Dict:
+        """JSON-serializable payload for FEATURE_CACHE_KEY"""
+        return {
+            'version': FEATURE_CACHE_VERSION,
+            'featureNames': list(FEATURE_NAMES),
+            'segments': [[seg.start, seg.end] for seg in self.segments],
+            'textHash': _segments_text_hash(self.segments),
+            'matrix': self.matrix.tolist(),
+        }
+    
+    @classmethod
+    def from_cache(cls, payload: Optional[Dict], segments: List[Segment]) -> Optional["SegmentFeatures"]:
+        """Features from a cache payload, or None if it doesn't match these segments"""
+        if not payload or payload.get('version') != FEATURE_CACHE_VERSION:
+            return None
+        if payload.get('featureNames') != list(FEATURE_NAMES):
+            return None
+        # Same segment bounds and text, so the same features
+        bounds = payload.get('segments') or []
+        if len(bounds) != len(segments):
+            return None
+        if segments and not np.allclose(bounds, [[seg.start, seg.end] for seg in segments], atol=1e-6):
+            return None
+        if payload.get('textHash') != _segments_text_hash(segments):
+            return None
+        matrix = np.array(payload.get('matrix') or [], dtype=float).reshape(len(segments), len(FEATURE_NAMES))
+        return cls(segments, matrix, cached=True)
+
+
+@dataclass
+class RankResult:
+    """Clips for one transcript of a batch, with the features they were ranked from"""
+    clips: List["ClipScore"]
+    features: SegmentFeatures
+
+
 @dataclass
 class ClipScore:
     """Scored clip/moment"""
@@ -71,6 +138,104 @@ class MultiSegmentClip:
     is_multi_segment: bool = True
 
 
+class SegmentBuilder:
+    """
+    Groups words into sentence-like segments one word at a time
+    
+    Shared by batch ranking and IncrementalRanker so both cut the
+    transcript into exactly the same segments.
+    """
+    
+    MAX_WORDS = 20
+    
+    def __init__(self, ranker: "RankerEngine", diarization: List[Dict]):
+        self.ranker = ranker
+        self.diarization = diarization
+        self.speakers = SpeakerIndex(diarization)
+        self.current_words: List[Word] = []
+        self.current_start: Optional[float] = None
+        self.last_speaker_time: Optional[float] = None
+    
+    def add(self, word: Word) -> Optional[Segment]:
+        """Add a word; returns a segment when this word completes one"""
+        if self.current_start is None:
+            self.current_start = word.start
+        self.current_words.append(word)
+        
+        # End segment on punctuation or speaker change
+        if word_flags(word.text) & SENTENCE_END or len(self.current_words) > self.MAX_WORDS:
+            segment = self._make_segment()
+            self.current_words = []
+            self.current_start = word.end
+            return segment
+        return None
+    
+    def flush(self) -> Optional[Segment]:
+        """Close the trailing partial segment, if any"""
+        if not self.current_words:
+            return None
+        segment = self._make_segment()
+        self.current_words = []
+        return segment
+    
+    def build(self, transcript: Transcript) -> List[Segment]:
+        """Cut a whole transcript at once (the same segments as add() per word)"""
+        if not len(transcript):
+            return []
+        
+        # Exclusive end position of each segment: sentence ends, with runs
+        # longer than MAX_WORDS + 1 words split like add() splits them
+        limit = self.MAX_WORDS + 1
+        stops = []
+        first = 0
+        sentence_ends = np.flatnonzero(transcript.flags & SENTENCE_END).tolist()
+        for last in sentence_ends + [len(transcript) - 1]:
+            while last - first + 1 > limit:
+                first += limit
+                stops.append(first)
+            if last >= first:
+                first = last + 1
+                stops.append(first)
+        
+        segments = []
+        begin = 0
+        segment_start = float(transcript.starts[0])
+        for stop in stops:
+            segment_end = float(transcript.ends[stop - 1])
+            segments.append(self._segment(transcript.join(begin, stop), segment_start, segment_end))
+            # Like add(), the next segment starts where this one's last word ends
+            segment_start = segment_end
+            begin = stop
+        return segments
+    
+    def _make_segment(self) -> Segment:
+        return self._segment(
+            ' '.join(w.text for w in self.current_words),
+            self.current_start,
+            self.current_words[-1].end
+        )
+    
+    def _segment(self, segment_text: str, segment_start: float, segment_end: float) -> Segment:
+        # Get speaker from diarization
+        self.last_speaker_time = (segment_start + segment_end) / 2
+        speaker = self.ranker._get_speaker_at_time(
+            self.last_speaker_time,
+            self.diarization,
+            self.speakers
+        )
+        
+        # Add small padding to avoid cutting words (100ms before, 100ms after)
+        padded_start = max(0, segment_start - 0.1)
+        padded_end = segment_end + 0.1
+        
+        return Segment(
+            start=padded_start,
+            end=padded_end,
+            text=segment_text,
+            speaker=speaker
+        )
+
+
 class RankerEngine:
     """Heuristic-based highlight detection"""
     
@@ -100,22 +265,72 @@ class RankerEngine:
         'actually', 'so', 'anyway', 'right'
     ]
     
-    def __init__(self, min_clip_duration: float = 20, max_clip_duration: float = 90):
+    # Emotional language
+    EMOTION_WORDS = [
+        'love', 'hate', 'amazing', 'terrible', 'beautiful', 'ugly',
+        'happy', 'sad', 'excited', 'angry', 'shocked', 'surprised'
+    ]
+    
+    # List markers (structure)
+    LIST_MARKERS = ['first', 'second', 'third', 'finally']
+    
+    # Minimum seconds between seed segment starts
+    MIN_SEED_GAP = 30
+    
+    # Multi-segment (Pro Clip) combinations: total duration, gap between
+    # consecutive segments (seconds), segment count and search beam width
+    COMBINATION_MIN_DURATION = 18.0
+    COMBINATION_MAX_DURATION = 120.0
+    COMBINATION_MIN_GAP = 3.0
+    COMBINATION_MAX_GAP = 90.0
+    COMBINATION_MAX_SEGMENTS = 4
+    COMBINATION_BEAM = 16
+    # Relative distance from the target duration that halves a chain's rank
+    COMBINATION_DURATION_PENALTY = 2.0
+    
+    # Final score weights, in FEATURE_NAMES order
+    SCORE_WEIGHTS = {
+        'hook': 0.28,
+        'novelty': 0.16,
+        'structure': 0.14,
+        'emotion': 0.14,
+        'clarity': 0.12,
+        'quote': 0.10,
+        'vision_focus': 0.06
+    }
+    
+    def __init__(
+        self,
+        min_clip_duration: float = 20,
+        max_clip_duration: float = 90,
+        weights: Optional[Dict[str, float]] = None
+    ):
         """
         Initialize ranker
         
         Args:
             min_clip_duration: Minimum clip length in seconds
             max_clip_duration: Maximum clip length in seconds
+            weights: Score weights overriding SCORE_WEIGHTS (e.g. a tenant profile)
         """
         self.min_clip_duration = min_clip_duration
         self.max_clip_duration = max_clip_duration
-        self.hook_patterns = [re.compile(p, re.IGNORECASE) for p in self.HOOK_PHRASES]
-        self.question_patterns = [re.compile(p, re.IGNORECASE) for p in self.QUESTION_WORDS]
+        self.feature_extractor = FeatureExtractor(
+            self.HOOK_PHRASES,
+            self.QUESTION_WORDS,
+            self.EMOTION_WORDS,
+            self.FILLER_WORDS,
+            self.LIST_MARKERS,
+        )
+        unknown = set(weights or {}) - set(FEATURE_NAMES)
+        if unknown:
+            raise ValueError(f"Unknown score weights: {', '.join(sorted(unknown))}")
+        self.weights = {**self.SCORE_WEIGHTS, **(weights or {})}
+        self.weight_vector = np.array([float(self.weights.get(name, 0.0)) for name in FEATURE_NAMES])
     
     def rank_highlights(
         self,
-        words: List[Dict],
+        words: Union[List[Dict], Transcript],
         diarization: List[Dict],
         audio_features: Optional[Dict] = None,
         vision_features: Optional[Dict] = None,
@@ -125,7 +340,7 @@ class RankerEngine:
         Detect and rank highlights
         
         Args:
-            words: List of word dicts with text, start, end, confidence
+            words: Transcript, or list of word dicts with text, start, end, confidence
             diarization: List of speaker segments
             audio_features: Optional audio energy/pitch data
             vision_features: Optional vision data (face detection, etc.)
@@ -136,41 +351,122 @@ class RankerEngine:
         """
         logger.info(f"Ranking highlights from {len(words)} words")
         
-        # Convert to Word objects
-        word_objs = [Word(**w) for w in words]
+        # Columnar words, built once per transcript
+        transcript = as_transcript(words)
         
-        # Build segments from words
-        segments = self._build_segments(word_objs, diarization)
+        features = self.segment_features(transcript, diarization, vision_features)
+        return self.rerank(transcript, features, num_clips)
+    
+    def segment_features(
+        self,
+        words: Union[List[Dict], Transcript],
+        diarization: List[Dict],
+        vision_features: Optional[Dict] = None,
+        cached: Optional[Dict] = None,
+    ) -> SegmentFeatures:
+        """
+        Build segments and their feature matrix
+        
+        Args:
+            words: Transcript, or list of word dicts
+            diarization: List of speaker segments
+            vision_features: Optional vision data
+            cached: Payload from SegmentFeatures.to_cache; used instead of
+                extracting features if it matches the segments
+            
+        Returns:
+            SegmentFeatures (cached=True if the payload was used)
+        """
+        segments = self._build_segments(as_transcript(words), diarization)
         logger.info(f"Built {len(segments)} segments")
         
-        # Score each segment
-        segment_scores = []
-        for segment in segments:
-            features = self._extract_features(
-                segment,
-                word_objs,
-                audio_features,
-                vision_features,
-                segments
-            )
-            score = self._compute_score(features)
-            segment_scores.append((segment, features, score))
+        features = SegmentFeatures.from_cache(cached, segments)
+        if features is not None:
+            logger.info("Using cached segment features")
+            return features
+        
+        # Token statistics indexed once per transcript
+        index = TranscriptIndex.from_segments(segments)
+        return SegmentFeatures(segments, self.feature_extractor.extract(segments, index, vision_features))
+    
+    def rerank(
+        self,
+        words: Union[List[Dict], Transcript],
+        features: SegmentFeatures,
+        num_clips: int = 6,
+    ) -> List[ClipScore]:
+        """
+        Rank from precomputed segment features
+        
+        Only applies this engine's weights, seed selection and clip
+        expansion, so re-ranking with new weights skips text processing.
+        """
+        segment_scores = self._segment_scores(features.segments, features.matrix)
         
         # Find high-scoring seed points
         seed_points = self._find_seed_points(segment_scores, num_clips)
         logger.info(f"Found {len(seed_points)} seed points")
         
+        return self._clips_from_seeds(seed_points, segment_scores, words, num_clips)
+    
+    def rank_many(
+        self,
+        transcripts: List[Tuple[Union[List[Dict], Transcript], List[Dict]]],
+        num_clips: int = 6,
+        cached_features: Optional[List[Optional[Dict]]] = None,
+    ) -> List[Optional[RankResult]]:
+        """
+        Rank highlights for many transcripts with one engine
+        
+        Compiled patterns and weights are shared across transcripts; a
+        transcript that fails to rank gets None instead of failing the batch.
+        
+        Args:
+            transcripts: (words, diarization) per transcript
+            num_clips: Target number of clips per transcript
+            cached_features: Cache payload (or None) per transcript
+            
+        Returns:
+            RankResult (or None) for each transcript, in input order
+        """
+        cached_features = cached_features or [None] * len(transcripts)
+        results = []
+        for (words, diarization), cached in zip(transcripts, cached_features):
+            try:
+                transcript = as_transcript(words)
+                features = self.segment_features(transcript, diarization, cached=cached)
+                results.append(RankResult(self.rerank(transcript, features, num_clips), features))
+            except Exception as e:
+                logger.error(f"Ranking failed for one transcript in batch: {e}")
+                results.append(None)
+        return results
+    
+    def _clips_from_seeds(
+        self,
+        seed_points: List[int],
+        segment_scores: List[Tuple[Segment, Dict, float]],
+        words: Union[Transcript, List[Word]],
+        num_clips: int,
+    ) -> List[ClipScore]:
+        """Expand seeds to clips, drop duplicates and return the best num_clips"""
+        transcript = as_transcript(words)
+        segments = [segment for segment, _, _ in segment_scores]
+        
         # Expand seeds to clips with windowing
+        cut_index = CutPointIndex.from_transcript(transcript)
         clips = []
         seen_clips = set()  # Track (start, end) to avoid duplicates
         
-        for seed_segment, seed_features, seed_score in seed_points:
+        for seed_index in seed_points:
+            seed_segment, seed_features, seed_score = segment_scores[seed_index]
             clip = self._expand_to_clip(
                 seed_segment,
-                word_objs,
+                transcript,
                 segments,
                 seed_features,
-                seed_score
+                seed_score,
+                cut_index,
+                seed_index
             )
             if clip:
                 # Check for duplicates (same start/end within 1 second)
@@ -189,12 +485,13 @@ class RankerEngine:
     
     def detect_multi_segment_clips(
         self,
-        words: List[Dict],
+        words: Union[List[Dict], Transcript],
         diarization: List[Dict],
         audio_features: Optional[Dict] = None,
         vision_features: Optional[Dict] = None,
         num_clips: int = 3,
         target_duration: float = 45.0,
+        llm_verify_top: Optional[int] = None,
     ) -> List[MultiSegmentClip]:
         """
         Detect multi-segment clips by combining high-value non-contiguous segments
@@ -203,72 +500,61 @@ class RankerEngine:
         parts of the video, similar to Opus Clip's approach.
         
         Args:
-            words: List of word dicts
+            words: Transcript, or list of word dicts
             diarization: Speaker segments
             audio_features: Optional audio data
             vision_features: Optional vision data
             num_clips: Number of multi-segment clips to generate
             target_duration: Target total duration for each clip (seconds)
+            llm_verify_top: Best combinations to confirm with the LLM
+                (COHERENCE_LLM_VERIFY_TOP env, default 0, if None)
             
         Returns:
             List of MultiSegmentClip objects
         """
         logger.info(f"🎬 Detecting multi-segment clips (target: {target_duration}s)")
         
-        # Convert to Word objects
-        word_objs = [Word(**w) for w in words]
+        # Columnar words, built once per transcript
+        transcript = as_transcript(words)
         
         # Build segments
-        segments = self._build_segments(word_objs, diarization)
+        segments = self._build_segments(transcript, diarization)
         
         # Score all segments
-        segment_scores = []
-        for segment in segments:
-            features = self._extract_features(
-                segment,
-                word_objs,
-                audio_features,
-                vision_features,
-                segments
-            )
-            score = self._compute_score(features)
-            segment_scores.append((segment, features, score))
+        segment_scores = self._score_segments(segments, vision_features)
         
         # Sort segments by score
         segment_scores.sort(key=lambda x: x[2], reverse=True)
         logger.info(f"Scored {len(segment_scores)} segments, top score: {segment_scores[0][2] if segment_scores else 0:.2f}")
         
-        # Generate multi-segment clips
+        if llm_verify_top is None:
+            llm_verify_top = int(os.getenv('COHERENCE_LLM_VERIFY_TOP', '0'))
+        
+        # Best non-overlapping coherent combinations, found in one search;
+        # spares replace any the optional LLM check rejects
+        combinations = self._find_segment_combinations(
+            segment_scores,
+            num_clips + llm_verify_top,
+            target_duration=target_duration,
+            coherence=get_coherence_scorer()
+        )
+        if llm_verify_top:
+            combinations = [
+                combo for i, combo in enumerate(combinations)
+                if i >= llm_verify_top or self._check_semantic_coherence(combo)
+            ]
+        combinations = combinations[:num_clips]
+        if len(combinations) < num_clips:
+            logger.warning(f"Found {len(combinations)} of {num_clips} segment combinations")
+        
         multi_clips = []
-        used_segments = set()  # Track which segments are already used
-        
-        for clip_idx in range(num_clips):
-            # Find combination of segments that work well together
-            # Returns (clip_segments, original_segments_used)
-            result = self._find_segment_combination(
-                segment_scores,
-                used_segments,
-                target_duration,
-                word_objs
-            )
-            
-            if not result:
-                logger.warning(f"Could not find segment combination for clip {clip_idx + 1}")
-                continue
-            
-            clip_segments, original_segments = result
-            
-            # Mark original segments as used BEFORE creating the clip
-            for seg, _, _ in original_segments:
-                used_segments.add((seg.start, seg.end))
-                logger.info(f"🔒 Marked segment as used: {seg.start:.2f}-{seg.end:.2f}")
-            
-            logger.info(f"📊 Total used segments: {len(used_segments)}")
+        for clip_idx, candidate_segments in enumerate(combinations):
+            clip_segments = self._create_clip_segments(candidate_segments)
             
             # Create multi-segment clip
             multi_clip = self._create_multi_segment_clip(
                 clip_segments,
-                word_objs
+                transcript
             )
             
             if multi_clip:
@@ -280,136 +566,119 @@ class RankerEngine:
         
         return multi_clips
     
-    def _find_segment_combination(
+    def _find_segment_combinations(
         self,
         segment_scores: List[Tuple[Segment, Dict, float]],
-        used_segments: set,
-        target_duration: float,
-        words: List[Word],
-    ) -> List[ClipSegment]:
-        """
-        Find the best combination of segments that:
-        1. Are not already used
-        2. Have high scores
-        3. Tell a coherent story
-        4. Sum to approximately target_duration
+        num_clips: int,
+        used_segments: Optional[set] = None,
+        beam_width: Optional[int] = None,
+        coherence: Optional[CoherenceScorer] = None,
+        target_duration: float = 45.0,
+    ) -> List[List[Tuple[Segment, Dict, float]]]:
         """
-        # Tolerance for duration - very permissive to ensure clips are found
-        # Smart Clips are about multi-segment stitching, not hitting exact duration
-        # Better to have clips of varying lengths than no clips at all
-        min_duration = 18.0  # Minimum 18s - shorter clips lack sufficient content
-        max_duration = 120.0  # Maximum to prevent overly long clips
-        
-        # Get top unused segments
-        available_segments = [
-            (seg, features, score)
-            for seg, features, score in segment_scores
-            if (seg.start, seg.end) not in used_segments
-        ]
+        Find the best non-overlapping segment combinations in one pass
+        
+        Beam search over segments in time order: for every segment and
+        segment count, keep the highest-scoring chains ending there, each
+        extended only from predecessors within the allowed gap range. Chain
+        score and duration are running totals, so extending is O(1).
+        Complete chains are ranked by _combination_rank (mean segment score,
+        penalized by distance from target_duration), so long chains don't
+        win just by summing more segments.
         
-        if not available_segments:
+        Args:
+            segment_scores: (segment, features, score) tuples in any order
+            num_clips: Number of combinations to return
+            used_segments: (start, end) of segments that may not be reused
+            beam_width: Chains kept per segment and count (COMBINATION_BEAM if None)
+            coherence: Skip chains whose segments are not semantically coherent
+            target_duration: Preferred total duration (seconds)
+            
+        Returns:
+            Up to num_clips combinations, best rank first, no segment
+            shared between them; each combination is in time order
+        """
+        used_segments = used_segments or set()
+        beam_width = beam_width or self.COMBINATION_BEAM
+        available = sorted(
+            (item for item in segment_scores if (item[0].start, item[0].end) not in used_segments),
+            key=lambda item: item[0].start
+        )
+        if not available:
             logger.warning("No available segments to combine")
             return []
         
-        logger.info(f"Searching through {len(available_segments)} available segments")
-        
-        # Strategy: ONLY use consecutive segments (simple and reliable)
-        # Consecutive segments are naturally coherent (same conversation)
-        # No AI needed - faster and more predictable
-        
-        # Try consecutive segments with flexible gap tolerance
-        for num_segments in [3, 2, 4]:
-            # Check top 40 segments for more opportunities
-            top_segments = available_segments[:min(40, len(available_segments))]
+        starts = [seg.start for seg, _, _ in available]
+        ends = [seg.end for seg, _, _ in available]
+        durations = [seg.duration for seg, _, _ in available]
+        scores = [score for _, _, score in available]
+        longest = max(durations)
+        max_count = self.COMBINATION_MAX_SEGMENTS
+        
+        # beams[j][k]: (total score, total duration, indices) of the best
+        # chains of k + 1 segments ending with segment j
+        beams: List[List[List[Tuple[float, float, Tuple[int, ...]]]]] = []
+        complete = []
+        for j, (start, duration, score) in enumerate(zip(starts, durations, scores)):
+            chains = [[] for _ in range(max_count)]
+            if duration <= self.COMBINATION_MAX_DURATION:
+                chains[0].append((score, duration, (j,)))
             
-            for i in range(len(top_segments) - num_segments + 1):
-                candidate_segments = top_segments[i:i + num_segments]
-                
-                # Check if consecutive in time (within 90s gaps for more flexibility)
-                segments_sorted = sorted(candidate_segments, key=lambda x: x[0].start)
-                is_consecutive = True
-                for j in range(len(segments_sorted) - 1):
-                    gap = segments_sorted[j + 1][0].start - segments_sorted[j][0].end
-                    # Increased from 60s to 90s for longer videos
-                    if gap > 90.0:
-                        is_consecutive = False
-                        break
-                
-                # If consecutive and valid duration, use it
-                if is_consecutive:
-                    total_dur = sum(seg.duration for seg, _, _ in candidate_segments)
-                    if self._is_valid_combination_fast(candidate_segments, min_duration, max_duration):
-                        logger.info(f"✅ Found {num_segments} consecutive segments (total: {total_dur:.1f}s, target: {min_duration:.1f}-{max_duration:.1f}s)")
-                        # Return both padded clip_segments AND original candidate_segments
-                        clip_segments = self._create_clip_segments(candidate_segments)
-                        return (clip_segments, candidate_segments)
-                    else:
-                        logger.debug(f"❌ Consecutive segments rejected - duration {total_dur:.1f}s outside range {min_duration:.1f}-{max_duration:.1f}s")
-        
-        logger.info("No consecutive segment combinations found")
-        return None
-    
-    def _is_valid_combination_fast(
-        self,
-        candidate_segments: List[Tuple],
-        min_duration: float,
-        max_duration: float
-    ) -> bool:
-        """Fast validation for consecutive segments (no AI check)"""
-        # Calculate total duration
-        total_duration = sum(seg.duration for seg, _, _ in candidate_segments)
-        
-        # Check if duration is acceptable
-        if not (min_duration <= total_duration <= max_duration):
-            return False
-        
-        # Sort segments by time
-        segments_sorted = sorted(candidate_segments, key=lambda x: x[0].start)
-        
-        # Check gaps between segments
-        for j in range(len(segments_sorted) - 1):
-            gap = segments_sorted[j + 1][0].start - segments_sorted[j][0].end
+            # Predecessors end between MAX_GAP and MIN_GAP before this start
+            lo = bisect.bisect_left(starts, start - self.COMBINATION_MAX_GAP - longest)
+            hi = bisect.bisect_right(starts, start - self.COMBINATION_MIN_GAP, 0, j)
+            for i in range(lo, hi):
+                gap = start - ends[i]
+                if not (self.COMBINATION_MIN_GAP <= gap <= self.COMBINATION_MAX_GAP):
+                    continue
+                for k in range(1, max_count):
+                    for total, total_duration, indices in beams[i][k - 1]:
+                        if total_duration + duration <= self.COMBINATION_MAX_DURATION:
+                            chains[k].append((total + score, total_duration + duration, indices + (j,)))
             
-            # Segments must be at least 3s apart (avoid overlap)
-            if gap < 3.0:
-                return False
-        
-        return True
+            for k in range(1, max_count):
+                if len(chains[k]) > beam_width:
+                    chains[k] = heapq.nlargest(beam_width, chains[k], key=lambda chain: chain[0])
+                complete.extend(
+                    chain for chain in chains[k]
+                    if chain[1] >= self.COMBINATION_MIN_DURATION
+                )
+            beams.append(chains)
+        
+        # Greedily take the best coherent chains that share no segment
+        complete.sort(key=lambda chain: (
+            -self._combination_rank(chain[0], len(chain[2]), chain[1], target_duration),
+            chain[2]
+        ))
+        combinations = []
+        taken = set()
+        for total, total_duration, indices in complete:
+            if taken.intersection(indices):
+                continue
+            if coherence is not None and not coherence.is_coherent(
+                [available[i][0].text for i in indices]
+            ):
+                continue
+            taken.update(indices)
+            combinations.append([available[i] for i in indices])
+            logger.info(f"✅ Found {len(indices)} segments (total: {total_duration:.1f}s, mean score: {total / len(indices):.2f})")
+            if len(combinations) == num_clips:
+                break
+        return combinations
     
-    def _is_valid_combination(
+    def _combination_rank(
         self,
-        candidate_segments: List[Tuple],
-        min_duration: float,
-        max_duration: float
-    ) -> bool:
-        """Check if a segment combination is valid and coherent (with AI check)"""
-        # Calculate total duration
-        total_duration = sum(seg.duration for seg, _, _ in candidate_segments)
-        
-        # Check if duration is acceptable
-        if not (min_duration <= total_duration <= max_duration):
-            return False
-        
-        # Sort segments by time
-        segments_sorted = sorted(candidate_segments, key=lambda x: x[0].start)
-        
-        # Check gaps between segments
-        for j in range(len(segments_sorted) - 1):
-            gap = segments_sorted[j + 1][0].start - segments_sorted[j][0].end
-            
-            # Segments must be at least 3s apart (avoid overlap)
-            if gap < 3.0:
-                return False
-        
-        # Use AI to check semantic coherence
-        # This allows segments from different parts of video if topically related
-        if not self._check_semantic_coherence(segments_sorted):
-            return False
-        
-        return True
+        total_score: float,
+        count: int,
+        duration: float,
+        target_duration: float,
+    ) -> float:
+        """Rank of a chain: mean segment score, discounted by distance from the target duration"""
+        distance = abs(duration - target_duration) / target_duration
+        return (total_score / count) / (1 + self.COMBINATION_DURATION_PENALTY * distance)
     
     def _check_semantic_coherence(self, segments_sorted: List[Tuple]) -> bool:
-        """Use OpenAI to check if segments form a coherent story"""
+        """Use OpenAI to check if segments form a coherent story (final verification only)"""
         import os
         
         api_key = os.getenv('OPENAI_API_KEY')
@@ -487,7 +756,7 @@ class RankerEngine:
     def _create_multi_segment_clip(
         self,
         clip_segments: List[ClipSegment],
-        words: List[Word],
+        words: Transcript,
     ) -> Optional[MultiSegmentClip]:
         """Create a MultiSegmentClip from segments"""
         if not clip_segments:
@@ -522,158 +791,87 @@ class RankerEngine:
     
     def _build_segments(
         self,
-        words: List[Word],
+        words: Union[Transcript, List[Word]],
         diarization: List[Dict]
     ) -> List[Segment]:
         """Build segments from words (sentence-like units)"""
-        if not words:
-            return []
-        
-        segments = []
-        current_segment_words = []
-        current_start = words[0].start
-        
-        for word in words:
-            current_segment_words.append(word)
-            
-            # End segment on punctuation or speaker change
-            if word.text.endswith(('.', '!', '?')) or len(current_segment_words) > 20:
-                segment_text = ' '.join(w.text for w in current_segment_words)
-                segment_end = current_segment_words[-1].end
-                
-                # Get speaker from diarization
-                speaker = self._get_speaker_at_time(
-                    (current_start + segment_end) / 2,
-                    diarization
-                )
-                
-                # Add small padding to avoid cutting words (100ms before, 100ms after)
-                padded_start = max(0, current_start - 0.1)
-                padded_end = segment_end + 0.1
-                
-                segments.append(Segment(
-                    start=padded_start,
-                    end=padded_end,
-                    text=segment_text,
-                    speaker=speaker
-                ))
-                
-                current_segment_words = []
-                current_start = word.end
-        
-        # Add remaining words as final segment
-        if current_segment_words:
-            segment_text = ' '.join(w.text for w in current_segment_words)
-            segment_end = current_segment_words[-1].end
-            speaker = self._get_speaker_at_time(
-                (current_start + segment_end) / 2,
-                diarization
-            )
-            
-            # Add small padding to avoid cutting words
-            padded_start = max(0, current_start - 0.1)
-            padded_end = segment_end + 0.1
-            
-            segments.append(Segment(
-                start=padded_start,
-                end=padded_end,
-                text=segment_text,
-                speaker=speaker
-            ))
-        
-        return segments
+        return SegmentBuilder(self, diarization).build(as_transcript(words))
+    
+    def _score_segments(
+        self,
+        segments: List[Segment],
+        vision_features: Optional[Dict] = None,
+        index: Optional[TranscriptIndex] = None,
+    ) -> List[Tuple[Segment, Dict, float]]:
+        """Score all segments at once: one feature matrix, one matrix-vector product"""
+        if index is None:
+            # Token statistics indexed once per transcript
+            index = TranscriptIndex.from_segments(segments)
+        matrix = self.feature_extractor.extract(segments, index, vision_features)
+        return self._segment_scores(segments, matrix)
+    
+    def _segment_scores(
+        self,
+        segments: List[Segment],
+        matrix: np.ndarray
+    ) -> List[Tuple[Segment, Dict, float]]:
+        """Weighted scores for a feature matrix, paired with segments and feature dicts"""
+        scores = self._compute_scores(matrix)
+        return [
+            (segment, dict(zip(FEATURE_NAMES, row)), score)
+            for segment, row, score in zip(segments, matrix.tolist(), scores.tolist())
+        ]
     
     def _extract_features(
         self,
         segment: Segment,
-        all_words: List[Word],
+        all_words: Union[Transcript, List[Word]],
         audio_features: Optional[Dict],
         vision_features: Optional[Dict],
-        all_segments: List[Segment]
+        all_segments: List[Segment],
+        index: Optional[TranscriptIndex] = None
     ) -> Dict[str, float]:
         """Extract feature scores for a segment"""
-        features = {
-            'hook': self._score_hook(segment.text),
-            'novelty': self._score_novelty(segment.text, all_segments),
-            'structure': self._score_structure(segment.text),
-            'emotion': self._score_emotion(segment.text),
-            'clarity': self._score_clarity(segment.text),
-            'quote': self._score_quote(segment.text),
-            'vision_focus': self._score_vision(segment, vision_features)
-        }
-        return features
+        if index is None:
+            index = TranscriptIndex.from_segments(all_segments)
+        row = self.feature_extractor.extract([segment], index, vision_features)[0]
+        return dict(zip(FEATURE_NAMES, row.tolist()))
+    
+    def _text_feature(self, text: str, name: str) -> float:
+        return float(self.feature_extractor.text_features([text])[name][0])
     
     def _score_hook(self, text: str) -> float:
         """Score hook phrases (0-1)"""
-        text_lower = text.lower()
-        matches = sum(1 for pattern in self.hook_patterns if pattern.search(text_lower))
-        return min(matches * 0.3, 1.0)
+        return self._text_feature(text, 'hook')
     
-    def _score_novelty(self, text: str, all_segments: List[Segment]) -> float:
-        """Score novelty using inverse document frequency"""
-        # Simple heuristic: unique words / total words
-        words = set(text.lower().split())
-        all_words = set()
-        for seg in all_segments:
-            all_words.update(seg.text.lower().split())
-        
-        if not all_words:
-            return 0.5
-        
-        uniqueness = len(words) / len(all_words)
-        return min(uniqueness, 1.0)
+    def _score_novelty(
+        self,
+        text: str,
+        all_segments: List[Segment],
+        index: Optional[TranscriptIndex] = None
+    ) -> float:
+        """Score novelty using BM25-weighted inverse document frequency"""
+        # Callers scoring many segments pass a shared index; building one
+        # per call would make ranking quadratic in transcript length
+        if index is None:
+            index = TranscriptIndex.from_segments(all_segments)
+        return index.novelty(text)
     
     def _score_structure(self, text: str) -> float:
         """Score structure (Q&A, lists, etc.)"""
-        score = 0.0
-        
-        # Question-answer pattern
-        has_question = any(p.search(text) for p in self.question_patterns)
-        if has_question:
-            score += 0.5
-        
-        # List markers
-        if any(marker in text.lower() for marker in ['first', 'second', 'third', 'finally']):
-            score += 0.3
-        
-        return min(score, 1.0)
+        return self._text_feature(text, 'structure')
     
     def _score_emotion(self, text: str) -> float:
         """Score emotional language"""
-        emotion_words = [
-            'love', 'hate', 'amazing', 'terrible', 'beautiful', 'ugly',
-            'happy', 'sad', 'excited', 'angry', 'shocked', 'surprised'
-        ]
-        text_lower = text.lower()
-        matches = sum(1 for word in emotion_words if word in text_lower)
-        return min(matches * 0.2, 1.0)
+        return self._text_feature(text, 'emotion')
     
     def _score_clarity(self, text: str) -> float:
         """Score clarity (inverse of filler words)"""
-        text_lower = text.lower()
-        filler_count = sum(1 for word in self.FILLER_WORDS if word in text_lower)
-        word_count = len(text.split())
-        
-        if word_count == 0:
-            return 0.5
-        
-        filler_ratio = filler_count / word_count
-        clarity = 1.0 - min(filler_ratio, 1.0)
-        return clarity
+        return self._text_feature(text, 'clarity')
     
     def _score_quote(self, text: str) -> float:
-        """Score quotable/memorable phrases"""
-        # Short, punchy sentences are more quotable
-        sentences = text.split('.')
-        avg_length = sum(len(s.split()) for s in sentences) / len(sentences) if sentences else 0
-        
-        # Optimal length: 5-15 words
-        if 5 <= avg_length <= 15:
-            return 0.8
-        elif 3 <= avg_length <= 20:
-            return 0.5
-        else:
-            return 0.2
+        """Score quotable/memorable phrases (short, punchy sentences)"""
+        return self._text_feature(text, 'quote')
     
     def _score_vision(self, segment: Segment, vision_features: Optional[Dict]) -> float:
         """Score vision focus (speaker changes, faces, etc.)"""
@@ -684,69 +882,77 @@ class RankerEngine:
     
     def _compute_score(self, features: Dict[str, float]) -> float:
         """Compute final score using weighted formula"""
-        weights = {
-            'hook': 0.28,
-            'novelty': 0.16,
-            'structure': 0.14,
-            'emotion': 0.14,
-            'clarity': 0.12,
-            'quote': 0.10,
-            'vision_focus': 0.06
-        }
-        
-        score = sum(features.get(k, 0) * v for k, v in weights.items())
+        vector = np.array([[features.get(name, 0) for name in FEATURE_NAMES]])
+        return float(self._compute_scores(vector)[0])
+    
+    def _compute_scores(self, matrix: np.ndarray) -> np.ndarray:
+        """Compute final scores for a (segments x features) matrix"""
+        scores = matrix @ self.weight_vector
         
         # Apply "kinder scoring" multiplier to be more encouraging
         # This ensures most clips show above 75% to encourage exports
         # Formula: score = 0.75 + (score * 0.25)
         # This maps: 0.0 -> 0.75, 0.5 -> 0.875, 1.0 -> 1.0
-        score = 0.75 + (score * 0.25)
+        scores = 0.75 + (scores * 0.25)
         
-        return min(score, 1.0)
+        return np.minimum(scores, 1.0)
     
     def _find_seed_points(
         self,
         segment_scores: List[Tuple[Segment, Dict, float]],
         num_seeds: int
-    ) -> List[Tuple[Segment, Dict, float]]:
-        """Find high-scoring seed points for clip expansion"""
-        # Sort by score
-        sorted_segments = sorted(segment_scores, key=lambda x: x[2], reverse=True)
+    ) -> List[int]:
+        """
+        Find high-scoring seed points for clip expansion
+        
+        Returns:
+            Indices into segment_scores, best first
+        """
+        # Max-heap of (-score, index): pops in score order, ties in time
+        # order, without sorting every segment
+        heap = [(-score, index) for index, (_, _, score) in enumerate(segment_scores)]
+        heapq.heapify(heap)
         
         # Take top N, but spread them out temporally
         seeds = []
-        min_gap = 30  # Minimum 30 seconds between seeds
+        seed_starts = []  # accepted seed starts, sorted
         
-        for segment, features, score in sorted_segments:
-            # Check if too close to existing seeds
-            too_close = any(
-                abs(segment.start - seed[0].start) < min_gap
-                for seed in seeds
-            )
+        while heap and len(seeds) < num_seeds:
+            _, index = heapq.heappop(heap)
+            start = segment_scores[index][0].start
             
-            if not too_close:
-                seeds.append((segment, features, score))
-                if len(seeds) >= num_seeds:
-                    break
+            # Only the nearest accepted seeds on either side can be too close
+            pos = bisect.bisect_left(seed_starts, start)
+            if pos < len(seed_starts) and seed_starts[pos] - start < self.MIN_SEED_GAP:
+                continue
+            if pos > 0 and start - seed_starts[pos - 1] < self.MIN_SEED_GAP:
+                continue
+            
+            seed_starts.insert(pos, start)
+            seeds.append(index)
         
         return seeds
     
     def _expand_to_clip(
         self,
         seed: Segment,
-        words: List[Word],
+        words: Union[Transcript, List[Word]],
         segments: List[Segment],
         features: Dict[str, float],
-        score: float
+        score: float,
+        cut_index: Optional[CutPointIndex] = None,
+        seed_index: Optional[int] = None
     ) -> Optional[ClipScore]:
         """Expand seed segment to full clip with intelligent boundaries"""
+        transcript = as_transcript(words)
         # Target duration is the midpoint between min and max
         target_duration = (self.min_clip_duration + self.max_clip_duration) / 2
         
         # Start with seed
         clip_start = seed.start
         clip_end = seed.end
-        seed_index = segments.index(seed)
+        if seed_index is None:
+            seed_index = segments.index(seed)
         
         # Calculate how much we need to expand
         current_duration = clip_end - clip_start
@@ -787,15 +993,15 @@ class RankerEngine:
         if duration < self.min_clip_duration or duration > self.max_clip_duration:
             return None
         
-        # Snap to silence (placeholder)
-        clip_start = self._snap_to_silence(clip_start, words)
-        clip_end = self._snap_to_silence(clip_end, words)
+        # Snap to natural pauses
+        if cut_index is None:
+            cut_index = CutPointIndex.from_transcript(transcript)
+        clip_start = self._snap_to_silence(clip_start, transcript, cut_index)
+        clip_end = self._snap_to_silence(clip_end, transcript, cut_index)
         
         # Get clip text and track segments used
-        clip_text = ' '.join(
-            w.text for w in words
-            if clip_start <= w.start < clip_end
-        )
+        in_clip = (transcript.starts >= clip_start) & (transcript.starts < clip_end)
+        clip_text = transcript.select(in_clip).join()
         
         # Track which segments are included in this clip
         segments_used = []
@@ -831,83 +1037,30 @@ class RankerEngine:
             text=clip_text
         )
     
-    def _snap_to_silence(self, time: float, words: List[Word]) -> float:
+    def _snap_to_silence(
+        self,
+        time: float,
+        words: Union[Transcript, List[Word]],
+        cut_index: Optional[CutPointIndex] = None
+    ) -> float:
         """Snap time to nearest natural pause (silence, sentence end, breath)"""
-        # Find all potential cut points with quality scores
-        cut_points = []
-        
-        for i in range(len(words) - 1):
-            gap_start = words[i].end
-            gap_end = words[i + 1].start
-            gap_duration = gap_end - gap_start
-            
-            # Only consider gaps of at least 150ms
-            if gap_duration < 0.15:
-                continue
-            
-            # Calculate quality score for this cut point
-            quality = 0
-            
-            # Longer gaps are better (natural pauses)
-            if gap_duration > 0.5:
-                quality += 10  # Long pause (breath, sentence end)
-            elif gap_duration > 0.3:
-                quality += 7   # Medium pause
-            elif gap_duration > 0.2:
-                quality += 4   # Short pause
-            else:
-                quality += 1   # Minimal pause
-            
-            # Check if previous word ends with punctuation (sentence boundary)
-            prev_word_text = words[i].text.strip()
-            if prev_word_text.endswith(('.', '!', '?')):
-                quality += 15  # Strong sentence boundary
-            elif prev_word_text.endswith((',', ';', ':')):
-                quality += 8   # Clause boundary
-            
-            # Check if next word starts with capital (sentence start)
-            next_word_text = words[i + 1].text.strip()
-            if next_word_text and next_word_text[0].isupper():
-                quality += 5
-            
-            # Avoid cutting between articles and nouns, prepositions, etc.
-            weak_cut_words = ['the', 'a', 'an', 'to', 'of', 'in', 'on', 'at', 'for', 'with']
-            if prev_word_text.lower() in weak_cut_words or next_word_text.lower() in weak_cut_words:
-                quality -= 5
-            
-            cut_points.append({
-                'time': gap_start,
-                'duration': gap_duration,
-                'quality': quality,
-                'distance': abs(gap_start - time)
-            })
-        
-        if not cut_points:
-            return time
-        
-        # Find best cut point within 2 seconds of target time
-        nearby_cuts = [cp for cp in cut_points if cp['distance'] <= 2.0]
-        
-        if not nearby_cuts:
-            # If no cuts within 2s, just use closest
-            return min(cut_points, key=lambda cp: cp['distance'])['time']
-        
-        # Score each cut point: balance quality vs distance
-        for cp in nearby_cuts:
-            # Prefer closer cuts, but quality matters more
-            distance_penalty = cp['distance'] * 3  # 3 points per second away
-            cp['final_score'] = cp['quality'] - distance_penalty
-        
-        # Return the best cut point
-        best_cut = max(nearby_cuts, key=lambda cp: cp['final_score'])
-        return best_cut['time']
-    
-    def _get_speaker_at_time(self, time: float, diarization: List[Dict]) -> Optional[str]:
+        # Callers snapping many boundaries pass an index built once per
+        # transcript instead of rescanning every word
+        if cut_index is None:
+            cut_index = CutPointIndex.from_words(words)
+        return cut_index.snap(time)
+    
+    def _get_speaker_at_time(
+        self,
+        time: float,
+        diarization: List[Dict],
+        speakers: Optional[SpeakerIndex] = None
+    ) -> Optional[str]:
         """Get speaker at given time from diarization"""
-        for dia in diarization:
-            if dia.get('start', 0) <= time <= dia.get('end', 0):
-                return dia.get('speaker')
-        return None
+        # Callers looking up many times pass an index built once
+        if speakers is None:
+            speakers = SpeakerIndex(diarization)
+        return speakers.speaker_at(time)
     
     def _generate_reason(self, features: Dict[str, float]) -> str:
         """Generate human-readable reason for clip"""
@@ -2,13 +2,19 @@
 FFmpeg Render Pipeline - Video composition with styling, captions, and reframing
 """
 
+import bisect
+import json
 import subprocess
 import logging
 import os
-from typing import Optional, Dict, Tuple
+import shutil
+import tempfile
+from typing import Optional, Dict, List, Tuple
 from enum import Enum
 from dataclasses import dataclass
 
+from services.loudness import LoudnessMeasurement, loudnorm_filter, parse_loudnorm_output
+
 logger = logging.getLogger(__name__)
 
 
@@ -31,6 +37,172 @@ class RenderConfig:
     preset: str = "medium"  # ultrafast, superfast, veryfast, faster, fast, medium, slow, slower, veryslow
 
 
+@dataclass(frozen=True)
+class EncodeProfile:
+    """
+    Named x264 speed/quality tier
+    
+    Every encode in the pipeline takes its video settings from a profile,
+    so an export can trade encode time for quality in one place.
+    """
+    name: str
+    preset: str
+    crf: int
+    tune: Optional[str] = None
+    threads: int = 0             # 0 lets x264 pick (all cores)
+    gop: Optional[int] = None    # keyframe interval in frames (None: x264 default)
+
+    def video_args(self) -> List[str]:
+        """ffmpeg output options for the video stream"""
+        args = ["-c:v", "libx264", "-preset", self.preset, "-crf", str(self.crf)]
+        if self.tune:
+            args += ["-tune", self.tune]
+        if self.threads:
+            args += ["-threads", str(self.threads)]
+        if self.gop:
+            args += ["-g", str(self.gop)]
+        return args
+
+
+ENCODE_PROFILES = {
+    # Fast turnaround for previews; visibly softer
+    "draft": EncodeProfile("draft", preset="veryfast", crf=28, gop=60),
+    # Default export quality (2s GOP at 30fps for web players)
+    "standard": EncodeProfile("standard", preset="fast", crf=23, gop=60),
+    # Near-transparent masters; several times slower than standard
+    "archival": EncodeProfile("archival", preset="slow", crf=18, tune="film"),
+}
+ENCODE_PROFILE_ALIASES = {"preview": "draft"}
+DEFAULT_ENCODE_PROFILE = ENCODE_PROFILES["standard"]
+
+
+def get_encode_profile(name: Optional[str]) -> EncodeProfile:
+    """
+    Look up an encode profile by name (or alias)
+    
+    Raises:
+        ValueError: Unknown profile name
+    """
+    if not name:
+        return DEFAULT_ENCODE_PROFILE
+    key = ENCODE_PROFILE_ALIASES.get(name.lower(), name.lower())
+    if key not in ENCODE_PROFILES:
+        raise ValueError(f"Unknown encode profile: {name}")
+    return ENCODE_PROFILES[key]
+
+
+@dataclass
+class RenderPlan:
+    """
+    Single-pass render plan
+
+    Describes everything the export path does to a clip (trim, crop/pad,
+    loudnorm, caption burn-in, watermark) so it can be compiled into one
+    ffmpeg invocation with a single encode.
+    """
+    input_file: str
+    output_file: str
+    start: float
+    end: float
+    aspect_ratio: AspectRatio = AspectRatio.VERTICAL
+    subtitle_file: Optional[str] = None
+    subtitle_format: str = "ass"
+    watermark_file: Optional[str] = None
+    watermark_position: str = "bottom-right"
+    watermark_opacity: float = 0.7
+    normalize_audio: bool = True
+    target_loudness: float = -16.0
+    loudness: Optional[LoudnessMeasurement] = None  # First-pass measurement (linear loudnorm)
+    cut_mode: str = "encode"  # "encode" or "smart" (see CUT_MODES)
+    encode_profile: EncodeProfile = DEFAULT_ENCODE_PROFILE
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+@dataclass
+class RenderOutput:
+    """One output of a multi-output render: its own file and framing"""
+    output_file: str
+    aspect_ratio: AspectRatio
+
+
+# ffmpeg http(s) input options: seekable range requests instead of a full
+# download, with reconnects so long presigned reads survive network blips
+REMOTE_INPUT_OPTIONS = [
+    "-seekable", "1",
+    "-reconnect", "1",
+    "-reconnect_on_network_error", "1",
+    "-reconnect_delay_max", "5",
+    "-rw_timeout", "30000000",  # microseconds
+]
+
+
+def is_remote_input(input_file: str) -> bool:
+    """Check whether an input is an http(s) URL rather than a local path"""
+    return input_file.startswith(("http://", "https://"))
+
+
+# Clip cutting modes: "encode" re-encodes the whole range (frame-accurate,
+# any codec); "smart" stream-copies whole GOPs and re-encodes only the edges
+CUT_MODES = ("encode", "smart")
+
+# Keyframe runs shorter than this are not worth splitting a segment for
+MIN_COPY_DURATION = 1.0
+# Edges shorter than this (under a frame) are dropped instead of encoded
+KEYFRAME_TOLERANCE = 0.02
+
+
+@dataclass
+class StitchPart:
+    """Piece of a stitched segment: a re-encoded edge or a stream-copied GOP run"""
+    start: float
+    end: float
+    copy: bool
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+def smart_cut_parts(
+    start: float,
+    end: float,
+    keyframes: List[float],
+    allow_copy: bool = True,
+) -> List[StitchPart]:
+    """
+    Split a segment at its first and last keyframes
+
+    Whole GOPs between them are stream-copied; only the partial GOPs at
+    the edges are re-encoded. Segments without a long enough keyframe run
+    (or sources that can't be copied) are re-encoded whole.
+
+    Args:
+        start: Segment start in the source (seconds)
+        end: Segment end in the source (seconds)
+        keyframes: Sorted source keyframe times
+        allow_copy: Whether the source codec can be stream-copied
+
+    Returns:
+        Parts in time order, covering [start, end]
+    """
+    first = bisect.bisect_left(keyframes, start)
+    last = bisect.bisect_right(keyframes, end) - 1
+    if not allow_copy or first > last or keyframes[last] - keyframes[first] < MIN_COPY_DURATION:
+        return [StitchPart(start, end, copy=False)]
+
+    copy_start, copy_end = keyframes[first], keyframes[last]
+    parts = []
+    if copy_start - start > KEYFRAME_TOLERANCE:
+        parts.append(StitchPart(start, copy_start, copy=False))
+    parts.append(StitchPart(copy_start, copy_end, copy=True))
+    if end - copy_end > KEYFRAME_TOLERANCE:
+        parts.append(StitchPart(copy_end, end, copy=False))
+    return parts
+
+
 class RenderPipeline:
     """FFmpeg-based video rendering pipeline"""
 
@@ -48,27 +220,44 @@ class RenderPipeline:
         output_file: str,
         start: float,
         end: float,
+        mode: str = "encode",
+        profile: EncodeProfile = DEFAULT_ENCODE_PROFILE,
     ) -> bool:
         """
         Extract clip from source video
         
+        Seeks on the input side, so only the GOP before the start is
+        decoded instead of the whole source up to it.
+        
         Args:
             input_file: Source video path
             output_file: Output clip path
             start: Start time in seconds
             end: End time in seconds
+            mode: "encode" to re-encode the range, "smart" to stream-copy
+                whole GOPs and re-encode only the partial head/tail GOP
+            profile: Encode settings for the re-encoded frames
             
         Returns:
             True if successful
         """
+        if mode not in CUT_MODES:
+            raise ValueError(f"Unknown cut mode: {mode}")
+        if mode == "smart":
+            work_dir = os.path.dirname(os.path.abspath(output_file))
+            if self.stitch_segments(input_file, output_file, [(start, end)], work_dir, profile):
+                return True
+            logger.warning("Smart cut failed, re-encoding the clip")
+        
         try:
             duration = end - start
             cmd = [
                 "ffmpeg",
-                "-i", input_file,
+                *self._input_options(input_file),
                 "-ss", str(start),
                 "-t", str(duration),
-                "-c:v", "libx264",
+                "-i", input_file,
+                *profile.video_args(),
                 "-c:a", "aac",
                 "-y", output_file
             ]
@@ -87,6 +276,7 @@ class RenderPipeline:
         output_file: str,
         aspect_ratio: AspectRatio = AspectRatio.VERTICAL,
         use_face_detection: bool = True,
+        profile: EncodeProfile = DEFAULT_ENCODE_PROFILE,
     ) -> bool:
         """
         Reframe video to target aspect ratio with smart cropping
@@ -101,6 +291,7 @@ class RenderPipeline:
             output_file: Output video path
             aspect_ratio: Target aspect ratio
             use_face_detection: Use face-aware cropping
+            profile: Encode settings
             
         Returns:
             True if successful
@@ -112,33 +303,16 @@ class RenderPipeline:
             source_width, source_height = self._probe_dimensions(input_file)
             logger.info(f"Source: {source_width}x{source_height}, Target: {target_width}x{target_height}")
             
-            # Determine crop strategy
-            use_crop = self._should_use_crop(
+            filter_str = self._build_reframe_filter(
                 source_width, source_height,
                 target_width, target_height
             )
-            
-            if use_crop:
-                # CROP strategy: scale to cover, then crop to exact target
-                logger.info("Using CROP strategy (scale to cover + crop)")
-                filter_str = self._build_crop_filter(
-                    source_width, source_height,
-                    target_width, target_height
-                )
-            else:
-                # PAD strategy: scale to fit, then pad to target
-                logger.info("Using PAD strategy (scale to fit + pad)")
-                filter_str = self._build_pad_filter(
-                    target_width, target_height
-                )
 
             cmd = [
                 "ffmpeg",
                 "-i", input_file,
                 "-vf", filter_str,
-                "-c:v", "libx264",
-                "-preset", "fast",
-                "-crf", "23",
+                *profile.video_args(),
                 "-c:a", "copy",  # Copy audio without re-encoding
                 "-fps_mode", "vfr",  # Variable frame rate
                 "-y", output_file
@@ -158,6 +332,7 @@ class RenderPipeline:
             cmd = [
                 "ffprobe",
                 "-v", "error",
+                *self._input_options(input_file),
                 "-select_streams", "v:0",
                 "-show_entries", "stream=width,height",
                 "-of", "csv=p=0",
@@ -201,6 +376,31 @@ class RenderPipeline:
         # Use crop if content loss is acceptable (< 30%)
         return content_loss < 0.3
 
+    def _build_reframe_filter(
+        self,
+        source_width: int,
+        source_height: int,
+        target_width: int,
+        target_height: int
+    ) -> str:
+        """Build the crop or pad filter chain for the target dimensions"""
+        use_crop = self._should_use_crop(
+            source_width, source_height,
+            target_width, target_height
+        )
+        
+        if use_crop:
+            # CROP strategy: scale to cover, then crop to exact target
+            logger.info("Using CROP strategy (scale to cover + crop)")
+            return self._build_crop_filter(
+                source_width, source_height,
+                target_width, target_height
+            )
+        
+        # PAD strategy: scale to fit, then pad to target
+        logger.info("Using PAD strategy (scale to fit + pad)")
+        return self._build_pad_filter(target_width, target_height)
+
     def _build_crop_filter(
         self,
         source_width: int,
@@ -255,6 +455,7 @@ class RenderPipeline:
         output_file: str,
         subtitle_file: str,
         subtitle_format: str = "srt",
+        profile: EncodeProfile = DEFAULT_ENCODE_PROFILE,
     ) -> bool:
         """
         Add captions to video
@@ -264,25 +465,25 @@ class RenderPipeline:
             output_file: Output video path
             subtitle_file: Subtitle file path (SRT/VTT/ASS)
             subtitle_format: Subtitle format
+            profile: Encode settings
             
         Returns:
             True if successful
         """
         try:
             # Use ASS for better styling support
+            subtitle_path = self._escape_filter_path(subtitle_file)
             if subtitle_format == "ass":
-                filter_str = f"ass={subtitle_file}"
+                filter_str = f"ass={subtitle_path}"
             else:
                 # Convert SRT/VTT to ASS for better rendering
-                filter_str = f"subtitles={subtitle_file}"
+                filter_str = f"subtitles={subtitle_path}"
 
             cmd = [
                 "ffmpeg",
                 "-i", input_file,
                 "-vf", filter_str,
-                "-c:v", "libx264",
-                "-preset", "medium",
-                "-crf", "23",
+                *profile.video_args(),
                 "-c:a", "aac",
                 "-y", output_file
             ]
@@ -300,6 +501,7 @@ class RenderPipeline:
         input_file: str,
         output_file: str,
         target_loudness: float = -16.0,
+        measurement: Optional[LoudnessMeasurement] = None,
     ) -> bool:
         """
         Normalize audio loudness
@@ -308,13 +510,16 @@ class RenderPipeline:
             input_file: Source video path
             output_file: Output video path
             target_loudness: Target loudness in LUFS
+            measurement: First-pass measurement (linear mode); measured here if None
             
         Returns:
             True if successful
         """
         try:
-            # Use loudnorm filter for normalization
-            filter_str = f"loudnorm=I={target_loudness}:TP=-1.5:LRA=11"
+            if measurement is None:
+                measurement = self.measure_loudness(input_file, target_loudness=target_loudness)
+            # Linear loudnorm with the measured values; dynamic if analysis failed
+            filter_str = loudnorm_filter(target_loudness, measurement)
 
             cmd = [
                 "ffmpeg",
@@ -333,6 +538,59 @@ class RenderPipeline:
             logger.error(f"Audio normalization failed: {e.stderr.decode()}")
             return False
 
+    def measure_loudness(
+        self,
+        input_file: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        target_loudness: float = -16.0,
+    ) -> Optional[LoudnessMeasurement]:
+        """
+        Loudness analysis pass (first pass of two-pass loudnorm)
+        
+        Decodes audio only. Without start/end the whole input is measured.
+        
+        Args:
+            input_file: Source video path or URL
+            start: Range start in seconds
+            end: Range end in seconds
+            target_loudness: Target loudness in LUFS (sets the measured offset)
+            
+        Returns:
+            LoudnessMeasurement, or None if the analysis failed
+        """
+        seek = []
+        if start is not None:
+            seek += ["-ss", str(start)]
+        if end is not None:
+            seek += ["-t", str(end - (start or 0.0))]
+        cmd = [
+            "ffmpeg",
+            "-hide_banner",
+            *self._input_options(input_file),
+            *seek,
+            "-i", input_file,
+            "-vn", "-sn", "-dn",
+            "-af", loudnorm_filter(target_loudness, analyze=True),
+            "-f", "null",
+            "-"
+        ]
+        try:
+            logger.info(f"Measuring loudness of {input_file}")
+            result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+        except subprocess.CalledProcessError as e:
+            logger.error(f"Loudness analysis failed: {(e.stderr or '')[-500:]}")
+            return None
+        measurement = parse_loudnorm_output(result.stderr)
+        if measurement is None:
+            logger.warning("Loudness analysis printed no usable measurement")
+        else:
+            logger.info(
+                f"Measured {measurement.input_i} LUFS, {measurement.input_tp} dBTP, "
+                f"LRA {measurement.input_lra}"
+            )
+        return measurement
+
     def add_watermark(
         self,
         input_file: str,
@@ -340,6 +598,7 @@ class RenderPipeline:
         watermark_file: str,
         position: str = "bottom-right",
         opacity: float = 0.7,
+        profile: EncodeProfile = DEFAULT_ENCODE_PROFILE,
     ) -> bool:
         """
         Add watermark/logo to video
@@ -350,6 +609,7 @@ class RenderPipeline:
             watermark_file: Watermark image path
             position: Watermark position (top-left, top-right, bottom-left, bottom-right)
             opacity: Watermark opacity (0-1)
+            profile: Encode settings
             
         Returns:
             True if successful
@@ -373,9 +633,7 @@ class RenderPipeline:
                 "-i", input_file,
                 "-i", watermark_file,
                 "-filter_complex", filter_str,
-                "-c:v", "libx264",
-                "-preset", "medium",
-                "-crf", "23",
+                *profile.video_args(),
                 "-c:a", "aac",
                 "-y", output_file
             ]
@@ -425,31 +683,204 @@ class RenderPipeline:
                 )
                 return True
 
-            # Create concat demuxer file
-            concat_file = "/tmp/concat.txt"
-            with open(concat_file, "w") as f:
-                for file in files:
-                    f.write(f"file '{file}'\n")
+            logger.info(f"Concatenating {len(files)} video segments")
+            self._concat(files, output_file)
+            logger.info(f"Intro/outro added: {output_file}")
+            return True
+        except subprocess.CalledProcessError as e:
+            logger.error(f"Intro/outro addition failed: {e.stderr.decode()}")
+            return False
+
+    def stitch_segments(
+        self,
+        input_file: str,
+        output_file: str,
+        segments: List[Tuple[float, float]],
+        work_dir: Optional[str] = None,
+        profile: EncodeProfile = DEFAULT_ENCODE_PROFILE,
+    ) -> bool:
+        """
+        Join source segments end to end (Pro Clips) with minimal encoding
+        
+        Each segment is cut at its keyframes: whole GOPs are stream-copied
+        and only the partial GOPs at the edges are re-encoded. All parts
+        are written as MPEG-TS (in-band codec headers, so copied and
+        re-encoded parts can be mixed) and joined with a concat stream copy.
+        
+        Args:
+            input_file: Source video path or URL
+            output_file: Stitched output path (.ts, or .mp4 to remux)
+            segments: (start, end) source ranges in clip order
+            work_dir: Parent of the private parts directory (system temp if None)
+            profile: Encode settings for the re-encoded edges
+            
+        Returns:
+            True if successful
+        """
+        # Parts go in a directory of their own so stitches into the same
+        # work_dir never collide, and are removed even if a part fails
+        parts_dir = tempfile.mkdtemp(prefix="stitch-", dir=work_dir)
+        try:
+            params = self._probe_stream_params(input_file)
+            # Copied GOPs and re-encoded edges must share codecs to concat
+            allow_copy = (
+                params.get("video_codec") == "h264"
+                and params.get("audio_codec") in (None, "aac")
+            )
+            
+            part_files = []
+            copied = 0.0
+            for segment_idx, (start, end) in enumerate(segments):
+                keyframes = self.probe_keyframes(input_file, start, end) if allow_copy else []
+                for part in smart_cut_parts(start, end, keyframes, allow_copy):
+                    part_file = os.path.join(parts_dir, f"part_{segment_idx:03d}_{len(part_files):03d}.ts")
+                    subprocess.run(
+                        self.build_stitch_part_command(input_file, part, part_file, params, profile),
+                        check=True,
+                        capture_output=True
+                    )
+                    part_files.append(part_file)
+                    if part.copy:
+                        copied += part.duration
+            
+            total = sum(end - start for start, end in segments)
+            logger.info(
+                f"Stitching {len(segments)} segments from {len(part_files)} parts "
+                f"({copied:.1f}s of {total:.1f}s stream-copied)"
+            )
+            self._concat(part_files, output_file)
+            logger.info(f"Segments stitched: {output_file}")
+            return True
+        except subprocess.CalledProcessError as e:
+            logger.error(f"Segment stitching failed: {e.stderr.decode()}")
+            return False
+        finally:
+            shutil.rmtree(parts_dir, ignore_errors=True)
+
+    def build_stitch_part_command(
+        self,
+        input_file: str,
+        part: StitchPart,
+        output_file: str,
+        params: Dict,
+        profile: EncodeProfile = DEFAULT_ENCODE_PROFILE,
+    ) -> List[str]:
+        """Build the ffmpeg command that writes one stitch part as MPEG-TS"""
+        cmd = [
+            "ffmpeg",
+            *self._input_options(input_file),
+            "-ss", str(part.start),
+            "-t", str(part.duration),
+            "-i", input_file,
+            "-map", "0:v:0",
+        ]
+        if params.get("audio_codec"):
+            cmd += ["-map", "0:a:0"]
+        
+        if part.copy:
+            cmd += ["-c", "copy", "-avoid_negative_ts", "make_zero"]
+        else:
+            cmd += [
+                *profile.video_args(),
+                "-pix_fmt", params.get("pix_fmt") or "yuv420p",
+            ]
+            if params.get("audio_codec"):
+                cmd += ["-c:a", "aac"]
+                if params.get("sample_rate"):
+                    cmd += ["-ar", str(params["sample_rate"])]
+                if params.get("channels"):
+                    cmd += ["-ac", str(params["channels"])]
+        
+        cmd += ["-f", "mpegts", "-y", output_file]
+        return cmd
+
+    def probe_keyframes(self, input_file: str, start: float, end: float) -> List[float]:
+        """
+        Keyframe times of the first video stream within [start, end]
+        
+        Only the range is read (and only keyframes are decoded), so this
+        is cheap even for long or remote sources.
+        """
+        try:
+            cmd = [
+                "ffprobe",
+                "-v", "error",
+                *self._input_options(input_file),
+                "-select_streams", "v:0",
+                "-skip_frame", "nokey",
+                "-read_intervals", f"{max(0.0, start - 1.0)}%{end + 1.0}",
+                "-show_entries", "frame=pts_time",
+                "-of", "csv=p=0",
+                input_file
+            ]
+            result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+            keyframes = []
+            for line in result.stdout.split():
+                value = line.strip().rstrip(",")
+                if value and value != "N/A":
+                    keyframes.append(float(value))
+            return sorted(k for k in keyframes if start <= k <= end)
+        except Exception as e:
+            logger.error(f"Failed to probe keyframes: {e}")
+            # No keyframes: segments are re-encoded whole
+            return []
 
+    def _probe_stream_params(self, input_file: str) -> Dict:
+        """Codec parameters of the first video and audio streams"""
+        params: Dict = {}
+        try:
+            cmd = [
+                "ffprobe",
+                "-v", "error",
+                *self._input_options(input_file),
+                "-show_entries", "stream=codec_type,codec_name,pix_fmt,sample_rate,channels",
+                "-of", "json",
+                input_file
+            ]
+            result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+            for stream in json.loads(result.stdout).get("streams", []):
+                if stream.get("codec_type") == "video" and "video_codec" not in params:
+                    params["video_codec"] = stream.get("codec_name")
+                    params["pix_fmt"] = stream.get("pix_fmt")
+                elif stream.get("codec_type") == "audio" and "audio_codec" not in params:
+                    params["audio_codec"] = stream.get("codec_name")
+                    params["sample_rate"] = stream.get("sample_rate")
+                    params["channels"] = stream.get("channels")
+        except Exception as e:
+            logger.error(f"Failed to probe stream parameters: {e}")
+            # Unknown codecs: every part is re-encoded, audio assumed present
+            params["audio_codec"] = "unknown"
+        return params
+
+    def _concat(self, files: List[str], output_file: str) -> None:
+        """
+        Join files with the concat demuxer (stream copy)
+        
+        The file list is private to this call, next to the output, so
+        concurrent renders never share it. Raises CalledProcessError.
+        """
+        fd, list_file = tempfile.mkstemp(
+            prefix="concat-",
+            suffix=".txt",
+            dir=os.path.dirname(os.path.abspath(output_file))
+        )
+        try:
+            with os.fdopen(fd, "w") as f:
+                for file in files:
+                    escaped = os.path.abspath(file).replace("'", "'\\''")
+                    f.write(f"file '{escaped}'\n")
+            
             cmd = [
                 "ffmpeg",
                 "-f", "concat",
                 "-safe", "0",
-                "-i", concat_file,
+                "-i", list_file,
                 "-c", "copy",
                 "-y", output_file
             ]
-
-            logger.info(f"Concatenating {len(files)} video segments")
             subprocess.run(cmd, check=True, capture_output=True)
-            logger.info(f"Intro/outro added: {output_file}")
-
-            # Cleanup
-            os.remove(concat_file)
-            return True
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Intro/outro addition failed: {e.stderr.decode()}")
-            return False
+        finally:
+            os.remove(list_file)
 
     def generate_thumbnail(
         self,
@@ -491,20 +922,21 @@ class RenderPipeline:
         input_file: str,
         output_file: str,
         max_height: int = 720,
+        profile: EncodeProfile = DEFAULT_ENCODE_PROFILE,
     ) -> bool:
         """
         Generate lightweight proxy video for in-page playback
         
         Creates a smaller, web-optimized version:
         - Max 720p resolution
-        - CRF 23 (good quality/size balance)
-        - Fast preset for quick encoding
+        - Standard encode profile by default (CRF 23, fast preset)
         - AAC audio
         
         Args:
             input_file: Source video path
             output_file: Output proxy video path
             max_height: Maximum height (maintains aspect ratio)
+            profile: Encode settings
             
         Returns:
             True if successful
@@ -517,9 +949,7 @@ class RenderPipeline:
                 "ffmpeg",
                 "-i", input_file,
                 "-vf", scale_filter,
-                "-c:v", "libx264",
-                "-preset", "fast",
-                "-crf", "23",
+                *profile.video_args(),
                 "-c:a", "aac",
                 "-b:a", "128k",
                 "-movflags", "+faststart",  # Enable streaming
@@ -534,6 +964,351 @@ class RenderPipeline:
             logger.error(f"Proxy video generation failed: {e.stderr.decode()}")
             return False
 
+    def build_filter_graph(
+        self,
+        plan: RenderPlan,
+        source_width: int,
+        source_height: int,
+        has_audio: bool = True,
+    ) -> str:
+        """
+        Compile a render plan into a single -filter_complex graph
+        
+        Video: [0:v] → crop/pad → captions → [vout] (watermark overlays [1:v])
+        Audio: [0:a] → loudnorm → [aout]
+        
+        Args:
+            plan: Render plan to compile
+            source_width: Source video width
+            source_height: Source video height
+            has_audio: Whether the source has an audio stream
+            
+        Returns:
+            filter_complex string with [vout] (and [aout] if audio) labels
+        """
+        video_chain = self._video_chain(plan, plan.aspect_ratio, source_width, source_height)
+        
+        graph = []
+        if plan.watermark_file:
+            graph.append(f"[0:v]{video_chain}[base]")
+            graph.append(f"[1:v]format=rgba,colorchannelmixer=aa={plan.watermark_opacity}[wm]")
+            graph.append(f"[base][wm]overlay={self._watermark_xy(plan)},format=yuv420p[vout]")
+        else:
+            graph.append(f"[0:v]{video_chain}[vout]")
+        
+        if has_audio:
+            graph.append(f"[0:a]{self._audio_chain(plan)}[aout]")
+        
+        return ";".join(graph)
+
+    def build_multi_filter_graph(
+        self,
+        plan: RenderPlan,
+        outputs: List[RenderOutput],
+        source_width: int,
+        source_height: int,
+        has_audio: bool = True,
+    ) -> str:
+        """
+        Compile a plan with several outputs into one -filter_complex graph
+        
+        The source is decoded and loudness-normalized once, then split:
+        Video: [0:v] → split → per output crop/pad → captions → [vout{i}]
+        Audio: [0:a] → loudnorm → asplit → [aout{i}]
+        
+        Args:
+            plan: Render plan (trim, captions, watermark, audio, profile)
+            outputs: Output files with their aspect ratios
+            source_width: Source video width
+            source_height: Source video height
+            has_audio: Whether the source has an audio stream
+            
+        Returns:
+            filter_complex string with [vout{i}] (and [aout{i}]) labels
+        """
+        count = len(outputs)
+        labels = lambda prefix: "".join(f"[{prefix}{i}]" for i in range(count))
+        
+        graph = [f"[0:v]split={count}{labels('v')}"]
+        if plan.watermark_file:
+            graph.append(
+                f"[1:v]format=rgba,colorchannelmixer=aa={plan.watermark_opacity},"
+                f"split={count}{labels('wm')}"
+            )
+        for i, output in enumerate(outputs):
+            video_chain = self._video_chain(plan, output.aspect_ratio, source_width, source_height)
+            if plan.watermark_file:
+                graph.append(f"[v{i}]{video_chain}[base{i}]")
+                graph.append(f"[base{i}][wm{i}]overlay={self._watermark_xy(plan)},format=yuv420p[vout{i}]")
+            else:
+                graph.append(f"[v{i}]{video_chain}[vout{i}]")
+        
+        if has_audio:
+            graph.append(f"[0:a]{self._audio_chain(plan)},asplit={count}{labels('aout')}")
+        
+        return ";".join(graph)
+
+    def _video_chain(
+        self,
+        plan: RenderPlan,
+        aspect_ratio: AspectRatio,
+        source_width: int,
+        source_height: int,
+    ) -> str:
+        """Crop/pad to the aspect ratio, then burn in the plan's captions"""
+        target_width, target_height = self.aspect_ratios[aspect_ratio]
+        
+        video_chain = [self._build_reframe_filter(
+            source_width, source_height,
+            target_width, target_height
+        )]
+        
+        if plan.subtitle_file:
+            subtitle_path = self._escape_filter_path(plan.subtitle_file)
+            if plan.subtitle_format == "ass":
+                video_chain.append(f"ass={subtitle_path}")
+            else:
+                video_chain.append(f"subtitles={subtitle_path}")
+        return ",".join(video_chain)
+
+    @staticmethod
+    def _watermark_xy(plan: RenderPlan) -> str:
+        positions = {
+            "top-left": "10:10",
+            "top-right": "main_w-overlay_w-10:10",
+            "bottom-left": "10:main_h-overlay_h-10",
+            "bottom-right": "main_w-overlay_w-10:main_h-overlay_h-10",
+        }
+        return positions.get(plan.watermark_position, positions["bottom-right"])
+
+    @staticmethod
+    def _audio_chain(plan: RenderPlan) -> str:
+        if plan.normalize_audio:
+            # loudnorm resamples to 192 kHz internally
+            return f"{loudnorm_filter(plan.target_loudness, plan.loudness)},aresample=48000"
+        return "anull"
+
+    def build_render_command(
+        self,
+        plan: RenderPlan,
+        source_width: int,
+        source_height: int,
+        has_audio: bool = True,
+    ) -> List[str]:
+        """Build the single-pass ffmpeg command for a render plan"""
+        filter_graph = self.build_filter_graph(
+            plan, source_width, source_height, has_audio
+        )
+        
+        cmd = self._render_inputs(plan)
+        cmd += [
+            "-filter_complex", filter_graph,
+            "-map", "[vout]",
+        ]
+        if has_audio:
+            cmd += ["-map", "[aout]"]
+        
+        cmd += self._render_output_args(plan, plan.output_file)
+        return cmd
+
+    def build_multi_render_command(
+        self,
+        plan: RenderPlan,
+        outputs: List[RenderOutput],
+        source_width: int,
+        source_height: int,
+        has_audio: bool = True,
+    ) -> List[str]:
+        """Build one ffmpeg command that writes every output from one decode"""
+        filter_graph = self.build_multi_filter_graph(
+            plan, outputs, source_width, source_height, has_audio
+        )
+        
+        cmd = self._render_inputs(plan)
+        cmd += ["-filter_complex", filter_graph]
+        for i, output in enumerate(outputs):
+            cmd += ["-map", f"[vout{i}]"]
+            if has_audio:
+                cmd += ["-map", f"[aout{i}]"]
+            cmd += self._render_output_args(plan, output.output_file)
+        return cmd
+
+    def _render_inputs(self, plan: RenderPlan) -> List[str]:
+        """ffmpeg inputs for a plan: trimmed source, then the watermark"""
+        cmd = [
+            "ffmpeg",
+            *self._input_options(plan.input_file),
+            "-ss", str(plan.start),
+            "-t", str(plan.duration),
+            "-i", plan.input_file,
+        ]
+        if plan.watermark_file:
+            cmd += ["-i", plan.watermark_file]
+        return cmd
+
+    @staticmethod
+    def _render_output_args(plan: RenderPlan, output_file: str) -> List[str]:
+        return [
+            *plan.encode_profile.video_args(),
+            "-c:a", "aac",
+            "-movflags", "+faststart",
+            "-y", output_file
+        ]
+
+    def render(self, plan: RenderPlan) -> bool:
+        """
+        Render a plan in a single ffmpeg pass (one decode, one encode)
+        
+        Args:
+            plan: Render plan
+            
+        Returns:
+            True if successful
+        """
+        try:
+            source_width, source_height = self._probe_dimensions(plan.input_file)
+            has_audio = self._probe_has_audio(plan.input_file)
+            cmd = self.build_render_command(
+                plan, source_width, source_height, has_audio
+            )
+
+            logger.info(
+                f"Single-pass render: {plan.start:.2f}s - {plan.end:.2f}s → "
+                f"{plan.aspect_ratio.value}"
+            )
+            subprocess.run(cmd, check=True, capture_output=True)
+            logger.info(f"Render complete: {plan.output_file}")
+            return True
+        except subprocess.CalledProcessError as e:
+            logger.error(f"Single-pass render failed: {e.stderr.decode()}")
+            return False
+
+    def render_multi(self, plan: RenderPlan, outputs: List[RenderOutput]) -> bool:
+        """
+        Render several aspect ratios of a plan in one ffmpeg pass
+        
+        One decode and one loudnorm feed an encode per output, instead of
+        a full render per aspect ratio.
+        
+        Args:
+            plan: Render plan (its output_file and aspect_ratio are unused)
+            outputs: Output files with their aspect ratios
+            
+        Returns:
+            True if every output was written
+        """
+        try:
+            source_width, source_height = self._probe_dimensions(plan.input_file)
+            has_audio = self._probe_has_audio(plan.input_file)
+            cmd = self.build_multi_render_command(
+                plan, outputs, source_width, source_height, has_audio
+            )
+
+            logger.info(
+                f"Multi-output render: {plan.start:.2f}s - {plan.end:.2f}s → "
+                f"{', '.join(output.aspect_ratio.value for output in outputs)}"
+            )
+            subprocess.run(cmd, check=True, capture_output=True)
+            logger.info(f"Render complete: {len(outputs)} outputs")
+            return True
+        except subprocess.CalledProcessError as e:
+            logger.error(f"Multi-output render failed: {e.stderr.decode()}")
+            return False
+
+    def render_step_by_step(self, plan: RenderPlan, work_dir: str) -> bool:
+        """
+        Render a plan with the individual pipeline steps
+        
+        Fallback for render(): runs extract → reframe → normalize →
+        captions → watermark as separate ffmpeg processes, writing
+        intermediates to work_dir.
+        
+        Args:
+            plan: Render plan
+            work_dir: Directory for intermediate files
+            
+        Returns:
+            True if successful
+        """
+        current = os.path.join(work_dir, "clip.mp4")
+        profile = plan.encode_profile
+        if not self.extract_clip(plan.input_file, current, plan.start, plan.end, plan.cut_mode, profile):
+            return False
+        
+        reframed = os.path.join(work_dir, "reframed.mp4")
+        if not self.reframe_video(current, reframed, plan.aspect_ratio, use_face_detection=False, profile=profile):
+            return False
+        current = reframed
+        
+        if plan.normalize_audio:
+            normalized = os.path.join(work_dir, "normalized.mp4")
+            if not self.normalize_audio(current, normalized, plan.target_loudness, plan.loudness):
+                return False
+            current = normalized
+        
+        if plan.subtitle_file:
+            captioned = os.path.join(work_dir, "captioned.mp4")
+            if not self.add_captions(current, captioned, plan.subtitle_file, plan.subtitle_format, profile):
+                return False
+            current = captioned
+        
+        if plan.watermark_file:
+            watermarked = os.path.join(work_dir, "watermarked.mp4")
+            if not self.add_watermark(
+                current,
+                watermarked,
+                plan.watermark_file,
+                plan.watermark_position,
+                plan.watermark_opacity,
+                profile
+            ):
+                return False
+            current = watermarked
+        
+        os.replace(current, plan.output_file)
+        return True
+
+    def _probe_has_audio(self, input_file: str) -> bool:
+        """Check whether the input has at least one audio stream"""
+        try:
+            cmd = [
+                "ffprobe",
+                "-v", "error",
+                *self._input_options(input_file),
+                "-select_streams", "a",
+                "-show_entries", "stream=index",
+                "-of", "csv=p=0",
+                input_file
+            ]
+            result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+            return bool(result.stdout.strip())
+        except Exception as e:
+            logger.error(f"Failed to probe audio streams: {e}")
+            # Assume audio so loudnorm still runs; render() falls back on error
+            return True
+
+    @staticmethod
+    def _input_options(input_file: str) -> List[str]:
+        """ffmpeg/ffprobe options that must precede -i for this input"""
+        if is_remote_input(input_file):
+            return list(REMOTE_INPUT_OPTIONS)
+        return []
+
+    @staticmethod
+    def _escape_filter_path(path: str) -> str:
+        """
+        Escape a file path for use as a filter option inside a filtergraph
+
+        Two levels: the filter option value (\\ ' :), then the graph
+        description (\\ ' [ ] , ;). The graph parser strips one level of
+        backslashes before the filter parses its options.
+        """
+        for char in ("\\", "'", ":"):
+            path = path.replace(char, "\\" + char)
+        for char in ("\\", "'", "[", "]", ",", ";"):
+            path = path.replace(char, "\\" + char)
+        return path
+
     def get_video_info(self, input_file: str) -> Optional[Dict]:
         """
         Get video information
@@ -0,0 +1,251 @@
+"""
+Source Cache - Content-addressed local cache for source videos
+Shared by render, transcription and framing jobs on the same machine
+"""
+
+import fcntl
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import IO, Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class SourceCache:
+    """
+    Size-bounded LRU disk cache of source videos
+
+    - Entries are keyed by a hash of the project id and the source object
+      path (presigned query strings are ignored, so re-signed URLs hit)
+    - Fills are atomic: downloads land in a temp file that is renamed into
+      place, and a per-key file lock stops concurrent jobs (threads or
+      processes) from downloading the same source twice
+    - In-flight jobs hold a reference; referenced entries are never evicted.
+      References are also pinned with a shared flock on "<key>.pin", so
+      other processes (RQ workers, uvicorn workers) skip them too
+    """
+
+    CHUNK_SIZE = 1024 * 1024  # 1 MB
+
+    def __init__(self, root: str, max_bytes: int):
+        """
+        Initialize source cache
+
+        Args:
+            root: Cache directory
+            max_bytes: Total size budget before LRU eviction kicks in
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(self.root, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._refcounts: Dict[str, int] = {}
+        self._pins: Dict[str, IO] = {}  # key -> pin file holding LOCK_SH
+        self._entries: "OrderedDict[str, str]" = OrderedDict()  # key -> path, LRU first
+        self._load_existing()
+
+    @staticmethod
+    def key_for(project_id: Optional[str], source_url: str) -> str:
+        """Build the cache key for a project's source"""
+        source_path = urlparse(source_url).path or source_url
+        digest = hashlib.sha256(f"{project_id or ''}:{source_path}".encode("utf-8"))
+        return digest.hexdigest()[:32]
+
+    def contains(self, key: str) -> bool:
+        """Check whether a source is already cached"""
+        with self._lock:
+            path = self._entries.get(key)
+        return path is not None and os.path.exists(path)
+
+    def acquire(self, key: str, source_url: str) -> str:
+        """
+        Get a local path for a source, downloading it on a miss
+
+        Every acquire() must be paired with release() once the job no
+        longer needs the file.
+
+        Args:
+            key: Cache key from key_for()
+            source_url: URL to fetch on a miss
+
+        Returns:
+            Local path of the cached source
+        """
+        with self._lock:
+            self._refcounts[key] = self._refcounts.get(key, 0) + 1
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        try:
+            with key_lock:
+                # Pin before the lookup so no process can evict it under us
+                self._pin(key)
+                path = self._lookup(key)
+                if path is None:
+                    path = self._fill(key, source_url)
+        except Exception:
+            self.release(key)
+            raise
+
+        self._evict()
+        return path
+
+    def release(self, key: str):
+        """Drop a job's reference to a cached source"""
+        with self._lock:
+            count = self._refcounts.get(key, 0) - 1
+            if count > 0:
+                self._refcounts[key] = count
+            else:
+                self._refcounts.pop(key, None)
+                pin = self._pins.pop(key, None)
+                if pin is not None:
+                    pin.close()  # Drops the shared flock
+        self._evict()
+
+    def _pin(self, key: str):
+        """Hold a shared flock on the key's pin file while this process uses it"""
+        with self._lock:
+            if key in self._pins:
+                return
+        pin = open(os.path.join(self.root, f"{key}.pin"), "a")
+        # Blocks only while another process is evicting this key
+        fcntl.flock(pin, fcntl.LOCK_SH)
+        with self._lock:
+            if key in self._pins or key not in self._refcounts:
+                pin.close()
+            else:
+                self._pins[key] = pin
+
+    def _lookup(self, key: str) -> Optional[str]:
+        """Return the cached path and mark it most recently used"""
+        with self._lock:
+            path = self._entries.get(key)
+            if path is None:
+                # Another process may have filled it since startup
+                path = self._find_on_disk(key)
+                if path is None:
+                    return None
+                self._entries[key] = path
+            if not os.path.exists(path):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        os.utime(path)
+        logger.info(f"Source cache hit: {key}")
+        return path
+
+    def _fill(self, key: str, source_url: str) -> str:
+        """Download a source into the cache atomically"""
+        extension = os.path.splitext(urlparse(source_url).path)[1] or ".bin"
+        path = os.path.join(self.root, f"{key}{extension}")
+        lock_path = os.path.join(self.root, f"{key}.lock")
+
+        with open(lock_path, "w") as lock_file:
+            # Cross-process: wait for any other worker filling the same key
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                if not os.path.exists(path):
+                    temp_path = f"{path}.part.{os.getpid()}.{threading.get_ident()}"
+                    logger.info(f"Source cache miss, downloading {key}")
+                    try:
+                        self._download(source_url, temp_path)
+                        os.replace(temp_path, path)
+                    finally:
+                        if os.path.exists(temp_path):
+                            os.remove(temp_path)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+        with self._lock:
+            self._entries[key] = path
+            self._entries.move_to_end(key)
+        return path
+
+    def _download(self, url: str, path: str):
+        """Stream a URL to disk"""
+        response = requests.get(url, stream=True, timeout=300)
+        response.raise_for_status()
+        with open(path, "wb") as f:
+            for chunk in response.iter_content(chunk_size=self.CHUNK_SIZE):
+                f.write(chunk)
+
+    def _evict(self):
+        """Evict least recently used, unreferenced entries over the size budget"""
+        with self._lock:
+            sizes = {
+                key: os.path.getsize(path)
+                for key, path in self._entries.items()
+                if os.path.exists(path)
+            }
+            total = sum(sizes.values())
+
+            for key in list(self._entries.keys()):
+                if total <= self.max_bytes:
+                    break
+                if self._refcounts.get(key, 0) > 0:
+                    continue
+                if not self._remove_unpinned(key, self._entries[key]):
+                    continue
+                del self._entries[key]
+                total -= sizes.get(key, 0)
+
+    def _remove_unpinned(self, key: str, path: str) -> bool:
+        """Delete a cache file unless another process has it pinned"""
+        with open(os.path.join(self.root, f"{key}.pin"), "a") as pin:
+            try:
+                fcntl.flock(pin, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            try:
+                os.remove(path)
+                logger.info(f"Evicted cached source {key}")
+            except FileNotFoundError:
+                pass
+            finally:
+                fcntl.flock(pin, fcntl.LOCK_UN)
+        return True
+
+    def _find_on_disk(self, key: str) -> Optional[str]:
+        """Find a completed cache file for a key"""
+        for name in os.listdir(self.root):
+            if name.startswith(key) and self._is_entry(name):
+                return os.path.join(self.root, name)
+        return None
+
+    def _load_existing(self):
+        """Rebuild the LRU index from files left by previous runs"""
+        paths = [
+            os.path.join(self.root, name)
+            for name in os.listdir(self.root)
+            if self._is_entry(name)
+        ]
+        for path in sorted(paths, key=os.path.getmtime):
+            key = os.path.basename(path).split(".")[0]
+            self._entries[key] = path
+
+    @staticmethod
+    def _is_entry(name: str) -> bool:
+        return ".part." not in name and not name.endswith((".lock", ".pin"))
+
+
+_source_cache: Optional[SourceCache] = None
+_source_cache_lock = threading.Lock()
+
+
+def get_source_cache() -> SourceCache:
+    """Get the process-wide source cache (configured from env)"""
+    global _source_cache
+    with _source_cache_lock:
+        if _source_cache is None:
+            root = os.getenv("SOURCE_CACHE_DIR", "/tmp/clipforge-source-cache")
+            max_gb = float(os.getenv("SOURCE_CACHE_MAX_GB", "20"))
+            _source_cache = SourceCache(root, int(max_gb * 1024 ** 3))
+        return _source_cache
@@ -0,0 +1,58 @@
+"""
+Speaker Index - Sorted diarization intervals for speaker lookups
+Built once per transcript; each lookup is a bisect over utterance starts
+instead of a scan of every utterance
+"""
+
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional
+
+
+class SpeakerIndex:
+    """
+    Diarization utterances sorted by start time
+
+    Lookups return the same speaker as scanning the diarization list for
+    the first utterance with start <= time <= end: utterances are sorted
+    by start with a running maximum of end times, so only utterances that
+    can still contain the time are visited (one or two for the usual
+    non-overlapping diarization).
+    """
+
+    def __init__(self, diarization: Iterable[Dict] = ()):
+        """
+        Initialize speaker index
+
+        Args:
+            diarization: Speaker segments with start, end, speaker
+        """
+        # (start, list position, end, speaker), sorted by start
+        entries = sorted(
+            (dia.get('start', 0), position, dia.get('end', 0), dia.get('speaker'))
+            for position, dia in enumerate(diarization)
+        )
+        self.starts: List[float] = [entry[0] for entry in entries]
+        self.ends: List[float] = [entry[2] for entry in entries]
+        self.positions: List[int] = [entry[1] for entry in entries]
+        self.speakers: List[Optional[str]] = [entry[3] for entry in entries]
+
+        # Latest end among utterances [0, i]
+        self.max_ends: List[float] = []
+        latest = float('-inf')
+        for end in self.ends:
+            latest = max(latest, end)
+            self.max_ends.append(latest)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def speaker_at(self, time: float) -> Optional[str]:
+        """Speaker talking at time, or None outside every utterance"""
+        best = None
+        i = bisect_right(self.starts, time) - 1
+        # Walk back while an earlier utterance could still reach time
+        while i >= 0 and self.max_ends[i] >= time:
+            if self.ends[i] >= time and (best is None or self.positions[i] < self.positions[best]):
+                best = i
+            i -= 1
+        return self.speakers[best] if best is not None else None
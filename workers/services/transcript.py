@@ -0,0 +1,153 @@
+"""
+Transcript - Columnar word storage shared by ranking, boundaries and captions
+Word timings live in float arrays and texts are interned once, so a long
+transcript is a handful of arrays instead of one Python object per word
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+# Punctuation flags (bitmask per word, computed on the stripped text)
+SENTENCE_END = 1    # ends with . ! ?
+CLAUSE_END = 2      # ends with , ; :
+CAPITALIZED = 4     # starts with an upper-case letter
+HAS_STOP = 8        # contains any of . ! ? ; : (boundary detector's sentence test)
+
+_STOP_PATTERN = re.compile(r'[.!?;:]')
+
+
+def word_flags(text: str) -> int:
+    """Punctuation flags for a single word"""
+    stripped = text.strip()
+    flags = 0
+    if stripped.endswith(('.', '!', '?')):
+        flags |= SENTENCE_END
+    elif stripped.endswith((',', ';', ':')):
+        flags |= CLAUSE_END
+    if stripped and stripped[0].isupper():
+        flags |= CAPITALIZED
+    if _STOP_PATTERN.search(stripped):
+        flags |= HAS_STOP
+    return flags
+
+
+class Transcript:
+    """
+    Words as parallel arrays
+
+    Texts are interned: token_ids index into vocab, and flags are computed
+    once per distinct text then gathered per word. Slicing and masking
+    share the vocabulary instead of copying strings.
+    """
+
+    def __init__(
+        self,
+        texts: Iterable[str],
+        starts: Iterable[float],
+        ends: Iterable[float],
+        confidences: Optional[Iterable[float]] = None,
+    ):
+        """
+        Initialize transcript
+
+        Args:
+            texts: Word texts
+            starts: Word start times (seconds)
+            ends: Word end times (seconds)
+            confidences: ASR confidences (1.0 if None)
+        """
+        ids: Dict[str, int] = {}
+        token_ids = [ids.setdefault(text, len(ids)) for text in texts]
+        vocab = list(ids)
+        self._set(
+            np.array(token_ids, dtype=np.int32),
+            vocab,
+            np.array([word_flags(text) for text in vocab], dtype=np.uint8),
+            np.asarray(list(starts), dtype=float),
+            np.asarray(list(ends), dtype=float),
+            np.ones(len(token_ids)) if confidences is None else np.asarray(list(confidences), dtype=float),
+        )
+
+    def _set(self, token_ids, vocab, vocab_flags, starts, ends, confidences):
+        self.token_ids = token_ids
+        self.vocab = vocab
+        self.vocab_flags = vocab_flags
+        self.flags = vocab_flags[token_ids] if len(token_ids) else np.zeros(0, dtype=np.uint8)
+        self.starts = starts
+        self.ends = ends
+        self.confidences = confidences
+
+    @classmethod
+    def from_words(cls, words: Sequence) -> "Transcript":
+        """Build from word dicts (DB JSON) or objects with text, start, end"""
+        if words and not isinstance(words[0], dict):
+            return cls(
+                (w.text for w in words),
+                (w.start for w in words),
+                (w.end for w in words),
+                (getattr(w, 'confidence', 1.0) for w in words),
+            )
+        return cls(
+            (w.get('text', '') for w in words),
+            (w.get('start', 0) for w in words),
+            (w.get('end', 0) for w in words),
+            (w.get('confidence', 1.0) for w in words),
+        )
+
+    def __len__(self) -> int:
+        return len(self.token_ids)
+
+    def text(self, i: int) -> str:
+        return self.vocab[self.token_ids[i]]
+
+    def texts(self, start: int = 0, stop: Optional[int] = None) -> List[str]:
+        """Word texts for positions [start, stop)"""
+        vocab = self.vocab
+        return [vocab[i] for i in self.token_ids[start:stop].tolist()]
+
+    def join(self, start: int = 0, stop: Optional[int] = None) -> str:
+        return ' '.join(self.texts(start, stop))
+
+    def select(self, mask: np.ndarray, offset: float = 0.0) -> "Transcript":
+        """
+        Words where mask is set, sharing the vocabulary
+
+        Args:
+            mask: Boolean array (or index array) over words
+            offset: Subtracted from times (e.g. clip start for clip-relative words)
+        """
+        subset = Transcript.__new__(Transcript)
+        subset._set(
+            self.token_ids[mask],
+            self.vocab,
+            self.vocab_flags,
+            self.starts[mask] - offset,
+            self.ends[mask] - offset,
+            self.confidences[mask],
+        )
+        return subset
+
+    def within(self, start: float, end: float, offset: float = 0.0) -> "Transcript":
+        """Words fully inside [start, end]"""
+        return self.select((self.starts >= start) & (self.ends <= end), offset)
+
+    def to_dicts(self) -> List[Dict]:
+        """Word dicts in the DB JSON shape"""
+        return [
+            {'text': text, 'start': start, 'end': end, 'confidence': confidence}
+            for text, start, end, confidence in zip(
+                self.texts(),
+                self.starts.tolist(),
+                self.ends.tolist(),
+                self.confidences.tolist(),
+            )
+        ]
+
+
+def as_transcript(words: Union[Transcript, Sequence]) -> Transcript:
+    """Use a Transcript as-is, or build one from words"""
+    if isinstance(words, Transcript):
+        return words
+    return Transcript.from_words(words)
@@ -0,0 +1,93 @@
+"""
+Transcript Index - Token statistics for ranking, built once per transcript
+Document frequencies over segments give TF-IDF/BM25 novelty in linear time
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word tokens without punctuation"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class TranscriptIndex:
+    """
+    Per-transcript vocabulary with document frequencies
+
+    Each segment is a document. Segments can be added one at a time, so
+    the incremental ranker keeps a single index as the transcript grows.
+    """
+
+    # BM25 parameters
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, texts: Iterable[str] = ()):
+        self.doc_freq: Counter = Counter()
+        self.num_docs = 0
+        self.total_tokens = 0
+        self._token_cache: Dict[str, List[str]] = {}
+        for text in texts:
+            self.add(text)
+
+    @classmethod
+    def from_segments(cls, segments) -> "TranscriptIndex":
+        return cls(seg.text for seg in segments)
+
+    @property
+    def avg_doc_length(self) -> float:
+        return self.total_tokens / self.num_docs if self.num_docs else 0.0
+
+    def add(self, text: str):
+        """Add a segment's text as a document"""
+        tokens = self.tokens(text)
+        self.doc_freq.update(set(tokens))
+        self.num_docs += 1
+        self.total_tokens += len(tokens)
+
+    def tokens(self, text: str) -> List[str]:
+        """Tokenize text, memoized for repeated segment texts"""
+        tokens = self._token_cache.get(text)
+        if tokens is None:
+            tokens = tokenize(text)
+            self._token_cache[text] = tokens
+        return tokens
+
+    def idf(self, term: str) -> float:
+        """BM25 inverse document frequency (always positive)"""
+        df = self.doc_freq.get(term, 0)
+        return math.log(1 + (self.num_docs - df + 0.5) / (df + 0.5))
+
+    def novelty(self, text: str) -> float:
+        """
+        How rare a segment's vocabulary is within the transcript (0-1)
+
+        BM25-saturated term weights average each term's IDF relative to
+        the IDF of a term found in a single segment, so segments built
+        from words used everywhere score low and those introducing new
+        terms score high.
+        """
+        tokens = self.tokens(text)
+        if not tokens or not self.num_docs:
+            return 0.5
+
+        max_idf = math.log(1 + (self.num_docs - 0.5) / 1.5)
+        if max_idf <= 0:
+            return 0.5
+
+        doc_length = len(tokens)
+        norm = self.K1 * (1 - self.B + self.B * doc_length / (self.avg_doc_length or doc_length))
+        weighted = 0.0
+        total_weight = 0.0
+        for term, tf in Counter(tokens).items():
+            saturation = tf * (self.K1 + 1) / (tf + norm)
+            weighted += saturation * self.idf(term)
+            total_weight += saturation
+
+        return min(weighted / (total_weight * max_idf), 1.0)
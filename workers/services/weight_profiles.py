@@ -0,0 +1,63 @@
+"""
+Weight Profiles - Named score weights for the ranker
+Profiles come from RANKER_WEIGHT_PROFILES, a JSON object or the path of a
+JSON file: {"<profile or org id>": {"hook": 0.35, "novelty": 0.1, ...}}.
+Features a profile leaves out keep RankerEngine.SCORE_WEIGHTS.
+"""
+
+import json
+import logging
+import os
+from typing import Dict, Optional
+
+from services.feature_extractor import FEATURE_NAMES
+
+logger = logging.getLogger(__name__)
+
+
+def load_weight_profiles() -> Dict[str, Dict[str, float]]:
+    """Configured profiles (empty if RANKER_WEIGHT_PROFILES is unset)"""
+    raw = os.getenv("RANKER_WEIGHT_PROFILES", "").strip()
+    if not raw:
+        return {}
+    if not raw.startswith("{"):
+        with open(raw) as f:
+            raw = f.read()
+    return json.loads(raw)
+
+
+def resolve_weights(
+    profile: Optional[str] = None,
+    weights: Optional[Dict[str, float]] = None,
+) -> Optional[Dict[str, float]]:
+    """
+    Score weights for a ranking request
+
+    Args:
+        profile: Configured profile name (e.g. the tenant's org id)
+        weights: Explicit per-feature weights, applied over the profile
+
+    Returns:
+        Weight overrides for RankerEngine, or None for the defaults
+
+    Raises:
+        ValueError: Unknown profile, feature name or non-numeric weight
+    """
+    resolved: Dict[str, float] = {}
+    if profile:
+        profiles = load_weight_profiles()
+        if profile not in profiles:
+            raise ValueError(f"Unknown weight profile: {profile}")
+        resolved.update(profiles[profile])
+    if weights:
+        resolved.update(weights)
+
+    unknown = set(resolved) - set(FEATURE_NAMES)
+    if unknown:
+        raise ValueError(f"Unknown score weights: {', '.join(sorted(unknown))}")
+    try:
+        resolved = {name: float(value) for name, value in resolved.items()}
+    except (TypeError, ValueError):
+        raise ValueError("Score weights must be numbers")
+
+    return resolved or None
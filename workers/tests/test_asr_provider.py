@@ -0,0 +1,76 @@
+"""
+Unit tests for the ASR provider registry
+Tests that Whisper models are loaded once per process
+"""
+
+import sys
+import types
+
+import pytest
+from services import asr_provider
+
+
+class FakeModel:
+    def transcribe(self, audio_path, language=None, word_timestamps=False, verbose=False):
+        return {"text": "hi", "language": "en", "segments": []}
+
+
+@pytest.fixture
+def fake_whisper(monkeypatch):
+    """Stand-in whisper module that counts model loads"""
+    loads = []
+
+    def load_model(model_size, device="cpu"):
+        loads.append(model_size)
+        return FakeModel()
+
+    monkeypatch.setitem(sys.modules, "whisper", types.SimpleNamespace(load_model=load_model))
+    monkeypatch.setenv("ASR_PROVIDER", "whisper")
+    asr_provider.clear_asr_providers()
+    yield loads
+    asr_provider.clear_asr_providers()
+
+
+class TestProviderRegistry:
+    """Test suite for the cached ASR providers"""
+
+    def test_model_loaded_once(self, fake_whisper):
+        first = asr_provider.get_asr_provider()
+        second = asr_provider.get_asr_provider()
+
+        assert first is second
+        assert fake_whisper == ["base"]
+
+    def test_one_model_per_size(self, fake_whisper, monkeypatch):
+        monkeypatch.setenv("WHISPER_MODEL_SIZE", "small")
+        asr_provider.get_asr_provider()
+        asr_provider.get_whisper_provider("small")
+        asr_provider.get_whisper_provider("tiny")
+
+        assert fake_whisper == ["small", "tiny"]
+
+    def test_transcribe_file_reuses_model(self, fake_whisper):
+        asr_provider.transcribe_file("a.wav")
+        asr_provider.transcribe_file("b.wav")
+
+        assert fake_whisper == ["base"]
+
+    def test_warm(self, fake_whisper):
+        assert asr_provider.warm_asr_provider() is True
+        asr_provider.get_asr_provider()
+
+        assert fake_whisper == ["base"]
+
+    def test_warm_failure_is_not_fatal(self, monkeypatch):
+        def load_model(model_size, device="cpu"):
+            raise RuntimeError("no model")
+
+        monkeypatch.setitem(sys.modules, "whisper", types.SimpleNamespace(load_model=load_model))
+        monkeypatch.setenv("ASR_PROVIDER", "whisper")
+        asr_provider.clear_asr_providers()
+
+        assert asr_provider.warm_asr_provider() is False
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
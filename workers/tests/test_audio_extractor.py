@@ -0,0 +1,64 @@
+"""
+Unit tests for ASR audio extraction
+Tests ffmpeg command generation and format selection
+"""
+
+import pytest
+from services.audio_extractor import (
+    AudioFormat,
+    audio_format_for_provider,
+    audio_path_for,
+    build_extract_command,
+)
+
+
+class TestExtractCommand:
+    """Test suite for build_extract_command"""
+
+    def test_mono_16khz_audio_only(self):
+        cmd = build_extract_command("in.mp4", "out.flac", AudioFormat.FLAC)
+
+        assert cmd[cmd.index("-ac") + 1] == "1"
+        assert cmd[cmd.index("-ar") + 1] == "16000"
+        assert "-vn" in cmd
+        assert cmd[cmd.index("-c:a") + 1] == "flac"
+        assert cmd[-1] == "out.flac"
+
+    def test_remote_input_is_streamed(self):
+        """http(s) sources get reconnect options ahead of -i"""
+        url = "https://bucket.s3.amazonaws.com/video.mp4?X-Amz-Signature=abc"
+        cmd = build_extract_command(url, "out.wav", AudioFormat.WAV)
+
+        assert cmd.index("-reconnect") < cmd.index("-i")
+        assert cmd[cmd.index("-i") + 1] == url
+
+    def test_local_input_has_no_http_options(self):
+        cmd = build_extract_command("/tmp/in.mp4", "out.wav", AudioFormat.WAV)
+
+        assert "-reconnect" not in cmd
+
+    def test_opus_codec_and_extension(self):
+        path = audio_path_for("/tmp/p1_audio", AudioFormat.OPUS)
+        cmd = build_extract_command("in.mp4", path, AudioFormat.OPUS)
+
+        assert path == "/tmp/p1_audio.ogg"
+        assert cmd[cmd.index("-c:a") + 1] == "libopus"
+
+
+class TestFormatSelection:
+    """Test suite for audio_format_for_provider"""
+
+    def test_provider_defaults(self):
+        assert audio_format_for_provider("assemblyai") == AudioFormat.OPUS
+        assert audio_format_for_provider("whisper") == AudioFormat.WAV
+
+    def test_override(self):
+        assert audio_format_for_provider("whisper", "FLAC") == AudioFormat.FLAC
+
+    def test_invalid_override(self):
+        with pytest.raises(ValueError):
+            audio_format_for_provider("whisper", "mp3")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,51 @@
+"""
+Unit tests for boundary detection
+Tests the silencedetect command for local and remote sources
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from services.boundary_detector import BoundaryDetector
+from services.render_pipeline import REMOTE_INPUT_OPTIONS
+
+
+class TestSilenceDetection:
+    """Test suite for BoundaryDetector._detect_silences"""
+
+    def setup_method(self):
+        self.detector = BoundaryDetector()
+        self.commands = []
+
+    def capture(self, monkeypatch, stderr=""):
+        def fake_run(cmd, **kwargs):
+            self.commands.append(cmd)
+            return SimpleNamespace(stdout="", stderr=stderr)
+
+        monkeypatch.setattr("services.boundary_detector.subprocess.run", fake_run)
+
+    def test_remote_source_gets_reconnect_options(self, monkeypatch):
+        """Presigned URLs are read with reconnects and an I/O timeout"""
+        self.capture(monkeypatch)
+        self.detector._detect_silences("https://s3/p1/source.mp4?sig=abc", 100.0, 130.0)
+
+        cmd = self.commands[0]
+        assert cmd[1:1 + len(REMOTE_INPUT_OPTIONS)] == REMOTE_INPUT_OPTIONS
+        assert cmd.index("-rw_timeout") < cmd.index("-i")
+
+    def test_local_source_has_no_remote_options(self, monkeypatch):
+        self.capture(monkeypatch)
+        self.detector._detect_silences("/tmp/source.mp4", 100.0, 130.0)
+
+        assert "-reconnect" not in self.commands[0]
+
+    def test_silences_are_offset_to_source_time(self, monkeypatch):
+        self.capture(monkeypatch, stderr="silence_start: 2.0\nsilence_end: 3.0 | silence_duration: 1.0\n")
+        silences = self.detector._detect_silences("/tmp/source.mp4", 100.0, 130.0)
+
+        assert [b.time for b in silences] == [102.5]
+        assert silences[0].type == "silence"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
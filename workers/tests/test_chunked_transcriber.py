@@ -0,0 +1,128 @@
+"""
+Unit tests for chunked transcription
+Tests silence parsing, chunk planning and overlap stitching
+"""
+
+import asyncio
+import time
+
+import pytest
+from services import chunked_transcriber
+from services.chunked_transcriber import (
+    TARGET_CHUNK,
+    Chunk,
+    parse_silences,
+    plan_chunks,
+    stitch_chunks,
+    transcribe_chunked,
+)
+from services.executor import BoundedPool
+
+
+def word(text, start, end):
+    return {"text": text, "start": start, "end": end, "confidence": 0.9}
+
+
+class TestChunkPlanning:
+    """Test suite for silence parsing and plan_chunks"""
+
+    def test_parse_silencedetect_log(self):
+        log = (
+            "[silencedetect @ 0x1] silence_start: 12.5\n"
+            "[silencedetect @ 0x1] silence_end: 13.25 | silence_duration: 0.75\n"
+            "[silencedetect @ 0x1] silence_start: -0.01\n"
+            "[silencedetect @ 0x1] silence_end: 0.5 | silence_duration: 0.51\n"
+        )
+        assert parse_silences(log) == [(12.5, 13.25), (0.0, 0.5)]
+
+    def test_short_audio_is_one_chunk(self):
+        chunks = plan_chunks(120.0, [(60.0, 61.0)])
+
+        assert len(chunks) == 1
+        assert (chunks[0].start, chunks[0].end) == (0.0, 120.0)
+
+    def test_cuts_at_silence_nearest_target(self):
+        silences = [(100.0, 101.0), (290.0, 292.0), (350.0, 351.0)]
+        chunks = plan_chunks(1000.0, silences, target=300.0, max_chunk=420.0)
+
+        assert chunks[0].end == 291.0
+        assert chunks[1].start == 291.0
+
+    def test_hard_cut_without_silence(self):
+        chunks = plan_chunks(1000.0, [], target=300.0, max_chunk=420.0)
+
+        assert [c.end for c in chunks] == [420.0, 840.0, 1000.0]
+        assert all(c.end - c.start <= 420.0 for c in chunks)
+
+    def test_chunks_cover_audio_contiguously(self):
+        silences = [(t, t + 0.5) for t in range(50, 3000, 97)]
+        chunks = plan_chunks(3000.0, silences)
+
+        assert chunks[0].start == 0.0
+        assert chunks[-1].end == 3000.0
+        for a, b in zip(chunks, chunks[1:]):
+            assert a.end == b.start
+
+
+class TestStitching:
+    """Test suite for stitch_chunks"""
+
+    def test_overlap_words_kept_once(self):
+        """Words transcribed by both chunks belong to the one owning their midpoint"""
+        chunks = [Chunk(0, 0.0, 10.0, overlap=1.5), Chunk(1, 10.0, 20.0, overlap=1.5)]
+        results = [
+            {"language": "en", "words": [word("hello", 8.0, 8.5), word("there", 9.6, 10.2), word("friend", 10.4, 10.9)]},
+            {"language": "en", "words": [word("there", 9.62, 10.25), word("friend", 10.4, 10.9), word("bye", 15.0, 15.3)]},
+        ]
+        merged = stitch_chunks(chunks, results, duration=20.0)
+
+        assert [w["text"] for w in merged["words"]] == ["hello", "there", "friend", "bye"]
+        assert merged["text"] == "hello there friend bye"
+
+    def test_seam_duplicate_dropped(self):
+        """A word whose two timings straddle the cut is not repeated"""
+        chunks = [Chunk(0, 0.0, 10.0), Chunk(1, 10.0, 20.0)]
+        results = [
+            {"words": [word("seam", 9.7, 10.2)]},
+            {"words": [word("seam", 9.8, 10.3)]},
+        ]
+        merged = stitch_chunks(chunks, results, duration=20.0)
+
+        assert [w["text"] for w in merged["words"]] == ["seam"]
+
+    def test_output_matches_whisper_shape(self):
+        chunks = [Chunk(0, 0.0, 60.0)]
+        merged = stitch_chunks(chunks, [{"language": "de", "words": [word("hallo", 0.0, 60.0)]}], duration=60.0)
+
+        assert set(merged) == {"text", "language", "words", "diarization", "wpm"}
+        assert merged["language"] == "de"
+        assert merged["wpm"] == 1
+
+
+class TestChunkFanOut:
+    """Test chunk scheduling on the pool"""
+
+    def test_fan_out_limited_to_pool_workers(self, monkeypatch):
+        """A long upload never queues more chunks than the pool has workers"""
+        pool = BoundedPool("test", "thread", max_workers=2, max_pending=1)
+        in_flight = []
+
+        def fake_transcribe_chunk(audio_path, chunk, duration, language):
+            in_flight.append(pool.in_flight)
+            time.sleep(0.01)
+            return {"language": "en", "words": [word(f"w{chunk.index}", chunk.start, chunk.start + 1.0)]}
+
+        monkeypatch.setattr(chunked_transcriber, "detect_silences", lambda path: [])
+        monkeypatch.setattr(chunked_transcriber, "transcribe_chunk", fake_transcribe_chunk)
+
+        result = asyncio.run(transcribe_chunked("audio.wav", "en", pool, duration=TARGET_CHUNK * 6))
+        pool.shutdown()
+
+        assert len(in_flight) > pool.max_workers
+        assert max(in_flight) <= pool.max_workers
+        assert not pool.saturated
+        assert len(result["words"]) == len(in_flight)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,86 @@
+"""
+Unit tests for the coherence scorer
+Tests hashing embeddings, the embedding cache and coherence filtering
+"""
+
+import numpy as np
+import pytest
+from services.coherence import CoherenceScorer, HashingEmbedder
+from services.ranker_engine import RankerEngine, Segment
+
+TRADE = "Negotiators agreed to lower tariffs on steel exports between India and America."
+TRADE_2 = "The exports deal cuts steel tariffs and expands trade with India."
+COOKING = "Stir garlic and onions in olive oil until golden, then add tomatoes."
+
+
+class CountingEmbedder(HashingEmbedder):
+    """Hashing embedder that records every text it embeds"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def embed(self, texts):
+        self.calls.append(list(texts))
+        return super().embed(texts)
+
+
+class TestHashingEmbedder:
+    """Test suite for HashingEmbedder"""
+
+    def test_deterministic_unit_vectors(self):
+        embedder = HashingEmbedder()
+        first = embedder.embed([TRADE, COOKING])
+        assert np.array_equal(first, HashingEmbedder().embed([TRADE, COOKING]))
+        assert np.allclose(np.linalg.norm(first, axis=1), 1.0)
+
+    def test_empty_text(self):
+        vectors = HashingEmbedder().embed(["", "the and"])
+        assert not vectors.any()
+
+
+class TestCoherenceScorer:
+    """Test suite for CoherenceScorer"""
+
+    def test_related_segments_score_higher(self):
+        scorer = CoherenceScorer(HashingEmbedder())
+        assert scorer.similarity([TRADE, TRADE_2]) > scorer.similarity([TRADE, COOKING])
+        assert scorer.is_coherent([TRADE, TRADE_2])
+        assert not scorer.is_coherent([TRADE, COOKING])
+        assert scorer.similarity([TRADE]) == 1.0
+
+    def test_each_text_embedded_once(self):
+        embedder = CountingEmbedder()
+        scorer = CoherenceScorer(embedder)
+        scorer.similarity([TRADE, TRADE_2])
+        scorer.similarity([TRADE, COOKING])
+        scorer.similarity([TRADE_2, COOKING, TRADE])
+        assert embedder.calls == [[TRADE, TRADE_2], [COOKING]]
+
+    def test_cache_is_bounded(self):
+        embedder = CountingEmbedder()
+        scorer = CoherenceScorer(embedder, cache_size=2)
+        scorer.embed([TRADE, TRADE_2, COOKING])
+        scorer.embed([TRADE])
+        assert embedder.calls[-1] == [TRADE]
+
+
+class TestCoherentCombinations:
+    """Test coherence filtering in the Pro Clip combination search"""
+
+    def test_incoherent_combinations_skipped(self):
+        ranker = RankerEngine()
+        texts = [TRADE, COOKING, TRADE_2, COOKING, TRADE, COOKING]
+        segment_scores = [
+            (Segment(start=i * 15.0, end=i * 15.0 + 10.0, text=text), {}, 50.0 + i)
+            for i, text in enumerate(texts)
+        ]
+        scorer = CoherenceScorer(HashingEmbedder())
+        found = ranker._find_segment_combinations(segment_scores, 3, coherence=scorer)
+        assert found
+        for combo in found:
+            assert len({seg.text == COOKING for seg, _, _ in combo}) == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,103 @@
+"""
+Unit tests for the cut-point index
+Tests cut quality, snapping and equivalence with a per-call word scan
+"""
+
+import random
+
+import pytest
+from services.cut_point_index import CutPointIndex
+from services.ranker_engine import RankerEngine, Word
+
+
+def reference_snap(time, words):
+    """Original O(words) scan from RankerEngine._snap_to_silence"""
+    weak = ['the', 'a', 'an', 'to', 'of', 'in', 'on', 'at', 'for', 'with']
+    cut_points = []
+    for i in range(len(words) - 1):
+        gap = words[i + 1].start - words[i].end
+        if gap < 0.15:
+            continue
+        quality = 10 if gap > 0.5 else 7 if gap > 0.3 else 4 if gap > 0.2 else 1
+        prev_text = words[i].text.strip()
+        next_text = words[i + 1].text.strip()
+        if prev_text.endswith(('.', '!', '?')):
+            quality += 15
+        elif prev_text.endswith((',', ';', ':')):
+            quality += 8
+        if next_text and next_text[0].isupper():
+            quality += 5
+        if prev_text.lower() in weak or next_text.lower() in weak:
+            quality -= 5
+        cut_points.append((words[i].end, quality, abs(words[i].end - time)))
+
+    if not cut_points:
+        return time
+    nearby = [cp for cp in cut_points if cp[2] <= 2.0]
+    if not nearby:
+        return min(cut_points, key=lambda cp: cp[2])[0]
+    return max(nearby, key=lambda cp: cp[1] - cp[2] * 3)[0]
+
+
+def make_words(texts_and_times):
+    return [Word(text=t, start=s, end=e, confidence=0.9) for t, s, e in texts_and_times]
+
+
+class TestCutPointIndex:
+    """Test suite for CutPointIndex"""
+
+    def setup_method(self):
+        self.words = make_words([
+            ("Hello", 0.0, 0.5),
+            ("world.", 0.5, 1.0),
+            ("This", 1.5, 2.0),      # 0.5s pause after a sentence end
+            ("is", 2.0, 2.2),
+            ("the", 2.4, 2.6),       # short pause before a weak word
+            ("test,", 2.6, 3.0),
+            ("okay", 3.25, 3.6),     # clause end
+        ])
+        self.index = CutPointIndex.from_words(self.words)
+
+    def test_only_pauses_are_cut_points(self):
+        assert self.index.times.tolist() == [1.0, 2.2, 3.0]
+
+    def test_quality(self):
+        # pause tier + sentence end + capital, weak word, clause end
+        assert self.index.quality.tolist() == [7 + 15 + 5, 1 - 5, 4 + 8]
+
+    def test_prefers_sentence_end(self):
+        assert self.index.snap(1.8) == 1.0
+
+    def test_closest_when_nothing_in_window(self):
+        assert self.index.snap(10.0) == 3.0
+        assert self.index.snap(-5.0) == 1.0
+
+    def test_no_cut_points(self):
+        index = CutPointIndex.from_words(make_words([("a", 0.0, 0.5), ("b", 0.5, 1.0)]))
+        assert len(index) == 0
+        assert index.snap(0.7) == 0.7
+
+    def test_matches_word_scan(self):
+        rng = random.Random(7)
+        vocabulary = ["the", "a", "Then", "so", "ideas.", "wait,", "Great!", "of", "code", "users?"]
+        for _ in range(20):
+            t = 0.0
+            words = []
+            for _ in range(rng.randint(0, 80)):
+                start = t + rng.choice([0.0, 0.1, 0.18, 0.25, 0.4, 0.8])
+                end = start + rng.uniform(0.1, 0.6)
+                words.append(Word(text=rng.choice(vocabulary), start=start, end=end, confidence=0.9))
+                t = end
+            index = CutPointIndex.from_words(words)
+            for _ in range(25):
+                time = rng.uniform(-3.0, t + 3.0)
+                assert index.snap(time) == reference_snap(time, words)
+
+    def test_ranker_snap_uses_index(self):
+        ranker = RankerEngine()
+        assert ranker._snap_to_silence(1.8, self.words) == 1.0
+        assert ranker._snap_to_silence(1.8, self.words, self.index) == 1.0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
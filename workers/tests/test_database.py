@@ -0,0 +1,124 @@
+"""
+Unit tests for moment persistence
+Runs DatabaseService against an in-memory stand-in for the Moment table
+"""
+
+import copy
+
+import pytest
+from services import database
+from services.database import DatabaseService
+
+
+class FakeMomentTable:
+    """Just enough of a psycopg2 connection for the Moment statements"""
+
+    def __init__(self):
+        self.rows = []  # {"projectId", "tStart", "exported"}
+        self._committed = []
+
+    def cursor(self, cursor_factory=None):
+        return FakeCursor(self)
+
+    def commit(self):
+        self._committed = copy.deepcopy(self.rows)
+
+    def rollback(self):
+        self.rows = copy.deepcopy(self._committed)
+
+    def insert(self, values):
+        self.rows.append({"projectId": values[0], "tStart": values[1], "exported": False})
+
+
+class FakeCursor:
+    def __init__(self, table):
+        self.table = table
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params):
+        if sql == database.DELETE_REPLACEABLE_MOMENTS:
+            projects = set(params[0])
+            self.table.rows = [
+                row for row in self.table.rows
+                if row["projectId"] not in projects or row["exported"]
+            ]
+        elif sql.startswith('INSERT INTO "Moment"'):
+            self.table.insert(params)
+
+
+def clip(t_start):
+    return {
+        "tStart": t_start, "tEnd": t_start + 30.0, "duration": 30.0,
+        "score": 0.9, "reason": "hook", "features": {}, "title": "Clip",
+    }
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(
+        database, "execute_values",
+        lambda cur, sql, rows, template=None, page_size=100: [cur.table.insert(r) for r in rows]
+    )
+    service = DatabaseService.__new__(DatabaseService)
+    service.conn = FakeMomentTable()
+    return service
+
+
+class TestSaveMomentsBulk:
+    """Test suite for DatabaseService.save_moments_bulk"""
+
+    def test_rerank_replaces_moments(self, db):
+        """Re-ranking the backlog twice leaves one set of moments per project"""
+        for weights_run in range(2):
+            assert db.save_moments_bulk({
+                "p1": [clip(10.0 + weights_run), clip(60.0)],
+                "p2": [clip(5.0)],
+            }, "READY")
+
+        rows = db.conn.rows
+        assert sorted((r["projectId"], r["tStart"]) for r in rows) == [
+            ("p1", 11.0), ("p1", 60.0), ("p2", 5.0)
+        ]
+
+    def test_exported_moments_are_kept(self, db):
+        db.save_moments_bulk({"p1": [clip(10.0)]})
+        db.conn.rows[0]["exported"] = True
+        db.conn.commit()
+
+        db.save_moments_bulk({"p1": [clip(20.0)]})
+        assert [r["tStart"] for r in db.conn.rows] == [10.0, 20.0]
+
+    def test_other_projects_untouched(self, db):
+        db.save_moments_bulk({"p1": [clip(10.0)], "p2": [clip(20.0)]})
+        db.save_moments_bulk({"p1": [clip(30.0)]})
+
+        assert sorted((r["projectId"], r["tStart"]) for r in db.conn.rows) == [
+            ("p1", 30.0), ("p2", 20.0)
+        ]
+
+
+class TestSaveMoments:
+    """Test suite for DatabaseService.save_moments"""
+
+    def test_rerank_with_new_weights_replaces_moments(self, db):
+        assert db.save_moments("p1", [clip(10.0), clip(60.0)])
+        assert db.save_moments("p1", [clip(25.0)])
+
+        assert [(r["projectId"], r["tStart"]) for r in db.conn.rows] == [("p1", 25.0)]
+
+    def test_exported_moments_are_kept(self, db):
+        db.save_moments("p1", [clip(10.0)])
+        db.conn.rows[0]["exported"] = True
+        db.conn.commit()
+
+        db.save_moments("p1", [clip(20.0)])
+        assert [r["tStart"] for r in db.conn.rows] == [10.0, 20.0]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
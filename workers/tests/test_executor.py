@@ -0,0 +1,106 @@
+"""
+Unit tests for worker executors
+Tests off-loop execution and pool backpressure
+"""
+
+import asyncio
+import threading
+import pytest
+from services.executor import BoundedPool, PoolSaturatedError
+
+_warm = False
+
+
+def load_model():
+    global _warm
+    _warm = True
+
+
+def is_warm(delay=0.0):
+    import time
+    time.sleep(delay)
+    return _warm
+
+
+class TestBoundedPool:
+    """Test suite for BoundedPool"""
+
+    def test_runs_off_event_loop(self):
+        """Blocking work runs in a pool thread, not the loop thread"""
+        pool = BoundedPool("test", "thread", max_workers=2, max_pending=0)
+        loop_thread = threading.get_ident()
+
+        worker_thread = asyncio.run(pool.run(threading.get_ident))
+        pool.shutdown()
+
+        assert worker_thread != loop_thread
+
+    def test_event_loop_stays_responsive(self):
+        """Other coroutines progress while a blocking job runs"""
+        pool = BoundedPool("test", "thread", max_workers=1, max_pending=0)
+        release = threading.Event()
+        ticks = []
+
+        async def ticker():
+            for _ in range(3):
+                ticks.append(1)
+                await asyncio.sleep(0.01)
+            release.set()
+
+        async def main():
+            await asyncio.gather(pool.run(release.wait, 5), ticker())
+
+        asyncio.run(main())
+        pool.shutdown()
+
+        assert len(ticks) == 3
+
+    def test_backpressure_when_saturated(self):
+        """check_capacity rejects work once workers and queue are full"""
+        pool = BoundedPool("test", "thread", max_workers=1, max_pending=1)
+        release = threading.Event()
+
+        async def main():
+            jobs = [asyncio.ensure_future(pool.run(release.wait, 5)) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            assert pool.saturated
+            with pytest.raises(PoolSaturatedError):
+                pool.check_capacity()
+            release.set()
+            await asyncio.gather(*jobs)
+
+        asyncio.run(main())
+        pool.shutdown()
+
+        assert pool.in_flight == 0
+        pool.check_capacity()
+
+    def test_stats(self):
+        """Stats report pool configuration and load"""
+        pool = BoundedPool("test", "process", max_workers=2, max_pending=4)
+        stats = pool.stats()
+
+        assert stats["kind"] == "process"
+        assert stats["max_workers"] == 2
+        assert stats["in_flight"] == 0
+        assert stats["saturated"] is False
+
+    def test_warm_initializes_every_process(self):
+        """Every worker process is warm before its first job, not just the ones warm() reached"""
+        pool = BoundedPool("test", "process", max_workers=2, max_pending=4)
+
+        async def main():
+            started = await pool.warm(load_model)
+            results = await asyncio.gather(*(pool.run(is_warm, 0.05) for _ in range(4)))
+            return started, results
+
+        started, results = asyncio.run(main())
+        pool.shutdown()
+
+        assert 1 <= started <= 2
+        assert all(results)
+        assert _warm is False  # Loaded in the workers, not this process
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,72 @@
+"""
+Unit tests for batched feature extraction
+Tests whole-word matching and agreement with per-segment scoring
+"""
+
+import numpy as np
+import pytest
+from services.feature_extractor import FEATURE_NAMES
+from services.ranker_engine import RankerEngine, Segment
+from services.transcript_index import TranscriptIndex
+
+
+class TestFeatureExtractor:
+    """Test suite for FeatureExtractor"""
+
+    def setup_method(self):
+        self.ranker = RankerEngine()
+        self.extractor = self.ranker.feature_extractor
+        self.segments = [
+            Segment(0.0, 3.0, "How to build amazing products.", "A"),
+            Segment(3.0, 6.0, "Um, you know, it is like basically fine."),
+            Segment(6.0, 9.0, "First, why do we love it? Finally, we ship."),
+            Segment(9.0, 12.0, "Also the firstborn was lovely and unsolved."),
+            Segment(12.0, 15.0, ""),
+        ]
+
+    def test_matrix_shape(self):
+        matrix = self.extractor.extract(self.segments, TranscriptIndex.from_segments(self.segments))
+
+        assert matrix.shape == (len(self.segments), len(FEATURE_NAMES))
+        assert ((matrix >= 0) & (matrix <= 1)).all()
+
+    def test_whole_word_matching(self):
+        """Substrings like 'also', 'lovely' and 'firstborn' don't match keywords"""
+        features = self.extractor.text_features([self.segments[3].text])
+
+        assert features['emotion'][0] == 0.0
+        assert features['clarity'][0] == 1.0
+        assert features['structure'][0] == 0.0
+
+    def test_multi_word_filler(self):
+        features = self.extractor.text_features([self.segments[1].text])
+
+        # um, you know, like, basically over 8 words
+        assert features['clarity'][0] == pytest.approx(1 - 4 / 8)
+
+    def test_no_matches_across_segments(self):
+        """'how' ending one segment and 'to' starting the next is not a hook"""
+        features = self.extractor.text_features(["tell me how", "to the store"])
+
+        assert features['hook'].tolist() == [0.0, 0.0]
+
+    def test_batch_matches_single_segment_scoring(self):
+        """Matrix rows equal the per-segment feature and score methods"""
+        index = TranscriptIndex.from_segments(self.segments)
+        batch = self.ranker._score_segments(self.segments, index=index)
+
+        for segment, features, score in batch:
+            single = self.ranker._extract_features(segment, [], None, None, self.segments, index)
+            assert features == single
+            assert score == pytest.approx(self.ranker._compute_score(single))
+
+    def test_scores_are_matrix_vector_product(self):
+        matrix = np.eye(len(FEATURE_NAMES))
+        scores = self.ranker._compute_scores(matrix)
+
+        expected = [0.75 + 0.25 * self.ranker.SCORE_WEIGHTS[name] for name in FEATURE_NAMES]
+        assert scores.tolist() == pytest.approx(expected)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,167 @@
+"""
+Unit tests for incremental ranking
+Tests that streamed batches match batch ranking and that chunked
+transcription feeds words in time order
+"""
+
+import asyncio
+
+import pytest
+from services import chunked_transcriber
+from services.incremental_ranker import IncrementalRanker
+from services.ranker_engine import RankerEngine
+
+
+SENTENCES = [
+    "How to build amazing products.",
+    "First, understand your users.",
+    "Second, build something they love.",
+    "Why do most startups fail?",
+    "The secret is proven by science.",
+    "I hate wasting time on meetings.",
+    "Finally, ship early and often.",
+]
+
+
+def make_words(repeats: int = 12):
+    """Long transcript of timed words with pauses between sentences"""
+    words = []
+    t = 0.0
+    for i in range(repeats):
+        for sentence in SENTENCES:
+            for token in sentence.split():
+                words.append({"text": token, "start": t, "end": t + 0.4, "confidence": 0.9})
+                t += 0.5
+            t += 0.6
+    return words
+
+
+def as_tuples(clips):
+    return [(c.start, c.end, c.score, c.text) for c in clips]
+
+
+class TestIncrementalRanker:
+    """Test suite for IncrementalRanker"""
+
+    def setup_method(self):
+        self.words = make_words()
+        self.diarization = [
+            {"speaker": "A", "start": 0.0, "end": 60.0},
+            {"speaker": "B", "start": 60.0, "end": 400.0},
+        ]
+
+    def test_finalize_matches_batch_ranking(self):
+        """Streaming in batches gives the same final clips as rank_highlights"""
+        batch = RankerEngine(min_clip_duration=20, max_clip_duration=60).rank_highlights(
+            self.words, self.diarization, num_clips=4
+        )
+
+        incremental = IncrementalRanker(RankerEngine(min_clip_duration=20, max_clip_duration=60))
+        for i in range(0, len(self.words), 37):
+            incremental.add_words(self.words[i:i + 37])
+        incremental.add_words([], diarization=self.diarization)
+
+        assert as_tuples(incremental.finalize(num_clips=4)) == as_tuples(batch)
+
+    def test_provisional_clips_before_transcript_ends(self):
+        incremental = IncrementalRanker(RankerEngine(min_clip_duration=20, max_clip_duration=60))
+        incremental.add_words(self.words[: len(self.words) // 3])
+
+        clips = incremental.provisional_clips(num_clips=3)
+
+        assert clips
+        assert all(c.end <= incremental.transcript_end + 0.2 for c in clips)
+
+    def test_no_words_after_finalize(self):
+        incremental = IncrementalRanker()
+        incremental.add_words(self.words[:10])
+        incremental.finalize()
+
+        with pytest.raises(RuntimeError):
+            incremental.add_words(self.words[10:20])
+
+
+class FakePool:
+    """Runs transcribe_chunk stand-ins, finishing later chunks first"""
+
+    def __init__(self, results):
+        self.results = results
+        self.max_workers = len(results)
+
+    async def run(self, fn, audio_path, chunk, duration, language):
+        await asyncio.sleep(0.01 * (len(self.results) - chunk.index))
+        return self.results[chunk.index]
+
+
+class TestChunkedStreaming:
+    """Test suite for transcribe_chunked word streaming"""
+
+    def test_words_streamed_in_time_order(self, monkeypatch):
+        monkeypatch.setattr(chunked_transcriber, "detect_silences", lambda path: [])
+        plan_chunks = chunked_transcriber.plan_chunks
+        monkeypatch.setattr(
+            chunked_transcriber,
+            "plan_chunks",
+            lambda duration, silences: plan_chunks(duration, silences, target=10.0, max_chunk=10.0)
+        )
+
+        def word(text, start):
+            return {"text": text, "start": start, "end": start + 0.3, "confidence": 0.9}
+
+        results = [
+            {"words": [word("a", 1.0), word("b", 9.9)]},
+            {"words": [word("b", 9.9), word("c", 15.0)]},
+            {"words": [word("d", 25.0)]},
+        ]
+        batches = []
+
+        async def on_words(words):
+            batches.append([w["text"] for w in words])
+
+        merged = asyncio.run(chunked_transcriber.transcribe_chunked(
+            "audio.wav", "en", FakePool(results), duration=30.0, on_words=on_words
+        ))
+
+        assert [t for batch in batches for t in batch] == ["a", "b", "c", "d"]
+        assert [w["text"] for w in merged["words"]] == ["a", "b", "c", "d"]
+
+
+class TestProvisionalRanking:
+    """Test the ASR router's provisional ranking hook"""
+
+    def test_batches_run_on_the_job_thread(self, monkeypatch):
+        """Ranking runs on the job's own thread, never in the shared I/O pool"""
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        from routers import asr
+        from services.executor import io_pool
+        from services.job_state import JobStateStore
+
+        store = JobStateStore()
+        monkeypatch.setattr(asr, "get_job_state", lambda: store)
+        monkeypatch.setattr(io_pool, "run", None)  # Any use of the I/O pool fails
+        threads = []
+        rank = asr.IncrementalRanker.provisional_clips
+
+        def recording_provisional_clips(self, *args, **kwargs):
+            threads.append(threading.current_thread().name)
+            return rank(self, *args, **kwargs)
+
+        monkeypatch.setattr(asr.IncrementalRanker, "provisional_clips", recording_provisional_clips)
+        words = make_words()
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="provisional-rank")
+        on_words = asr._provisional_ranking("p1", words[-1]["end"], executor)
+
+        async def feed():
+            for i in range(0, len(words), 200):
+                await on_words(words[i:i + 200])
+
+        asyncio.run(feed())
+        executor.shutdown()
+
+        assert threads and all(name.startswith("provisional-rank") for name in threads)
+        assert store.get("asr", "p1")["partial"]["provisionalClips"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,153 @@
+"""
+Unit tests for the durable job queue
+Runs against in-memory fakeredis (JOB_QUEUE_BACKEND=fake)
+"""
+
+import asyncio
+import time
+from datetime import timedelta
+
+import pytest
+from services import job_queue
+from services.job_state import get_job_state
+from worker import parse_concurrency
+
+
+def add(a, b):
+    return a + b
+
+
+def fail():
+    raise RuntimeError("boom")
+
+
+@pytest.fixture(autouse=True)
+def fake_backend(monkeypatch):
+    """Fresh fakeredis connection per test"""
+    monkeypatch.setenv("JOB_QUEUE_BACKEND", "fake")
+    monkeypatch.setattr(job_queue, "_redis", None)
+    yield
+    job_queue._redis = None
+
+
+class TestJobQueue:
+    """Test suite for job_queue"""
+
+    def test_backend_selection(self, monkeypatch):
+        """Only rq and fake route jobs through Redis"""
+        assert job_queue.use_job_queue()
+        monkeypatch.setenv("JOB_QUEUE_BACKEND", "local")
+        assert not job_queue.use_job_queue()
+
+    def test_enqueue_runs_job(self):
+        """Fake backend runs jobs on enqueue and stores the result"""
+        from rq.job import Job
+
+        job_id = job_queue.enqueue_job("ranker", add, 2, 3, job_id="ranker-p1")
+        job = Job.fetch(job_id, connection=job_queue.get_redis())
+
+        assert job_id == "ranker-p1"
+        assert job.return_value() == 5
+
+    def test_enqueue_from_event_loop_runs_off_loop(self, monkeypatch):
+        """Queue entry points that call asyncio.run() work from a request handler"""
+        from rq.job import Job
+        from routers import ranker
+
+        class MissingTranscriptDB:
+            def get_transcript(self, transcript_id):
+                return None
+
+            def update_project_status(self, project_id, status):
+                return True
+
+            def close(self):
+                pass
+
+        monkeypatch.setattr(ranker, "DatabaseService", MissingTranscriptDB)
+
+        async def handler():
+            return job_queue.enqueue_job("ranker", ranker.run_ranker_job, "p1", "t1", job_id="ranker-p1")
+
+        job_id = asyncio.run(handler())
+        job = Job.fetch(job_id, connection=job_queue.get_redis())
+        for _ in range(100):
+            if job.get_status(refresh=True) != "queued":
+                break
+            time.sleep(0.05)
+
+        # The worker coroutine ran and failed on the missing transcript (the
+        # retry is scheduled), instead of failing on the running loop
+        assert job.get_status() == "scheduled"
+        state = get_job_state().get("ranker", "p1")
+        assert state["error"] == "Transcript t1 not found"
+
+    def test_enqueue_applies_queue_settings(self):
+        """Timeout and retry policy come from QUEUE_SETTINGS"""
+        from rq.job import Job
+
+        job_id = job_queue.enqueue_job("render", fail)
+        job = Job.fetch(job_id, connection=job_queue.get_redis())
+        settings = job_queue.QUEUE_SETTINGS["render"]
+
+        assert job.timeout == settings["timeout"]
+        assert job.retry_intervals == settings["retry_intervals"]
+
+    def test_unknown_queue(self):
+        with pytest.raises(ValueError):
+            job_queue.get_queue("nope")
+
+    def test_requeue_abandoned_job(self):
+        """A started job with a lapsed heartbeat is handed out again"""
+        from rq import Retry
+        from rq.registry import StartedJobRegistry
+        from rq.utils import utcnow
+
+        queue = job_queue.get_queue("render")
+        job = queue.create_job(add, args=(1, 1), job_id="render-e1", retry=Retry(max=2))
+        job.save()
+
+        registry = StartedJobRegistry(queue=queue)
+        registry.connection.zadd(
+            registry.key, {job.id: (utcnow() - timedelta(minutes=5)).timestamp()}
+        )
+
+        assert job_queue.requeue_abandoned_jobs("render") == 1
+        assert job.id not in registry.get_job_ids()
+
+        job.refresh()
+        assert job.retries_left == 1
+
+    def test_abandoned_job_without_retries_is_dropped(self):
+        from rq.registry import StartedJobRegistry
+        from rq.utils import utcnow
+
+        queue = job_queue.get_queue("asr")
+        job = queue.create_job(add, args=(1, 1), job_id="asr-p1")
+        job.save()
+
+        registry = StartedJobRegistry(queue=queue)
+        registry.connection.zadd(
+            registry.key, {job.id: (utcnow() - timedelta(minutes=5)).timestamp()}
+        )
+
+        assert job_queue.requeue_abandoned_jobs("asr") == 0
+        assert job.id not in registry.get_job_ids()
+
+
+class TestWorkerConfig:
+    """Test suite for worker concurrency parsing"""
+
+    def test_defaults(self):
+        assert parse_concurrency("") == {"asr": 1, "ranker": 2, "render": 2}
+
+    def test_override(self):
+        assert parse_concurrency("render=4, asr=2")["render"] == 4
+
+    def test_unknown_queue(self):
+        with pytest.raises(ValueError):
+            parse_concurrency("upload=1")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
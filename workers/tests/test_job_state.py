@@ -0,0 +1,160 @@
+"""
+Unit tests for the job state store
+Tests stage transitions, timings and the SSE stream
+"""
+
+import asyncio
+import json
+
+import fakeredis
+import pytest
+from services.job_state import JobStateStore
+
+
+class TestJobStateStore:
+    """Test suite for JobStateStore"""
+
+    def setup_method(self):
+        self.store = JobStateStore()
+
+    def test_unknown_job(self):
+        assert self.store.get("render", "missing") is None
+
+    def test_stage_progress_and_timings(self):
+        """Entering a stage closes the previous stage's timing"""
+        self.store.queued("render", "e1")
+        self.store.stage("render", "e1", "downloading")
+        self.store.stage("render", "e1", "reframing")
+
+        state = self.store.get("render", "e1")
+        assert state["status"] == "running"
+        assert state["stage"] == "reframing"
+        assert state["percent"] == 35
+        assert state["stages"]["downloading"]["duration"] is not None
+        assert state["stages"]["reframing"]["finishedAt"] is None
+
+    def test_percent_never_goes_backwards(self):
+        self.store.stage("render", "e1", "uploading")
+        self.store.progress("render", "e1", 10)
+
+        assert self.store.get("render", "e1")["percent"] == 85
+
+    def test_complete_and_fail(self):
+        self.store.stage("asr", "p1", "transcribing")
+        self.store.complete("asr", "p1", {"words": 42})
+        self.store.stage("ranker", "p1", "ranking")
+        self.store.fail("ranker", "p1", "boom")
+
+        done = self.store.get("asr", "p1")
+        failed = self.store.get("ranker", "p1")
+        assert done["status"] == "completed"
+        assert done["percent"] == 100
+        assert done["result"] == {"words": 42}
+        assert failed["status"] == "failed"
+        assert failed["stage"] == "ranking"
+        assert failed["error"] == "boom"
+
+    def test_returned_state_is_a_copy(self):
+        self.store.queued("render", "e1")
+        self.store.get("render", "e1")["status"] = "tampered"
+
+        assert self.store.get("render", "e1")["status"] == "queued"
+
+    def test_redis_backend(self):
+        """State written by one store is visible to another on the same Redis"""
+        redis = fakeredis.FakeStrictRedis()
+        JobStateStore(redis=redis).stage("render", "e1", "captioning")
+
+        state = JobStateStore(redis=redis).get("render", "e1")
+        assert state["stage"] == "captioning"
+        assert redis.ttl("jobstate:render:e1") > 0
+
+    def test_stream_ends_after_terminal_status(self):
+        """SSE stream emits each update and closes once the job finishes"""
+        self.store.queued("render", "e1")
+
+        async def collect():
+            events = []
+            async for event in self.store.stream("render", "e1", poll_interval=0.01):
+                events.append(event)
+                if len(events) == 1:
+                    self.store.stage("render", "e1", "uploading")
+                    self.store.complete("render", "e1")
+            return events
+
+        events = asyncio.run(asyncio.wait_for(collect(), timeout=5))
+        payloads = [json.loads(e.split("data: ", 1)[1]) for e in events]
+
+        assert events[0].startswith("event: queued")
+        assert payloads[-1]["status"] == "completed"
+
+    def test_stream_unknown_job_ends(self):
+        """No keepalives forever for a job that doesn't exist"""
+        async def collect():
+            return [event async for event in self.store.stream("render", "missing", poll_interval=0.01)]
+
+        assert asyncio.run(asyncio.wait_for(collect(), timeout=5)) == []
+
+    def test_stream_ends_when_state_expires(self):
+        """A stream whose job state disappears (TTL) is closed"""
+        redis = fakeredis.FakeStrictRedis()
+        store = JobStateStore(redis=redis)
+        store.queued("render", "e1")
+
+        async def collect():
+            events = []
+            async for event in store.stream("render", "e1", poll_interval=0.01):
+                events.append(event)
+                redis.delete("jobstate:render:e1")
+            return events
+
+        events = asyncio.run(asyncio.wait_for(collect(), timeout=5))
+        assert events[0].startswith("event: queued")
+        assert events[-1].startswith("event: expired")
+
+    def test_stream_endpoint_404_for_unknown_job(self, monkeypatch):
+        from fastapi import HTTPException
+        from routers import render
+
+        monkeypatch.setattr(render, "get_job_state", lambda: self.store)
+        with pytest.raises(HTTPException) as e:
+            asyncio.run(render.stream_status("missing"))
+        assert e.value.status_code == 404
+
+    def test_call_in_memory_is_direct(self):
+        """In-memory state needs no thread hop"""
+        async def main():
+            await self.store.call(self.store.queued, "render", "e1")
+            return await self.store.call(self.store.get, "render", "e1")
+
+        assert asyncio.run(main())["status"] == "queued"
+        assert self.store._executor is None
+
+    def test_redis_calls_stay_off_loop_and_io_pool(self, monkeypatch):
+        """Status reads use the store's threads, never io_pool (render backpressure)"""
+        import threading
+        from services.executor import io_pool
+
+        monkeypatch.setattr(io_pool, "run", None)
+        store = JobStateStore(redis=fakeredis.FakeStrictRedis())
+        store.queued("render", "e1")
+        threads = []
+        get = store.get
+
+        def recording_get(kind, job_id):
+            threads.append(threading.current_thread().name)
+            return get(kind, job_id)
+
+        monkeypatch.setattr(store, "get", recording_get)
+        store.complete("render", "e1")
+
+        async def collect():
+            return [event async for event in store.stream("render", "e1", poll_interval=0.01)]
+
+        events = asyncio.run(asyncio.wait_for(collect(), timeout=5))
+        assert events[-1].startswith("event: completed")
+        assert threads and all(name.startswith("job-state") for name in threads)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
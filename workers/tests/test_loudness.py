@@ -0,0 +1,170 @@
+"""
+Unit tests for two-pass loudnorm
+Tests measurement parsing, linear-mode filters and the measurement cache
+"""
+
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+from routers.render import _clip_loudness
+from services.loudness import (
+    LoudnessCache,
+    LoudnessMeasurement,
+    loudnorm_filter,
+    parse_loudnorm_output,
+)
+from services.render_pipeline import RenderPipeline, RenderPlan
+
+LOUDNORM_STDERR = """
+Input #0, mov,mp4,m4a,3gp,3g2,mj2, from 'in.mp4':
+  Duration: 01:02:03.04, start: 0.000000, bitrate: 2500 kb/s
+[Parsed_loudnorm_0 @ 0x5581]
+{
+\t"input_i" : "-27.61",
+\t"input_tp" : "-4.47",
+\t"input_lra" : "18.06",
+\t"input_thresh" : "-39.20",
+\t"output_i" : "-16.58",
+\t"output_tp" : "-1.50",
+\t"output_lra" : "14.78",
+\t"output_thresh" : "-27.71",
+\t"normalization_type" : "dynamic",
+\t"target_offset" : "0.58"
+}
+"""
+
+MEASUREMENT = LoudnessMeasurement(-27.61, -4.47, 18.06, -39.2, 0.58)
+
+
+class TestLoudnormParsing:
+    """Test parsing of the analysis pass output"""
+
+    def test_parses_json_block(self):
+        assert parse_loudnorm_output(LOUDNORM_STDERR) == MEASUREMENT
+
+    def test_no_json(self):
+        assert parse_loudnorm_output("Conversion failed!") is None
+
+    def test_silence_is_unusable(self):
+        """-inf loudness (silent input) can't drive linear mode"""
+        stderr = LOUDNORM_STDERR.replace('"-27.61"', '"-inf"')
+        assert parse_loudnorm_output(stderr) is None
+
+    def test_dict_round_trip(self):
+        assert LoudnessMeasurement.from_dict(MEASUREMENT.to_dict()) == MEASUREMENT
+
+
+class TestLoudnormFilter:
+    """Test loudnorm filter strings"""
+
+    def test_single_pass(self):
+        assert loudnorm_filter(-16.0) == "loudnorm=I=-16.0:TP=-1.5:LRA=11"
+
+    def test_linear_with_measurement(self):
+        assert loudnorm_filter(-16.0, MEASUREMENT) == (
+            "loudnorm=I=-16.0:TP=-1.5:LRA=11:measured_I=-27.61:measured_TP=-4.47"
+            ":measured_LRA=18.06:measured_thresh=-39.2:offset=0.58:linear=true"
+        )
+
+    def test_render_graph_applies_measurement_inline(self):
+        """The main filter graph carries the measured values, no extra pass"""
+        pipeline = RenderPipeline()
+        plan = RenderPlan("in.mp4", "out.mp4", 0.0, 30.0, loudness=MEASUREMENT)
+        graph = pipeline.build_filter_graph(plan, 1920, 1080)
+        assert f"[0:a]{loudnorm_filter(-16.0, MEASUREMENT)},aresample=48000[aout]" in graph
+
+        unmeasured = RenderPlan("in.mp4", "out.mp4", 0.0, 30.0)
+        assert "linear=true" not in pipeline.build_filter_graph(unmeasured, 1920, 1080)
+
+
+class TestMeasureLoudness:
+    """Test the analysis pass command"""
+
+    def setup_method(self):
+        self.pipeline = RenderPipeline()
+        self.commands = []
+
+    def capture(self, monkeypatch, stderr=LOUDNORM_STDERR):
+        def fake_run(cmd, **kwargs):
+            self.commands.append(cmd)
+            return SimpleNamespace(stdout="", stderr=stderr)
+
+        monkeypatch.setattr("services.render_pipeline.subprocess.run", fake_run)
+
+    def test_whole_source(self, monkeypatch):
+        self.capture(monkeypatch)
+        assert self.pipeline.measure_loudness("in.mp4") == MEASUREMENT
+
+        cmd = self.commands[0]
+        assert "-ss" not in cmd and "-t" not in cmd
+        assert "-vn" in cmd
+        assert cmd[cmd.index("-af") + 1].endswith(":print_format=json")
+        assert cmd[-3:] == ["-f", "null", "-"]
+
+    def test_clip_range_seeks_on_input(self, monkeypatch):
+        self.capture(monkeypatch)
+        self.pipeline.measure_loudness("https://cdn.example.com/in.mp4", 600.0, 630.0)
+
+        cmd = self.commands[0]
+        assert cmd.index("-seekable") < cmd.index("-ss") < cmd.index("-i")
+        assert cmd[cmd.index("-t") + 1] == "30.0"
+
+    def test_normalize_audio_reuses_measurement(self, monkeypatch):
+        """Given a measurement, the step-by-step path skips the analysis pass"""
+        self.capture(monkeypatch)
+        assert self.pipeline.normalize_audio("in.mp4", "out.mp4", -16.0, MEASUREMENT)
+
+        assert len(self.commands) == 1
+        assert "linear=true" in self.commands[0][self.commands[0].index("-af") + 1]
+
+
+class TestLoudnessCache:
+    """Test the measurement cache"""
+
+    @pytest.mark.parametrize("redis", [None, fakeredis.FakeStrictRedis()])
+    def test_round_trip(self, redis):
+        cache = LoudnessCache(redis=redis)
+        assert cache.get("src", "source", -16.0) is None
+
+        cache.set("src", "source", -16.0, MEASUREMENT)
+        assert cache.get("src", "source", -16.0) == MEASUREMENT
+        # Offsets depend on the target; other targets measure again
+        assert cache.get("src", "source", -14.0) is None
+
+    def test_exports_share_source_measurement(self, tmp_path, monkeypatch):
+        """A second export from the same local source skips analysis"""
+        cache = LoudnessCache()
+        monkeypatch.setattr("routers.render.get_loudness_cache", lambda: cache)
+        pipeline = RenderPipeline()
+        calls = []
+        monkeypatch.setattr(
+            pipeline, "measure_loudness",
+            lambda *args, **kwargs: calls.append(args) or MEASUREMENT
+        )
+        source = str(tmp_path / "source.mp4")
+
+        for clip in [(10.0, 40.0), (300.0, 345.0)]:
+            loudness = _clip_loudness(pipeline, "key", source, [clip], (source, *clip), -16.0)
+            assert loudness == MEASUREMENT
+        assert calls == [(source,)]
+
+    def test_remote_source_measures_clip_ranges(self, monkeypatch):
+        cache = LoudnessCache()
+        monkeypatch.setattr("routers.render.get_loudness_cache", lambda: cache)
+        pipeline = RenderPipeline()
+        calls = []
+        monkeypatch.setattr(
+            pipeline, "measure_loudness",
+            lambda *args, **kwargs: calls.append(args) or MEASUREMENT
+        )
+        url = "https://cdn.example.com/in.mp4"
+
+        for _ in range(2):
+            _clip_loudness(pipeline, "key", url, [(10.0, 40.0)], (url, 10.0, 40.0), -16.0)
+        _clip_loudness(pipeline, "key", url, [(50.0, 80.0)], (url, 50.0, 80.0), -16.0)
+        assert calls == [(url, 10.0, 40.0, -16.0), (url, 50.0, 80.0, -16.0)]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
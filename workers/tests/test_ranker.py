@@ -276,3 +276,217 @@ class TestWindowingCorrectness:
 
             avg_gap = sum(time_gaps) / len(time_gaps) if time_gaps else 0
             assert avg_gap > 0, "Clips should be separated in time"
+
+
+class TestSeedSelection:
+    """Test heap-based seed selection"""
+
+    @pytest.fixture
+    def ranker(self):
+        return RankerEngine(min_clip_duration=20, max_clip_duration=90)
+
+    @staticmethod
+    def reference_seeds(segment_scores, num_seeds, min_gap=30):
+        """Full sort plus a check against every accepted seed"""
+        order = sorted(range(len(segment_scores)), key=lambda i: segment_scores[i][2], reverse=True)
+        seeds = []
+        for index in order:
+            start = segment_scores[index][0].start
+            if not any(abs(start - segment_scores[s][0].start) < min_gap for s in seeds):
+                seeds.append(index)
+                if len(seeds) >= num_seeds:
+                    break
+        return seeds
+
+    def test_matches_sorted_scan(self, ranker):
+        import random
+        rng = random.Random(21)
+        for _ in range(30):
+            segment_scores = []
+            t = 0.0
+            for _ in range(rng.randint(0, 200)):
+                t += rng.uniform(0.5, 12.0)
+                segment = Segment(start=t, end=t + 4.0, text="x")
+                # Coarse scores so ties are common
+                segment_scores.append((segment, {}, rng.choice([0.8, 0.85, 0.9, 0.95])))
+            num_seeds = rng.randint(1, 30)
+            assert ranker._find_seed_points(segment_scores, num_seeds) == \
+                self.reference_seeds(segment_scores, num_seeds)
+
+    def test_seed_index_skips_search(self, ranker):
+        segments = [Segment(start=i * 10.0, end=i * 10.0 + 9.0, text=f"Part {i}.") for i in range(8)]
+        words = [
+            {"text": seg.text, "start": seg.start, "end": seg.end, "confidence": 0.9}
+            for seg in segments
+        ]
+        searched = ranker._expand_to_clip(segments[3], words, segments, {}, 0.9)
+        carried = ranker._expand_to_clip(segments[3], words, segments, {}, 0.9, seed_index=3)
+        assert carried is not None
+        assert carried == searched
+
+
+class TestRankMany:
+    """Test batch ranking"""
+
+    def test_matches_individual_ranking(self):
+        ranker = RankerEngine(min_clip_duration=20, max_clip_duration=90)
+        transcripts = []
+        for offset in [0, 7]:
+            words = [
+                {"text": f"Point {i + offset} matters.", "start": i * 3.0, "end": i * 3.0 + 2.5, "confidence": 0.9}
+                for i in range(60)
+            ]
+            transcripts.append((words, []))
+
+        batch = ranker.rank_many(transcripts, num_clips=3)
+
+        assert len(batch) == 2
+        for (words, diarization), result in zip(transcripts, batch):
+            assert result.clips == ranker.rank_highlights(words, diarization, num_clips=3)
+            assert result.clips
+            assert not result.features.cached
+
+    def test_failed_transcript_does_not_fail_batch(self):
+        ranker = RankerEngine(min_clip_duration=20, max_clip_duration=90)
+        good = [{"text": "Hello world.", "start": 0.0, "end": 1.0}]
+        bad = [{"text": "Hello", "start": "not a time", "end": 1.0}]
+
+        batch = ranker.rank_many([(bad, []), (good, [])])
+
+        assert batch[0] is None
+        assert batch[1].clips == []
+
+
+class TestScoreWeights:
+    """Test configurable weights and cached segment features"""
+
+    @pytest.fixture
+    def words(self):
+        texts = ["Why does this work?", "I love it so much.", "It is a proven science.", "Um so like anyway."]
+        return [
+            {"text": f"{texts[i % 4]} {i}", "start": i * 3.0, "end": i * 3.0 + 2.5, "confidence": 0.9}
+            for i in range(80)
+        ]
+
+    def test_weights_override_defaults(self):
+        ranker = RankerEngine(weights={'hook': 1.0})
+        assert ranker.weights['hook'] == 1.0
+        assert ranker.weights['novelty'] == RankerEngine.SCORE_WEIGHTS['novelty']
+
+    def test_unknown_weight_rejected(self):
+        with pytest.raises(ValueError):
+            RankerEngine(weights={'loudness': 0.5})
+
+    def test_rerank_from_cache_matches_full_ranking(self, words):
+        import json
+        payload = json.loads(json.dumps(RankerEngine().segment_features(words, []).to_cache()))
+
+        for weights in [None, {'emotion': 0.9, 'hook': 0.0}, {'structure': 1.0}]:
+            ranker = RankerEngine(min_clip_duration=20, max_clip_duration=90, weights=weights)
+            features = ranker.segment_features(words, [], cached=payload)
+            assert features.cached
+            assert ranker.rerank(words, features, num_clips=4) == ranker.rank_highlights(words, [], num_clips=4)
+
+    def test_stale_cache_is_ignored(self, words):
+        ranker = RankerEngine()
+        payload = ranker.segment_features(words, []).to_cache()
+
+        assert not ranker.segment_features(words[:-4], [], cached=payload).cached
+        assert not ranker.segment_features(words, [], cached={**payload, 'version': 0}).cached
+
+
+class TestSegmentCombinations:
+    """Test multi-segment combination search"""
+
+    @pytest.fixture
+    def ranker(self):
+        return RankerEngine()
+
+    @staticmethod
+    def reference_best(ranker, segment_scores):
+        """Exhaustive search for the highest combination rank"""
+        from itertools import combinations
+        ordered = sorted(segment_scores, key=lambda item: item[0].start)
+        best = None
+        for count in range(2, ranker.COMBINATION_MAX_SEGMENTS + 1):
+            for combo in combinations(ordered, count):
+                duration = sum(seg.duration for seg, _, _ in combo)
+                gaps = [b[0].start - a[0].end for a, b in zip(combo, combo[1:])]
+                if not (ranker.COMBINATION_MIN_DURATION <= duration <= ranker.COMBINATION_MAX_DURATION):
+                    continue
+                if not all(ranker.COMBINATION_MIN_GAP <= gap <= ranker.COMBINATION_MAX_GAP for gap in gaps):
+                    continue
+                rank = ranker._combination_rank(sum(score for _, _, score in combo), count, duration, 45.0)
+                if best is None or rank > best:
+                    best = rank
+        return best
+
+    @staticmethod
+    def rank_of(ranker, combo, target_duration=45.0):
+        duration = sum(seg.duration for seg, _, _ in combo)
+        return ranker._combination_rank(sum(score for _, _, score in combo), len(combo), duration, target_duration)
+
+    @staticmethod
+    def random_segments(rng, count):
+        segment_scores = []
+        t = 0.0
+        for _ in range(count):
+            t += rng.uniform(0.5, 40.0)
+            duration = rng.uniform(2.0, 25.0)
+            segment_scores.append((Segment(start=t, end=t + duration, text="x"), {}, rng.uniform(0, 100)))
+            t += duration
+        return segment_scores
+
+    def test_best_matches_exhaustive_search(self, ranker):
+        import random
+        rng = random.Random(5)
+        for _ in range(40):
+            segment_scores = self.random_segments(rng, rng.randint(0, 11))
+            best = self.reference_best(ranker, segment_scores)
+            found = ranker._find_segment_combinations(segment_scores, 1, beam_width=1000)
+            if best is None:
+                assert found == []
+            else:
+                assert self.rank_of(ranker, found[0]) == pytest.approx(best)
+
+    def test_combinations_are_valid_and_disjoint(self, ranker):
+        import random
+        rng = random.Random(8)
+        segment_scores = self.random_segments(rng, 300)
+        found = ranker._find_segment_combinations(segment_scores, 6)
+        assert len(found) == 6
+        seen = set()
+        ranks = []
+        for combo in found:
+            assert 2 <= len(combo) <= ranker.COMBINATION_MAX_SEGMENTS
+            duration = sum(seg.duration for seg, _, _ in combo)
+            assert ranker.COMBINATION_MIN_DURATION <= duration <= ranker.COMBINATION_MAX_DURATION
+            for a, b in zip(combo, combo[1:]):
+                assert ranker.COMBINATION_MIN_GAP <= b[0].start - a[0].end <= ranker.COMBINATION_MAX_GAP
+            keys = {(seg.start, seg.end) for seg, _, _ in combo}
+            assert not keys & seen
+            seen |= keys
+            ranks.append(self.rank_of(ranker, combo))
+        assert ranks == sorted(ranks, reverse=True)
+
+    def test_finds_combinations_not_adjacent_in_score_order(self, ranker):
+        # Alternating high/low scores: neighbours in time are never neighbours by score
+        segment_scores = [
+            (Segment(start=i * 15.0, end=i * 15.0 + 10.0, text="x"), {}, 90.0 if i % 2 else 10.0 + i)
+            for i in range(12)
+        ]
+        assert len(ranker._find_segment_combinations(segment_scores, 3)) == 3
+        used = {(seg.start, seg.end) for seg, _, _ in segment_scores}
+        assert ranker._find_segment_combinations(segment_scores, 3, used_segments=used) == []
+
+    def test_shorter_better_combination_beats_longer(self, ranker):
+        """A high-scoring pair near the target outranks a long, lower-scoring chain"""
+        short = [(Segment(start=t, end=t + 20.0, text="x"), {}, 95.0) for t in (0.0, 25.0)]
+        long = [(Segment(start=t, end=t + 28.0, text="x"), {}, 90.0) for t in (200.0, 233.0, 266.0, 299.0)]
+
+        best = ranker._find_segment_combinations(short + long, 1)[0]
+        assert best == short
+
+        # The target decides: aiming near the long chain's 112s picks it instead
+        best = ranker._find_segment_combinations(short + long, 1, target_duration=110.0)[0]
+        assert best == long
@@ -0,0 +1,475 @@
+"""
+Unit tests for single-pass render plans
+Tests filter graph compilation and ffmpeg command generation
+"""
+
+import os
+import subprocess
+
+import pytest
+from services.caption_engine import CaptionEngine
+from services.render_pipeline import (
+    ENCODE_PROFILES,
+    EncodeProfile,
+    RenderPipeline,
+    RenderPlan,
+    RenderOutput,
+    AspectRatio,
+    StitchPart,
+    get_encode_profile,
+    smart_cut_parts,
+)
+from services.transcript import Transcript
+
+
+class TestRenderPlanGraph:
+    """Test filter_complex generation from render plans"""
+
+    def setup_method(self):
+        self.pipeline = RenderPipeline()
+
+    def test_plan_duration(self):
+        """Plan duration is end - start"""
+        plan = RenderPlan("in.mp4", "out.mp4", start=12.5, end=42.5)
+        assert plan.duration == 30.0
+
+    def test_graph_chains_reframe_captions_and_loudnorm(self):
+        """Captions are burned after reframing, audio is normalized"""
+        plan = RenderPlan(
+            "in.mp4", "out.mp4", 0.0, 30.0,
+            aspect_ratio=AspectRatio.VERTICAL,
+            subtitle_file="/tmp/export-1/captions.ass",
+        )
+        graph = self.pipeline.build_filter_graph(plan, 1920, 1080)
+
+        video, audio = graph.split(";")
+        assert video.startswith("[0:v]")
+        assert video.endswith("[vout]")
+        assert video.index("pad=1080:1920") < video.index("ass=")
+        assert audio.startswith("[0:a]loudnorm=I=-16.0")
+        assert audio.endswith("[aout]")
+
+    def test_graph_with_watermark(self):
+        """Watermark overlays the second input onto the captioned video"""
+        plan = RenderPlan(
+            "in.mp4", "out.mp4", 0.0, 30.0,
+            watermark_file="logo.png",
+            watermark_position="top-left",
+        )
+        graph = self.pipeline.build_filter_graph(plan, 1920, 1080)
+
+        assert "[1:v]format=rgba" in graph
+        assert "[base][wm]overlay=10:10" in graph
+        assert "[vout]" in graph
+
+    def test_graph_without_audio(self):
+        """No audio chain when the source has no audio stream"""
+        plan = RenderPlan("in.mp4", "out.mp4", 0.0, 30.0)
+        graph = self.pipeline.build_filter_graph(plan, 1920, 1080, has_audio=False)
+
+        assert "[0:a]" not in graph
+        assert "[aout]" not in graph
+
+    def test_subtitle_path_is_escaped(self):
+        """Filtergraph special characters in paths are escaped"""
+        escaped = RenderPipeline._escape_filter_path("C:/tmp/a,b.ass")
+        assert escaped == "C\\\\:/tmp/a\\,b.ass"
+
+    @pytest.mark.parametrize("path", [
+        "/tmp/export-1/captions.ass",
+        "/tmp/10:30 take/captions.ass",
+        "/tmp/it's, here/[final];v2.ass",
+        "C:\\exports\\captions.ass",
+    ])
+    def test_subtitle_path_survives_both_parsers(self, path):
+        """The graph parser, then the option parser, give back the exact path"""
+        def unescape_until(text, stops):
+            # Backslash takes the next char literally; stop at an unescaped stop char
+            out, i = [], 0
+            while i < len(text) and text[i] not in stops:
+                if text[i] == "\\":
+                    i += 1
+                out.append(text[i])
+                i += 1
+            return "".join(out), text[i:]
+
+        filter_desc = f"ass={RenderPipeline._escape_filter_path(path)},format=yuv420p"
+        first_filter, rest = unescape_until(filter_desc, ",;[]")
+        assert rest == ",format=yuv420p"
+
+        value, options_rest = unescape_until(first_filter[len("ass="):], ":")
+        assert options_rest == ""
+        assert value == path
+
+
+class TestRenderPlanCommand:
+    """Test single-pass ffmpeg command generation"""
+
+    def setup_method(self):
+        self.pipeline = RenderPipeline()
+
+    def test_single_encode(self):
+        """The command encodes video exactly once"""
+        plan = RenderPlan("in.mp4", "out.mp4", 10.0, 40.0, subtitle_file="c.ass")
+        cmd = self.pipeline.build_render_command(plan, 1920, 1080)
+
+        assert cmd.count("ffmpeg") == 1
+        assert cmd.count("-c:v") == 1
+        assert cmd.count("-filter_complex") == 1
+        assert cmd[-1] == "out.mp4"
+
+    def test_input_side_trim(self):
+        """Trim is applied on the input so only the clip range is decoded"""
+        plan = RenderPlan("in.mp4", "out.mp4", 10.0, 40.0)
+        cmd = self.pipeline.build_render_command(plan, 1920, 1080)
+
+        assert cmd.index("-ss") < cmd.index("-i")
+        assert cmd[cmd.index("-t") + 1] == "30.0"
+
+    def test_maps_outputs(self):
+        """Filter outputs are mapped to the output file"""
+        plan = RenderPlan("in.mp4", "out.mp4", 0.0, 30.0, watermark_file="logo.png")
+        cmd = self.pipeline.build_render_command(plan, 1920, 1080)
+
+        assert cmd.count("-i") == 2
+        assert "[vout]" in cmd
+        assert "[aout]" in cmd
+
+    def test_remote_input_uses_range_reads(self):
+        """Presigned URLs are read by ffmpeg directly with seekable http"""
+        url = "https://bucket.example.com/source.mp4?X-Amz-Signature=abc"
+        plan = RenderPlan(url, "out.mp4", 3600.0, 3630.0)
+        cmd = self.pipeline.build_render_command(plan, 1920, 1080)
+
+        assert cmd[cmd.index("-seekable") + 1] == "1"
+        assert cmd.index("-reconnect") < cmd.index("-i")
+        assert cmd[cmd.index("-i") + 1] == url
+
+    def test_local_input_has_no_http_options(self):
+        """Local files get no http protocol options"""
+        plan = RenderPlan("/tmp/source.mp4", "out.mp4", 0.0, 30.0)
+        cmd = self.pipeline.build_render_command(plan, 1920, 1080)
+
+        assert "-seekable" not in cmd
+        assert "-reconnect" not in cmd
+
+
+
+class TestStitching:
+    """Test Pro Clip smart-cut stitching"""
+
+    def setup_method(self):
+        self.pipeline = RenderPipeline()
+        self.params = {
+            "video_codec": "h264",
+            "pix_fmt": "yuv420p",
+            "audio_codec": "aac",
+            "sample_rate": "48000",
+            "channels": 2,
+        }
+
+    def test_copies_whole_gops_and_encodes_edges(self):
+        """Only the partial GOPs before the first and after the last keyframe are encoded"""
+        keyframes = [0.0, 2.0, 4.0, 6.0, 8.0, 10.0]
+        parts = smart_cut_parts(3.1, 9.5, keyframes)
+
+        assert parts == [
+            StitchPart(3.1, 4.0, copy=False),
+            StitchPart(4.0, 8.0, copy=True),
+            StitchPart(8.0, 9.5, copy=False),
+        ]
+
+    def test_cut_on_keyframes_has_no_edges(self):
+        """Boundaries on keyframes need no re-encode"""
+        assert smart_cut_parts(2.0, 8.0, [0.0, 2.0, 4.0, 6.0, 8.0]) == [StitchPart(2.0, 8.0, copy=True)]
+
+    def test_short_or_uncopyable_segments_are_encoded_whole(self):
+        """No keyframe run worth copying, or a codec that can't be copied"""
+        assert smart_cut_parts(1.0, 4.5, [0.0, 4.0, 8.0]) == [StitchPart(1.0, 4.5, copy=False)]
+        assert smart_cut_parts(1.0, 9.0, []) == [StitchPart(1.0, 9.0, copy=False)]
+        assert smart_cut_parts(1.0, 9.0, [2.0, 4.0, 6.0], allow_copy=False) == [StitchPart(1.0, 9.0, copy=False)]
+
+    def test_copy_part_command(self):
+        """Copied parts are stream copies written as MPEG-TS"""
+        cmd = self.pipeline.build_stitch_part_command(
+            "in.mp4", StitchPart(4.0, 8.0, copy=True), "part.ts", self.params
+        )
+
+        assert cmd[cmd.index("-c") + 1] == "copy"
+        assert "libx264" not in cmd
+        assert cmd.index("-ss") < cmd.index("-i")
+        assert cmd[cmd.index("-f") + 1] == "mpegts"
+
+    def test_edge_part_command_matches_source(self):
+        """Encoded edges keep the source pixel format and audio layout so parts concat"""
+        cmd = self.pipeline.build_stitch_part_command(
+            "in.mp4", StitchPart(3.1, 4.0, copy=False), "part.ts", self.params
+        )
+
+        assert cmd[cmd.index("-c:v") + 1] == "libx264"
+        assert cmd[cmd.index("-pix_fmt") + 1] == "yuv420p"
+        assert cmd[cmd.index("-ar") + 1] == "48000"
+        assert cmd[cmd.index("-ac") + 1] == "2"
+
+    def test_edge_part_command_uses_profile(self):
+        cmd = self.pipeline.build_stitch_part_command(
+            "in.mp4", StitchPart(3.1, 4.0, copy=False), "part.ts", self.params,
+            get_encode_profile("draft")
+        )
+
+        assert cmd[cmd.index("-preset") + 1] == "veryfast"
+        assert cmd[cmd.index("-crf") + 1] == "28"
+
+    def stitch(self, tmp_path, monkeypatch, fail_on=None):
+        """Run stitch_segments with ffmpeg faked; returns the part files written"""
+        parts = []
+
+        def fake_run(cmd, **kwargs):
+            output = cmd[-1]
+            if output.endswith(".ts") and "-f" in cmd and cmd[cmd.index("-f") + 1] == "mpegts":
+                if len(parts) == fail_on:
+                    raise subprocess.CalledProcessError(1, cmd, stderr=b"boom")
+                parts.append(output)
+            open(output, "w").close()
+
+        monkeypatch.setattr("services.render_pipeline.subprocess.run", fake_run)
+        monkeypatch.setattr(self.pipeline, "_probe_stream_params", lambda input_file: self.params)
+        monkeypatch.setattr(self.pipeline, "probe_keyframes", lambda *args: [0.0, 2.0, 4.0, 6.0, 8.0])
+        ok = self.pipeline.stitch_segments(
+            "in.mp4", str(tmp_path / "out.ts"), [(1.0, 7.0), (20.0, 27.0)], str(tmp_path)
+        )
+        return ok, parts
+
+    def test_parts_are_private_and_removed(self, tmp_path, monkeypatch):
+        """Parts live in their own temp directory, removed once the stitch is done"""
+        ok, parts = self.stitch(tmp_path, monkeypatch)
+
+        assert ok
+        assert all(os.path.dirname(os.path.dirname(part)) == str(tmp_path) for part in parts)
+        assert [p.name for p in tmp_path.iterdir()] == ["out.ts"]
+
+    def test_parts_removed_when_a_part_fails(self, tmp_path, monkeypatch):
+        ok, parts = self.stitch(tmp_path, monkeypatch, fail_on=2)
+
+        assert not ok
+        assert len(parts) == 2
+        assert not list(tmp_path.iterdir())
+
+    def test_no_audio_stream(self):
+        """Video-only sources map no audio"""
+        params = {"video_codec": "h264", "pix_fmt": "yuv420p"}
+        cmd = self.pipeline.build_stitch_part_command(
+            "in.mp4", StitchPart(3.1, 4.0, copy=False), "part.ts", params
+        )
+
+        assert "0:a:0" not in cmd
+        assert "-c:a" not in cmd
+
+    def test_concat_list_is_private(self, tmp_path, monkeypatch):
+        """Each concat writes its own list next to the output and removes it"""
+        lists = []
+
+        def fake_run(cmd, **kwargs):
+            list_file = cmd[cmd.index("-i") + 1]
+            with open(list_file) as f:
+                lists.append((list_file, f.read()))
+
+        monkeypatch.setattr("services.render_pipeline.subprocess.run", fake_run)
+        output = tmp_path / "out.ts"
+        self.pipeline._concat(["/tmp/a.ts", "/tmp/it's.ts"], str(output))
+        self.pipeline._concat(["/tmp/b.ts"], str(output))
+
+        assert lists[0][0] != "/tmp/concat.txt"
+        assert lists[0][0].startswith(str(tmp_path))
+        assert "file '/tmp/it'\\''s.ts'" in lists[0][1]
+        assert not list(tmp_path.iterdir())
+
+    def test_captions_remapped_across_gaps(self):
+        """Segment words move onto the stitched timeline; no caption spans a cut"""
+        words = Transcript(
+            ["one", "two", "three", "four", "five", "six"],
+            [10.0, 10.5, 11.0, 50.0, 50.5, 51.0],
+            [10.4, 10.9, 11.4, 50.4, 50.9, 51.4],
+        )
+        captions = CaptionEngine.from_segments(words, [(10.0, 12.0), (50.0, 52.0)], words_per_caption=2)
+
+        assert [c.text for c in captions] == ["one two", "three", "four five", "six"]
+        assert [c.index for c in captions] == [1, 2, 3, 4]
+        assert captions[0].start == pytest.approx(0.0)
+        # Second segment starts where the first one (2s) ends
+        assert captions[2].start == pytest.approx(2.0)
+        assert captions[3].end == pytest.approx(3.4)
+
+
+
+class TestExtractClip:
+    """Test clip extraction modes"""
+
+    def setup_method(self):
+        self.pipeline = RenderPipeline()
+        self.commands = []
+
+    def capture(self, monkeypatch):
+        monkeypatch.setattr(
+            "services.render_pipeline.subprocess.run",
+            lambda cmd, **kwargs: self.commands.append(cmd)
+        )
+
+    def test_input_side_seek(self, monkeypatch):
+        """-ss precedes -i so the source before the clip is not decoded"""
+        self.capture(monkeypatch)
+        assert self.pipeline.extract_clip("in.mp4", "out.mp4", 6300.0, 6330.0)
+
+        cmd = self.commands[0]
+        assert cmd.index("-ss") < cmd.index("-i")
+        assert cmd[cmd.index("-t") + 1] == "30.0"
+        assert cmd[cmd.index("-preset") + 1] == "fast"
+
+    def test_smart_mode_stitches_one_range(self, monkeypatch):
+        """Smart mode cuts the clip at keyframes instead of re-encoding it"""
+        self.capture(monkeypatch)
+        calls = []
+        monkeypatch.setattr(
+            self.pipeline, "stitch_segments",
+            lambda input_file, output_file, segments, work_dir, profile: calls.append(segments) or True
+        )
+        assert self.pipeline.extract_clip("in.mp4", "/tmp/x/out.mp4", 10.0, 40.0, mode="smart")
+
+        assert calls == [[(10.0, 40.0)]]
+        assert self.commands == []
+
+    def test_smart_mode_falls_back_to_encode(self, monkeypatch):
+        self.capture(monkeypatch)
+        monkeypatch.setattr(self.pipeline, "stitch_segments", lambda *args: False)
+        assert self.pipeline.extract_clip("in.mp4", "out.mp4", 10.0, 40.0, mode="smart")
+
+        assert len(self.commands) == 1
+        assert "libx264" in self.commands[0]
+
+    def test_unknown_mode(self):
+        with pytest.raises(ValueError):
+            self.pipeline.extract_clip("in.mp4", "out.mp4", 0.0, 1.0, mode="fast")
+
+
+
+class TestEncodeProfiles:
+    """Test named encode profiles"""
+
+    def setup_method(self):
+        self.pipeline = RenderPipeline()
+
+    def test_default_is_standard(self):
+        """Exports keep the previous fast/CRF 23 settings by default"""
+        plan = RenderPlan("in.mp4", "out.mp4", 0.0, 30.0)
+        cmd = self.pipeline.build_render_command(plan, 1920, 1080)
+
+        assert cmd[cmd.index("-preset") + 1] == "fast"
+        assert cmd[cmd.index("-crf") + 1] == "23"
+
+    def test_profile_settings_reach_command(self):
+        plan = RenderPlan("in.mp4", "out.mp4", 0.0, 30.0, encode_profile=ENCODE_PROFILES["archival"])
+        cmd = self.pipeline.build_render_command(plan, 1920, 1080)
+
+        assert cmd[cmd.index("-preset") + 1] == "slow"
+        assert cmd[cmd.index("-crf") + 1] == "18"
+        assert cmd[cmd.index("-tune") + 1] == "film"
+        assert cmd.count("-c:v") == 1
+
+    def test_tiers_trade_speed_for_quality(self):
+        presets = ["ultrafast", "superfast", "veryfast", "faster", "fast", "medium", "slow", "slower", "veryslow"]
+        draft, standard, archival = (ENCODE_PROFILES[n] for n in ("draft", "standard", "archival"))
+        assert presets.index(draft.preset) < presets.index(standard.preset) < presets.index(archival.preset)
+        assert draft.crf > standard.crf > archival.crf
+
+    def test_lookup(self):
+        assert get_encode_profile("preview") is ENCODE_PROFILES["draft"]
+        assert get_encode_profile("Archival") is ENCODE_PROFILES["archival"]
+        assert get_encode_profile(None) is ENCODE_PROFILES["standard"]
+        with pytest.raises(ValueError):
+            get_encode_profile("lossless")
+
+    def test_gop_and_threads(self):
+        args = EncodeProfile("custom", preset="fast", crf=23, threads=4, gop=48).video_args()
+        assert args[args.index("-g") + 1] == "48"
+        assert args[args.index("-threads") + 1] == "4"
+        assert "-g" not in ENCODE_PROFILES["archival"].video_args()
+
+
+
+class TestMultiOutputRender:
+    """Test multi-aspect export from one decode"""
+
+    def setup_method(self):
+        self.pipeline = RenderPipeline()
+        self.outputs = [
+            RenderOutput("9x16.mp4", AspectRatio.VERTICAL),
+            RenderOutput("1x1.mp4", AspectRatio.SQUARE),
+            RenderOutput("16x9.mp4", AspectRatio.HORIZONTAL),
+        ]
+
+    def test_decode_and_loudnorm_once(self):
+        """One split of the decoded video and one loudnorm shared by every output"""
+        plan = RenderPlan("in.mp4", "unused.mp4", 10.0, 40.0, subtitle_file="c.ass")
+        graph = self.pipeline.build_multi_filter_graph(plan, self.outputs, 1920, 1080)
+
+        assert graph.count("[0:v]split=3") == 1
+        assert graph.count("loudnorm") == 1
+        assert "asplit=3[aout0][aout1][aout2]" in graph
+        assert graph.count("ass=c.ass") == 3
+        assert "pad=1080:1920" in graph
+        assert "pad=1080:1080" in graph
+
+    def test_command_writes_every_output(self):
+        plan = RenderPlan("in.mp4", "unused.mp4", 10.0, 40.0)
+        cmd = self.pipeline.build_multi_render_command(plan, self.outputs, 1920, 1080)
+
+        assert cmd.count("ffmpeg") == 1
+        assert cmd.count("-i") == 1
+        assert cmd.count("-c:v") == 3
+        for i, output in enumerate(self.outputs):
+            position = cmd.index(output.output_file)
+            assert cmd.index(f"[vout{i}]") < position
+            assert cmd.index(f"[aout{i}]") < position
+
+    def test_watermark_split_per_output(self):
+        plan = RenderPlan("in.mp4", "unused.mp4", 0.0, 30.0, watermark_file="logo.png")
+        graph = self.pipeline.build_multi_filter_graph(plan, self.outputs, 1920, 1080, has_audio=False)
+
+        assert "split=3[wm0][wm1][wm2]" in graph
+        assert graph.count("overlay=") == 3
+        assert "[0:a]" not in graph
+
+    def test_step_by_step_fallback_keeps_every_output(self, tmp_path, monkeypatch):
+        """Fallback intermediates never overwrite the primary captioned.mp4"""
+        from routers.render import _render_outputs_step_by_step
+
+        current = {}
+        outputs = [
+            RenderOutput(str(tmp_path / "captioned.mp4"), AspectRatio.VERTICAL),
+            RenderOutput(str(tmp_path / "captioned_1x1.mp4"), AspectRatio.SQUARE),
+        ]
+        render_step_by_step = self.pipeline.render_step_by_step
+
+        def record_aspect(plan, work_dir):
+            current["aspect"] = plan.aspect_ratio.value
+            return render_step_by_step(plan, work_dir)
+
+        def step(name):
+            def run(input_file, output_file, *args, **kwargs):
+                with open(output_file, "w") as f:
+                    f.write(f"{name}:{current['aspect']}")
+                return True
+            return run
+
+        for name in ("extract_clip", "reframe_video", "normalize_audio", "add_captions"):
+            monkeypatch.setattr(self.pipeline, name, step(name))
+        monkeypatch.setattr(self.pipeline, "render_step_by_step", record_aspect)
+        plan = RenderPlan("in.mp4", outputs[0].output_file, 0.0, 30.0, subtitle_file="captions.ass")
+
+        assert _render_outputs_step_by_step(self.pipeline, plan, outputs, str(tmp_path))
+        assert (tmp_path / "captioned.mp4").read_text() == "add_captions:9:16"
+        assert (tmp_path / "captioned_1x1.mp4").read_text() == "add_captions:1:1"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,130 @@
+"""
+Unit tests for the shared source cache
+Tests keying, single-fill under concurrency, LRU eviction and refcounts
+"""
+
+import os
+import threading
+import pytest
+from services.source_cache import SourceCache
+
+
+class FakeDownloadCache(SourceCache):
+    """SourceCache that writes fixed-size files instead of downloading"""
+
+    def __init__(self, root, max_bytes, size=100, fail=False):
+        self.size = size
+        self.fail = fail
+        self.downloads = []
+        super().__init__(root, max_bytes)
+
+    def _download(self, url, path):
+        self.downloads.append(url)
+        with open(path, "wb") as f:
+            f.write(b"x" * (self.size // 2))
+            if self.fail:
+                raise IOError("connection reset")
+            f.write(b"x" * (self.size - self.size // 2))
+
+
+class TestSourceCache:
+    """Test suite for SourceCache"""
+
+    def test_key_ignores_presigned_query(self):
+        """Re-signed URLs for the same object share a key"""
+        a = SourceCache.key_for("p1", "https://s3/bucket/p1/source.mp4?X-Amz-Signature=aaa")
+        b = SourceCache.key_for("p1", "https://s3/bucket/p1/source.mp4?X-Amz-Signature=bbb")
+        c = SourceCache.key_for("p2", "https://s3/bucket/p1/source.mp4")
+        assert a == b
+        assert a != c
+
+    def test_second_acquire_is_a_hit(self, tmp_path):
+        """A cached source is not downloaded again"""
+        cache = FakeDownloadCache(str(tmp_path), max_bytes=1000)
+        key = cache.key_for("p1", "https://s3/p1/source.mp4")
+
+        path1 = cache.acquire(key, "https://s3/p1/source.mp4")
+        cache.release(key)
+        path2 = cache.acquire(key, "https://s3/p1/source.mp4?sig=new")
+        cache.release(key)
+
+        assert path1 == path2
+        assert os.path.getsize(path1) == 100
+        assert len(cache.downloads) == 1
+
+    def test_concurrent_acquires_fill_once(self, tmp_path):
+        """Concurrent jobs for the same source share one download"""
+        cache = FakeDownloadCache(str(tmp_path), max_bytes=1000)
+        key = cache.key_for("p1", "https://s3/p1/source.mp4")
+        paths = []
+
+        def job():
+            paths.append(cache.acquire(key, "https://s3/p1/source.mp4"))
+
+        threads = [threading.Thread(target=job) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(cache.downloads) == 1
+        assert len(set(paths)) == 1
+
+    def test_failed_fill_leaves_no_entry(self, tmp_path):
+        """A failed download never leaves a partial file in the cache"""
+        cache = FakeDownloadCache(str(tmp_path), max_bytes=1000, fail=True)
+        key = cache.key_for("p1", "https://s3/p1/source.mp4")
+
+        with pytest.raises(IOError):
+            cache.acquire(key, "https://s3/p1/source.mp4")
+
+        assert not cache.contains(key)
+        assert [n for n in os.listdir(tmp_path) if not n.endswith((".lock", ".pin"))] == []
+
+    def test_lru_eviction_skips_in_flight_sources(self, tmp_path):
+        """Least recently used sources are evicted unless a job holds them"""
+        cache = FakeDownloadCache(str(tmp_path), max_bytes=250)
+        keys = [cache.key_for(f"p{i}", f"https://s3/p{i}/source.mp4") for i in range(3)]
+
+        cache.acquire(keys[0], "https://s3/p0/source.mp4")  # held
+        cache.acquire(keys[1], "https://s3/p1/source.mp4")
+        cache.release(keys[1])
+        cache.acquire(keys[2], "https://s3/p2/source.mp4")
+        cache.release(keys[2])
+
+        assert cache.contains(keys[0])
+        assert not cache.contains(keys[1])
+        assert cache.contains(keys[2])
+
+    def test_eviction_skips_sources_pinned_by_another_process(self, tmp_path):
+        """A source held by another cache instance (process) is not evicted"""
+        worker = FakeDownloadCache(str(tmp_path), max_bytes=1000)
+        key = worker.key_for("p0", "https://s3/p0/source.mp4")
+        held = worker.acquire(key, "https://s3/p0/source.mp4")
+
+        api = FakeDownloadCache(str(tmp_path), max_bytes=150)
+        other = api.key_for("p1", "https://s3/p1/source.mp4")
+        api.acquire(other, "https://s3/p1/source.mp4")
+        api.release(other)
+        assert os.path.exists(held)
+
+        worker.release(key)
+        api.acquire(other, "https://s3/p1/source.mp4")
+        api.release(other)
+        assert not os.path.exists(held)
+
+    def test_index_rebuilt_from_disk(self, tmp_path):
+        """Entries from a previous process are reused"""
+        cache = FakeDownloadCache(str(tmp_path), max_bytes=1000)
+        key = cache.key_for("p1", "https://s3/p1/source.mp4")
+        cache.acquire(key, "https://s3/p1/source.mp4")
+        cache.release(key)
+
+        restarted = FakeDownloadCache(str(tmp_path), max_bytes=1000)
+        assert restarted.contains(key)
+        restarted.acquire(key, "https://s3/p1/source.mp4")
+        assert restarted.downloads == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
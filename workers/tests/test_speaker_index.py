@@ -0,0 +1,109 @@
+"""
+Unit tests for the speaker index
+Tests bisect lookups against a diarization scan and caption speaker labels
+"""
+
+import random
+
+import pytest
+from services.caption_engine import CaptionEngine
+from services.caption_presets import CaptionPreset
+from services.ranker_engine import RankerEngine
+from services.speaker_index import SpeakerIndex
+
+
+def scan_speaker(time, diarization):
+    """Original per-lookup scan from RankerEngine._get_speaker_at_time"""
+    for dia in diarization:
+        if dia.get('start', 0) <= time <= dia.get('end', 0):
+            return dia.get('speaker')
+    return None
+
+
+class TestSpeakerIndex:
+    """Test suite for SpeakerIndex"""
+
+    def setup_method(self):
+        self.diarization = [
+            {"speaker": "Speaker A", "start": 0.0, "end": 5.0},
+            {"speaker": "Speaker B", "start": 5.0, "end": 9.0},
+            {"speaker": "Speaker A", "start": 10.0, "end": 12.0},
+        ]
+        self.index = SpeakerIndex(self.diarization)
+
+    def test_lookup(self):
+        assert self.index.speaker_at(2.0) == "Speaker A"
+        assert self.index.speaker_at(7.0) == "Speaker B"
+        assert self.index.speaker_at(11.0) == "Speaker A"
+
+    def test_gaps_and_edges(self):
+        assert self.index.speaker_at(9.5) is None
+        assert self.index.speaker_at(-1.0) is None
+        assert self.index.speaker_at(20.0) is None
+        # Shared boundary goes to the first utterance, like the scan
+        assert self.index.speaker_at(5.0) == "Speaker A"
+
+    def test_empty(self):
+        index = SpeakerIndex([])
+        assert len(index) == 0
+        assert index.speaker_at(1.0) is None
+
+    def test_matches_scan_with_overlaps(self):
+        rng = random.Random(3)
+        for _ in range(30):
+            diarization = []
+            for i in range(rng.randint(0, 40)):
+                start = rng.uniform(0, 100)
+                diarization.append({
+                    "speaker": f"Speaker {i % 4}",
+                    "start": round(start, 1),
+                    "end": round(start + rng.uniform(0, 15), 1),
+                })
+            rng.shuffle(diarization)
+            index = SpeakerIndex(diarization)
+            for _ in range(50):
+                time = round(rng.uniform(-5, 120), 1)
+                assert index.speaker_at(time) == scan_speaker(time, diarization)
+
+    def test_ranker_lookup(self):
+        ranker = RankerEngine()
+        assert ranker._get_speaker_at_time(7.0, self.diarization) == "Speaker B"
+        assert ranker._get_speaker_at_time(7.0, self.diarization, self.index) == "Speaker B"
+
+    def test_caption_speakers(self):
+        words = [
+            {"text": "hi", "start": 0.5, "end": 1.0},
+            {"text": "there", "start": 1.0, "end": 1.5},
+            {"text": "hello", "start": 2.5, "end": 3.0},
+            {"text": "back", "start": 3.0, "end": 3.5},
+        ]
+        # Words are relative to a clip starting at 4s in the source
+        captions = CaptionEngine.from_transcript(
+            words,
+            words_per_caption=2,
+            speakers=self.index,
+            speaker_offset=4.0,
+        )
+
+        assert [c.speaker for c in captions] == ["Speaker A", "Speaker B"]
+        assert CaptionEngine.from_transcript(words, words_per_caption=2)[0].speaker is None
+
+    def test_preset_ass_names_speakers(self):
+        """The ASS file renders burn in carries each caption's speaker"""
+        words = [
+            {"text": "hi", "start": 0.5, "end": 1.0},
+            {"text": "hello", "start": 2.5, "end": 3.0},
+        ]
+        engine = CaptionEngine()
+        captions = engine.from_transcript(words, words_per_caption=1, speakers=self.index, speaker_offset=4.0)
+        captions[1].speaker = "Speaker B, guest"
+
+        dialogue = [
+            line for line in engine.generate_ass_with_preset(captions, CaptionPreset.KARAOKE).splitlines()
+            if line.startswith("Dialogue:")
+        ]
+        assert [line.split(",")[4] for line in dialogue] == ["Speaker A", "Speaker B  guest"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
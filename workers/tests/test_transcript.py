@@ -0,0 +1,129 @@
+"""
+Unit tests for the columnar transcript
+Tests interning, punctuation flags, slicing and the shared consumers
+"""
+
+import pickle
+import random
+
+import pytest
+from services.boundary_detector import BoundaryDetector
+from services.caption_engine import CaptionEngine
+from services.ranker_engine import RankerEngine, SegmentBuilder, Word
+from services.transcript import (
+    CAPITALIZED,
+    CLAUSE_END,
+    HAS_STOP,
+    SENTENCE_END,
+    Transcript,
+    as_transcript,
+)
+
+
+class TestTranscript:
+    """Test suite for Transcript"""
+
+    def setup_method(self):
+        self.words = [
+            {"text": "Hello", "start": 0.0, "end": 0.4, "confidence": 0.9},
+            {"text": "world.", "start": 0.5, "end": 0.9, "confidence": 0.8},
+            {"text": "hello", "start": 1.2, "end": 1.5},
+            {"text": "again,", "start": 1.5, "end": 1.9},
+            {"text": "world.", "start": 2.0, "end": 2.4},
+        ]
+        self.transcript = Transcript.from_words(self.words)
+
+    def test_columns(self):
+        assert len(self.transcript) == 5
+        assert self.transcript.starts.tolist() == [0.0, 0.5, 1.2, 1.5, 2.0]
+        assert self.transcript.ends.tolist() == [0.4, 0.9, 1.5, 1.9, 2.4]
+        assert self.transcript.confidences.tolist() == [0.9, 0.8, 1.0, 1.0, 1.0]
+
+    def test_texts_are_interned(self):
+        assert self.transcript.vocab == ["Hello", "world.", "hello", "again,"]
+        assert self.transcript.token_ids.tolist() == [0, 1, 2, 3, 1]
+        assert self.transcript.join() == "Hello world. hello again, world."
+        assert self.transcript.texts(1, 3) == ["world.", "hello"]
+
+    def test_flags(self):
+        flags = self.transcript.flags.tolist()
+        assert flags[0] == CAPITALIZED
+        assert flags[1] == SENTENCE_END | HAS_STOP
+        assert flags[2] == 0
+        assert flags[3] == CLAUSE_END
+        assert Transcript(["u.s"], [0.0], [0.1]).flags[0] == HAS_STOP
+
+    def test_within_shifts_times(self):
+        clip = self.transcript.within(1.0, 2.0, offset=1.0)
+        assert clip.texts() == ["hello", "again,"]
+        assert clip.starts.tolist() == pytest.approx([0.2, 0.5])
+        assert clip.vocab is self.transcript.vocab
+
+    def test_from_word_objects_and_round_trip(self):
+        objects = [Word(**w) for w in self.words]
+        transcript = as_transcript(objects)
+        assert transcript.to_dicts() == self.transcript.to_dicts()
+        assert as_transcript(self.transcript) is self.transcript
+
+    def test_pickles(self):
+        restored = pickle.loads(pickle.dumps(self.transcript))
+        assert restored.to_dicts() == self.transcript.to_dicts()
+
+    def test_empty(self):
+        transcript = Transcript.from_words([])
+        assert len(transcript) == 0
+        assert transcript.within(0.0, 10.0).to_dicts() == []
+
+
+class TestTranscriptConsumers:
+    """Segments, boundaries and captions built from a Transcript"""
+
+    def random_words(self, rng, count):
+        vocabulary = ["we", "ship", "It", "works.", "really,", "now!", "why?", "the", "code"]
+        t = 0.0
+        words = []
+        for _ in range(count):
+            start = t + rng.choice([0.0, 0.1, 0.3])
+            words.append({"text": rng.choice(vocabulary), "start": start, "end": start + 0.3, "confidence": 0.9})
+            t = start + 0.3
+        return words
+
+    def test_segments_match_word_by_word_builder(self):
+        rng = random.Random(11)
+        ranker = RankerEngine()
+        diarization = [{"speaker": "A", "start": 0.0, "end": 20.0}, {"speaker": "B", "start": 20.0, "end": 90.0}]
+        # Runs without sentence ends exercise the MAX_WORDS split
+        for count in [0, 1, 21, 22, 43, 150, 300]:
+            words = self.random_words(rng, count)
+            if count == 43:
+                words = [{**w, "text": "and"} for w in words]
+
+            builder = SegmentBuilder(ranker, diarization)
+            expected = [seg for seg in (builder.add(Word(**w)) for w in words) if seg]
+            tail = builder.flush()
+            if tail:
+                expected.append(tail)
+
+            assert ranker._build_segments(Transcript.from_words(words), diarization) == expected
+
+    def test_sentence_boundaries(self):
+        transcript = Transcript.from_words([
+            {"text": "One.", "start": 0.0, "end": 0.5},
+            {"text": "two", "start": 0.6, "end": 1.0},
+            {"text": "three;", "start": 1.1, "end": 1.5},
+        ])
+        boundaries = BoundaryDetector()._find_sentence_boundaries(transcript)
+        assert [b.time for b in boundaries] == [0.5, 1.5]
+
+    def test_captions_from_transcript_match_dicts(self):
+        words = self.random_words(random.Random(5), 17)
+        from_dicts = CaptionEngine.from_transcript(words, words_per_caption=3)
+        from_columns = CaptionEngine.from_transcript(Transcript.from_words(words), words_per_caption=3)
+
+        assert from_columns == from_dicts
+        assert len(from_columns) == 6
+        assert from_columns[-1].text == " ".join(w["text"] for w in words[15:])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,62 @@
+"""
+Unit tests for the transcript index
+Tests tokenization, document frequencies and BM25 novelty
+"""
+
+import pytest
+from services.ranker_engine import RankerEngine, Segment
+from services.transcript_index import TranscriptIndex, tokenize
+
+
+class TestTranscriptIndex:
+    """Test suite for TranscriptIndex"""
+
+    def setup_method(self):
+        self.texts = [
+            "we talk about the product and the users",
+            "the product is for the users",
+            "the users love the product",
+            "quantum entanglement surprised everyone",
+        ]
+        self.index = TranscriptIndex(self.texts)
+
+    def test_tokenize_strips_punctuation(self):
+        assert tokenize("Hello, World! It's 10%.") == ["hello", "world", "it's", "10"]
+
+    def test_document_frequencies(self):
+        assert self.index.num_docs == 4
+        assert self.index.doc_freq["the"] == 3
+        assert self.index.doc_freq["quantum"] == 1
+
+    def test_rare_vocabulary_is_novel(self):
+        common = self.index.novelty(self.texts[2])
+        rare = self.index.novelty(self.texts[3])
+
+        assert rare > common
+        assert 0.0 <= common <= 1.0
+        assert rare == pytest.approx(1.0)
+
+    def test_empty_text(self):
+        assert self.index.novelty("...") == 0.5
+        assert TranscriptIndex().novelty("anything") == 0.5
+
+    def test_incremental_matches_batch(self):
+        incremental = TranscriptIndex()
+        for text in self.texts:
+            incremental.add(text)
+
+        for text in self.texts:
+            assert incremental.novelty(text) == self.index.novelty(text)
+
+    def test_ranker_uses_shared_index(self):
+        """Novelty with a prebuilt index equals building one per call"""
+        ranker = RankerEngine()
+        segments = [Segment(i, i + 1, text) for i, text in enumerate(self.texts)]
+
+        for seg in segments:
+            assert ranker._score_novelty(seg.text, segments, self.index) == \
+                ranker._score_novelty(seg.text, segments)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,43 @@
+"""
+Unit tests for ranker weight profiles
+Tests profile loading from the environment and weight validation
+"""
+
+import json
+
+import pytest
+from services.weight_profiles import load_weight_profiles, resolve_weights
+
+
+class TestWeightProfiles:
+    """Test suite for weight profile resolution"""
+
+    def test_defaults_when_unset(self, monkeypatch):
+        monkeypatch.delenv("RANKER_WEIGHT_PROFILES", raising=False)
+        assert load_weight_profiles() == {}
+        assert resolve_weights() is None
+
+    def test_profile_from_env_json(self, monkeypatch):
+        monkeypatch.setenv("RANKER_WEIGHT_PROFILES", json.dumps({"podcast": {"hook": 0.4}}))
+        assert resolve_weights("podcast") == {"hook": 0.4}
+        # Explicit weights are applied over the profile
+        assert resolve_weights("podcast", {"hook": 0.1, "novelty": 0.2}) == {"hook": 0.1, "novelty": 0.2}
+
+    def test_profile_from_file(self, monkeypatch, tmp_path):
+        path = tmp_path / "profiles.json"
+        path.write_text(json.dumps({"org_1": {"emotion": 0.3}}))
+        monkeypatch.setenv("RANKER_WEIGHT_PROFILES", str(path))
+        assert resolve_weights("org_1") == {"emotion": 0.3}
+
+    def test_invalid_requests_rejected(self, monkeypatch):
+        monkeypatch.delenv("RANKER_WEIGHT_PROFILES", raising=False)
+        with pytest.raises(ValueError):
+            resolve_weights("missing")
+        with pytest.raises(ValueError):
+            resolve_weights(weights={"virality": 1.0})
+        with pytest.raises(ValueError):
+            resolve_weights(weights={"hook": "high"})
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,150 @@
+"""
+Queue Worker - Entry point for durable ASR, ranker and render jobs
+Runs RQ workers next to (or instead of) the FastAPI app in main.py
+
+Usage:
+    python worker.py                         # every queue
+    python worker.py --queues render         # only render jobs
+
+Per-queue concurrency comes from WORKER_CONCURRENCY, e.g.
+    WORKER_CONCURRENCY="asr=1,ranker=2,render=2"
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+from typing import Dict, List
+
+from dotenv import load_dotenv
+
+# Load environment
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+from rq import SimpleWorker
+from rq.utils import utcnow
+
+from services.job_queue import QUEUE_NAMES, QUEUE_SETTINGS, get_queue, get_redis, requeue_abandoned_jobs
+
+DEFAULT_CONCURRENCY = {"asr": 1, "ranker": 2, "render": 2}
+REAPER_INTERVAL = 30  # seconds between abandoned-job sweeps
+
+
+class HeartbeatWorker(SimpleWorker):
+    """
+    In-process RQ worker with a visibility timeout
+
+    SimpleWorker runs jobs without forking, so per-process state such as
+    loaded Whisper models survives between jobs. A background thread
+    keeps the running job's StartedJobRegistry entry alive; if this
+    process dies the entry lapses after visibility_timeout and the
+    reaper hands the job to another worker.
+    """
+
+    visibility_timeout = 120
+
+    def get_heartbeat_ttl(self, job) -> int:
+        return self.visibility_timeout
+
+    def execute_job(self, job, queue):
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(self.visibility_timeout / 3):
+                job.heartbeat(utcnow(), self.visibility_timeout)
+                self.heartbeat(self.visibility_timeout)
+
+        heartbeat_thread = threading.Thread(target=beat, daemon=True)
+        heartbeat_thread.start()
+        try:
+            super().execute_job(job, queue)
+        finally:
+            stop.set()
+
+
+def parse_concurrency(value: str) -> Dict[str, int]:
+    """Parse "asr=1,render=2" into per-queue worker counts"""
+    concurrency = dict(DEFAULT_CONCURRENCY)
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, _, count = item.partition("=")
+        if name not in QUEUE_NAMES:
+            raise ValueError(f"Unknown job queue: {name}")
+        concurrency[name] = int(count)
+    return concurrency
+
+
+def run_worker(queue_name: str):
+    """Process jobs from one queue until stopped"""
+    worker = HeartbeatWorker([get_queue(queue_name)], connection=get_redis())
+    worker.visibility_timeout = QUEUE_SETTINGS[queue_name]["visibility_timeout"]
+    if queue_name == "asr":
+        # Load the model before taking jobs; it stays cached across jobs
+        from routers.asr import preload_asr_models
+        asyncio.run(preload_asr_models())
+    worker.work(with_scheduler=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ClipForge queue worker")
+    parser.add_argument(
+        "--queues",
+        nargs="+",
+        choices=QUEUE_NAMES,
+        default=list(QUEUE_NAMES),
+        help="Queues to process",
+    )
+    args = parser.parse_args()
+
+    concurrency = parse_concurrency(os.getenv("WORKER_CONCURRENCY", ""))
+    slots = [name for name in args.queues for _ in range(concurrency[name])]
+    logger.info(f"🚀 Queue worker starting: {', '.join(f'{q}x{concurrency[q]}' for q in args.queues)}")
+
+    processes: List[multiprocessing.Process] = []
+    stopping = threading.Event()
+
+    def start(queue_name: str) -> multiprocessing.Process:
+        process = multiprocessing.Process(target=run_worker, args=(queue_name,), name=f"rq-{queue_name}")
+        process.start()
+        return process
+
+    def shutdown(signum, frame):
+        stopping.set()
+        logger.info("🛑 Queue worker shutting down...")
+        for process in processes:
+            if process.is_alive():
+                os.kill(process.pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    processes.extend(start(name) for name in slots)
+
+    while not stopping.is_set():
+        # Requeue jobs whose worker died mid-run
+        for name in args.queues:
+            try:
+                requeue_abandoned_jobs(name)
+            except Exception as e:
+                logger.error(f"Abandoned job sweep failed for {name}: {e}")
+
+        # Restart crashed workers so each queue keeps its concurrency
+        for i, process in enumerate(processes):
+            if not process.is_alive() and not stopping.is_set():
+                logger.warning(f"Worker {process.name} exited ({process.exitcode}), restarting")
+                processes[i] = start(slots[i])
+
+        stopping.wait(REAPER_INTERVAL)
+
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()